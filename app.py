@@ -1,8 +1,9 @@
 from app import create_app
+from app.config.config import Config
 
 # 创建Flask应用实例
 app = create_app()
 
 if __name__ == '__main__':
-    # 运行应用
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # 开发服务器，仅用于本地调试；生产环境使用 gunicorn -c gunicorn.conf.py
+    app.run(host='0.0.0.0', port=5000, debug=Config.DEBUG, threaded=True)
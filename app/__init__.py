@@ -18,6 +18,10 @@ def create_app():
     if not os.path.exists(app.config['KUBECONFIG_DIR']):
         os.makedirs(app.config['KUBECONFIG_DIR'])
     
+    # 启动时创建集群配置文件并迁移旧版格式，之后请求只读取配置，不再加文件锁
+    from app.utils.cluster_manager import ClusterManager
+    ClusterManager()
+    
     # 登录验证装饰器
     def login_required(f):
         from functools import wraps
@@ -43,4 +47,25 @@ def create_app():
     from app.api import k8s_bp
     app.register_blueprint(k8s_bp, url_prefix='/api')
     
+    # 请求耗时指标和Prometheus端点
+    from app.utils import metrics
+    metrics.init_app(app)
+    
+    # 单个请求的Server-Timing耗时明细
+    from app.utils import request_timing
+    request_timing.init_app(app)
+    
     return app
+
+def shutdown_app(timeout=None):
+    """进程退出前停止后台任务：取消分批任务并等待当前批次完成，停止informer、Pod推送watch和熔断探测，关闭共享线程池"""
+    from app.services.wave_service import wave_job_manager
+    from app.utils.informer import informer_manager
+    from app.utils.pod_watch import pod_watch_manager
+    from app.utils.circuit_breaker import circuit_breakers
+    from app.utils.concurrency import get_executor
+    wave_job_manager.shutdown(timeout)
+    informer_manager.stop_all()
+    pod_watch_manager.stop_all()
+    circuit_breakers.stop_all()
+    get_executor().shutdown(wait=False, cancel_futures=True)
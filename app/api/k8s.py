@@ -1,9 +1,18 @@
-from flask import Blueprint, request, jsonify, current_app, send_from_directory, session
-from app.services.k8s_service import K8sService
+from flask import Blueprint, request, jsonify, current_app, send_from_directory, session, Response, stream_with_context, g
+from app.services.k8s_service import K8sService, ContinueTokenError, METRICS_SORT_KEYS, POD_FIELDS, AGGREGATE_RESOURCES
+from app.services.wave_service import wave_job_manager
 from app.utils.cluster_manager import ClusterManager
 from app.utils.auth_manager import AuthManager
+from app.utils.log_index import parse_query_time
+from app.utils.circuit_breaker import circuit_breakers
+from app.utils.pod_watch import StreamLimitExceeded
+from app.config.config import Config
 import os
+import json
+import hashlib
+import math
 from functools import wraps
+from kubernetes.client.rest import ApiException
 
 # 创建蓝图
 k8s_bp = Blueprint('k8s', __name__)
@@ -51,6 +60,114 @@ def permission_required(permission):
 def admin_required(f):
     return permission_required('admin')(f)
 
+@k8s_bp.after_request
+def add_etag(response):
+    """
+    为GET请求的JSON/YAML响应添加ETag，If-None-Match命中时返回304
+    
+    列表接口使用list_etag_check按返回对象的resourceVersion生成的ETag（命中时在格式化前已经返回304），
+    其他接口按响应内容哈希生成ETag。
+    """
+    if request.method != 'GET' or response.is_streamed:
+        return response
+    list_etag = g.get('list_etag')
+    if list_etag and response.status_code in (200, 304):
+        response.set_etag(list_etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    if response.status_code != 200:
+        return response
+    # 按响应内容哈希生成ETag，内容相同则ETag相同
+    response.add_etag()
+    # 浏览器每次使用缓存前都向服务端验证，未变化时只返回304
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+def list_etag_check():
+    """
+    列表接口传给服务层的ETag检查函数
+    
+    服务层在list完成后、格式化之前调用，参数为返回对象的(namespace, name, resourceVersion)摘要；
+    ETag由请求路径、查询参数和该摘要生成，客户端If-None-Match命中时返回True。
+    """
+    def check(digest):
+        g.list_etag = hashlib.sha1(f'{request.full_path}|{digest}'.encode()).hexdigest()
+        return request.if_none_match.contains(g.list_etag)
+    return check
+
+def not_modified():
+    """列表未变化时的304响应，ETag由add_etag添加"""
+    return Response(status=304)
+
+def get_page_args():
+    """
+    解析列表分页参数 ?limit= 和 ?continue=，未指定limit时返回全部
+    
+    Returns:
+        tuple: (limit, continue令牌, 错误信息)
+    """
+    limit = None
+    if request.args.get('limit'):
+        try:
+            limit = int(request.args['limit'])
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            return None, None, 'limit必须为正整数'
+    return limit, request.args.get('continue'), None
+
+def get_fields_arg(allowed=None):
+    """
+    解析字段投影参数 ?fields=name,status，未指定时返回(None, None)表示全部字段
+    
+    Args:
+        allowed: 允许的字段，为空时不校验
+    
+    Returns:
+        tuple: (字段集合, 错误信息)
+    """
+    value = request.args.get('fields')
+    if value is None:
+        return None, None
+    fields = frozenset(field.strip() for field in value.split(',') if field.strip())
+    if not fields:
+        return None, 'fields不能为空'
+    if allowed is not None and not fields <= set(allowed):
+        unknown = ','.join(sorted(fields - set(allowed)))
+        return None, f'不支持的字段: {unknown}，可选字段: {",".join(allowed)}'
+    return fields, None
+
+def project_fields(result, fields):
+    """只保留列表元素中指定的字段，兼容分页结果 {'items', 'continue'}"""
+    if fields is None:
+        return result
+    items = result['items'] if isinstance(result, dict) else result
+    projected = [{key: value for key, value in item.items() if key in fields} for item in items]
+    if isinstance(result, dict):
+        return dict(result, items=projected)
+    return projected
+
+def get_metrics_args():
+    """解析用量排行参数 ?sort_by=cpu|memory 和 ?top=N，返回(sort_by, top, 错误信息)"""
+    sort_by = request.args.get('sort_by', 'cpu')
+    if sort_by not in METRICS_SORT_KEYS:
+        return None, None, f'sort_by必须为{"或".join(METRICS_SORT_KEYS)}'
+    top = request.args.get('top', type=int)
+    if 'top' in request.args and (top is None or top <= 0):
+        return None, None, 'top必须为正整数'
+    return sort_by, top, None
+
+def metrics_error(e, func_name):
+    """用量接口的错误响应：集群未安装metrics-server时返回503"""
+    import traceback
+    if isinstance(e, ApiException) and e.status == 404:
+        return jsonify({'success': False, 'message': '集群未提供metrics.k8s.io接口，请确认已安装metrics-server'}), 503
+    error_msg = f"{type(e).__name__}: {str(e)}"
+    stack_trace = traceback.format_exc()
+    print(f"Error in {func_name}: {error_msg}")
+    print(f"Stack trace: {stack_trace}")
+    return jsonify({'success': False, 'message': error_msg}), 500
+
 @k8s_bp.route('/clusters', methods=['GET'])
 @login_required
 def get_clusters():
@@ -63,35 +180,80 @@ def get_clusters():
     kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
     k8s_service = K8sService(kubeconfig_dir)
     
-    # 筛选用户有权限的集群并添加版本信息
-    accessible_clusters = []
-    
-    # 全局管理员或没有集群限制的用户可以访问所有集群
+    # 全局管理员或没有集群限制的用户可以访问所有集群，否则检查每个集群是否在用户的访问列表中
     if user['permissions'].get('admin', False) or not user['permissions'].get('clusters'):
-        for cluster in all_clusters:
-            cluster_name = cluster['name']
-            # 获取集群版本信息
-            version_info = k8s_service.get_cluster_version(cluster_name)
-            accessible_clusters.append({
-                'name': cluster_name, 
-                'display_name': cluster['display_name'],
-                'version': version_info['git_version']
-            })
+        clusters = all_clusters
     else:
-        # 检查每个集群是否在用户的访问列表中
-        for cluster in all_clusters:
-            cluster_name = cluster['name']
-            if cluster_name in user['permissions']['clusters']:
-                # 获取集群版本信息
-                version_info = k8s_service.get_cluster_version(cluster_name)
-                accessible_clusters.append({
-                    'name': cluster_name, 
-                    'display_name': cluster['display_name'],
-                    'version': version_info['git_version']
-                })
+        clusters = [c for c in all_clusters if c['name'] in user['permissions']['clusters']]
+    
+    # 并发获取集群版本信息
+    versions = k8s_service.get_cluster_versions([c['name'] for c in clusters])
+    
+    accessible_clusters = []
+    for cluster in clusters:
+        accessible_clusters.append({
+            'name': cluster['name'], 
+            'display_name': cluster['display_name'],
+            'version': versions[cluster['name']]['git_version'],
+            'circuit_state': circuit_breakers.state(cluster['name'])
+        })
     
     return jsonify(accessible_clusters)
 
+@k8s_bp.route('/_aggregate/<resource>', methods=['GET'])
+@login_required
+@permission_required('read')
+def aggregate_clusters(resource):
+    """在用户可访问的所有集群中并发查询Pod、工作负载或服务并合并结果
+    
+    查询参数: namespace（必填）、type、workload（resource为pods时的工作负载名称）、clusters（逗号分隔，默认全部）、fields
+    """
+    import traceback
+    if resource not in AGGREGATE_RESOURCES:
+        return jsonify({'success': False, 'message': f'不支持的聚合资源: {resource}，可选: {",".join(AGGREGATE_RESOURCES)}'}), 400
+    namespace = request.args.get('namespace')
+    if not namespace:
+        return jsonify({'success': False, 'message': '缺少namespace参数'}), 400
+    resource_type = request.args.get('type')
+    workload_name = request.args.get('workload')
+    if resource == 'pods' and bool(resource_type) != bool(workload_name):
+        return jsonify({'success': False, 'message': 'type和workload需要同时指定'}), 400
+    fields, error = get_fields_arg(POD_FIELDS if resource == 'pods' else None)
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    
+    # 只查询用户有读权限的集群，与单集群接口的权限检查一致
+    username = session['username']
+    clusters = [
+        c['name'] for c in cluster_manager.get_clusters()
+        if auth_manager.check_permission(username, 'read', c['name'])
+    ]
+    requested = request.args.get('clusters')
+    if requested:
+        requested = [name.strip() for name in requested.split(',') if name.strip()]
+        denied = [name for name in requested if name not in clusters]
+        if denied:
+            return jsonify({'success': False, 'message': f'集群不存在或没有访问权限: {",".join(denied)}'}), 403
+        clusters = requested
+    
+    kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
+    k8s_service = K8sService(kubeconfig_dir)
+    try:
+        result = k8s_service.aggregate(
+            clusters, resource, namespace, resource_type, workload_name,
+            fields=fields if resource == 'pods' else None
+        )
+        if resource != 'pods' and fields is not None:
+            result['items'] = project_fields(result['items'], fields | {'cluster'})
+        result.update({'resource': resource, 'namespace': namespace})
+        return jsonify(result)
+    except Exception as e:
+        error_msg = f"{type(e).__name__}: {str(e)}"
+        stack_trace = traceback.format_exc()
+        print(f"Error in aggregate_clusters: {error_msg}")
+        print(f"Stack trace: {stack_trace}")
+        return jsonify({'success': False, 'message': error_msg}), 500
+
 # 管理后台API端点
 @k8s_bp.route('/admin/clusters', methods=['GET'])
 @admin_required
@@ -100,6 +262,12 @@ def admin_get_clusters():
     clusters = cluster_manager.get_clusters()
     return jsonify(clusters)
 
+@k8s_bp.route('/admin/circuit-breakers', methods=['GET'])
+@admin_required
+def admin_get_circuit_breakers():
+    """管理后台获取各集群的熔断器状态"""
+    return jsonify(circuit_breakers.states())
+
 @k8s_bp.route('/admin/clusters/<cluster_name>', methods=['GET'])
 @admin_required
 def admin_get_cluster(cluster_name):
@@ -326,8 +494,33 @@ def admin_delete_user(username):
 def admin_get_logs():
     """获取操作日志"""
     action = request.args.get('action')
-    logs = auth_manager.log_manager.get_logs(action=action)
-    return jsonify(logs)
+    query_args = ('start_time', 'end_time', 'username', 'cluster', 'resource', 'limit', 'cursor')
+    # 只按操作类型过滤时保持原有的数组返回格式，只返回最近AUDIT_LOG_QUERY_LIMIT条，按时间倒序
+    if not any(arg in request.args for arg in query_args):
+        logs = auth_manager.log_manager.get_logs(limit=Config.AUDIT_LOG_QUERY_LIMIT, action=action)
+        return jsonify(logs[::-1])
+    
+    limit = request.args.get('limit', Config.AUDIT_LOG_QUERY_LIMIT, type=int)
+    limit = max(1, min(limit, Config.AUDIT_LOG_QUERY_MAX_LIMIT))
+    cursor = request.args.get('cursor')
+    try:
+        start = parse_query_time(request.args.get('start_time'))
+        end = parse_query_time(request.args.get('end_time'), end_of_day=True)
+        cursor = int(cursor) if cursor else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'start_time/end_time须为ISO格式时间，cursor须为上一页返回的next_cursor'}), 400
+    
+    logs, next_cursor = auth_manager.log_manager.query_logs(
+        start=start,
+        end=end,
+        username=request.args.get('username'),
+        action=action,
+        cluster=request.args.get('cluster'),
+        resource_prefix=request.args.get('resource'),
+        limit=limit,
+        cursor=cursor
+    )
+    return jsonify({'items': logs, 'next_cursor': next_cursor})
 
 @k8s_bp.route('/admin')
 @admin_required
@@ -371,6 +564,90 @@ def get_nodes(cluster):
         print(f"Stack trace: {stack_trace}")
         return jsonify({'success': False, 'message': error_msg}), 500
 
+@k8s_bp.route('/<cluster>/capacity', methods=['GET'])
+@login_required
+@permission_required('read')
+def get_cluster_capacity(cluster):
+    """获取集群资源容量（可分配量、requests、limits），包含按节点的明细"""
+    import traceback
+    kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
+    k8s_service = K8sService(kubeconfig_dir)
+    try:
+        capacity = k8s_service.get_capacity(cluster)
+        return jsonify(capacity)
+    except Exception as e:
+        error_msg = f"{type(e).__name__}: {str(e)}"
+        stack_trace = traceback.format_exc()
+        print(f"Error in get_cluster_capacity: {error_msg}")
+        print(f"Stack trace: {stack_trace}")
+        return jsonify({'success': False, 'message': error_msg}), 500
+
+@k8s_bp.route('/<cluster>/<namespace>/capacity', methods=['GET'])
+@login_required
+@permission_required('read')
+def get_namespace_capacity(cluster, namespace):
+    """获取命名空间的资源requests、limits及占集群可分配量的比例"""
+    import traceback
+    kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
+    k8s_service = K8sService(kubeconfig_dir)
+    try:
+        capacity = k8s_service.get_capacity(cluster, namespace)
+        return jsonify(capacity)
+    except Exception as e:
+        error_msg = f"{type(e).__name__}: {str(e)}"
+        stack_trace = traceback.format_exc()
+        print(f"Error in get_namespace_capacity: {error_msg}")
+        print(f"Stack trace: {stack_trace}")
+        return jsonify({'success': False, 'message': error_msg}), 500
+
+@k8s_bp.route('/<cluster>/_metrics/nodes', methods=['GET'])
+@login_required
+@permission_required('read')
+def get_node_metrics(cluster):
+    """获取节点实时CPU/内存用量排行"""
+    sort_by, top, error = get_metrics_args()
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
+    k8s_service = K8sService(kubeconfig_dir)
+    try:
+        metrics = k8s_service.get_node_metrics(cluster, sort_by, top)
+        return jsonify(metrics)
+    except Exception as e:
+        return metrics_error(e, 'get_node_metrics')
+
+@k8s_bp.route('/<cluster>/_metrics/pods', methods=['GET'])
+@login_required
+@permission_required('read')
+def get_cluster_pod_metrics(cluster):
+    """获取整个集群Pod实时CPU/内存用量排行"""
+    sort_by, top, error = get_metrics_args()
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
+    k8s_service = K8sService(kubeconfig_dir)
+    try:
+        metrics = k8s_service.get_pod_metrics(cluster, None, sort_by, top)
+        return jsonify(metrics)
+    except Exception as e:
+        return metrics_error(e, 'get_cluster_pod_metrics')
+
+@k8s_bp.route('/<cluster>/<namespace>/_metrics/pods', methods=['GET'])
+@login_required
+@permission_required('read')
+def get_pod_metrics(cluster, namespace):
+    """获取命名空间下Pod实时CPU/内存用量排行"""
+    sort_by, top, error = get_metrics_args()
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
+    k8s_service = K8sService(kubeconfig_dir)
+    try:
+        metrics = k8s_service.get_pod_metrics(cluster, namespace, sort_by, top)
+        return jsonify(metrics)
+    except Exception as e:
+        return metrics_error(e, 'get_pod_metrics')
+
 @k8s_bp.route('/<cluster>/<namespace>/workloads', methods=['GET'])
 @login_required
 @permission_required('read')
@@ -380,9 +657,19 @@ def get_workloads(cluster, namespace):
     kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
     workload_type = request.args.get('type')
     k8s_service = K8sService(kubeconfig_dir)
+    fields, error = get_fields_arg()
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
     try:
-        workloads = k8s_service.get_workloads(cluster, namespace, workload_type)
-        return jsonify(workloads)
+        limit, continue_token, error = get_page_args()
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+        workloads = k8s_service.get_workloads(cluster, namespace, workload_type, limit, continue_token, etag_check=list_etag_check())
+        if workloads is None:
+            return not_modified()
+        return jsonify(project_fields(workloads, fields))
+    except ContinueTokenError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         error_msg = f"{type(e).__name__}: {str(e)}"
         stack_trace = traceback.format_exc()
@@ -397,9 +684,19 @@ def get_all_pods(cluster, namespace):
     """获取指定命名空间下的所有Pod"""
     kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
     k8s_service = K8sService(kubeconfig_dir)
+    fields, error = get_fields_arg(POD_FIELDS)
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
     try:
-        pods = k8s_service.get_pods(cluster, namespace)
+        limit, continue_token, error = get_page_args()
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+        pods = k8s_service.get_pods(cluster, namespace, limit=limit, continue_token=continue_token, fields=fields, etag_check=list_etag_check())
+        if pods is None:
+            return not_modified()
         return jsonify(pods)
+    except ContinueTokenError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         import traceback
         error_msg = f"{type(e).__name__}: {str(e)}"
@@ -415,9 +712,19 @@ def get_workload_pods(cluster, namespace, workload_type, workload_name):
     """获取指定工作负载的Pod列表"""
     kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
     k8s_service = K8sService(kubeconfig_dir)
+    fields, error = get_fields_arg(POD_FIELDS)
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
     try:
-        pods = k8s_service.get_pods(cluster, namespace, workload_type, workload_name)
+        limit, continue_token, error = get_page_args()
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+        pods = k8s_service.get_pods(cluster, namespace, workload_type, workload_name, limit, continue_token, fields, etag_check=list_etag_check())
+        if pods is None:
+            return not_modified()
         return jsonify(pods)
+    except ContinueTokenError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         import traceback
         error_msg = f"{type(e).__name__}: {str(e)}"
@@ -426,6 +733,82 @@ def get_workload_pods(cluster, namespace, workload_type, workload_name):
         print(f"Stack trace: {stack_trace}")
         return jsonify({'success': False, 'message': error_msg}), 500
 
+def sse_response(events):
+    """
+    将(事件类型, 数据)生成器包装为Server-Sent Events响应
+    
+    首个事件在返回响应前取出，集群不存在、工作负载不存在等错误仍按普通接口返回500。
+    """
+    first_event = next(events)
+    
+    def generate():
+        # 断开后浏览器EventSource在3秒后自动重连
+        yield 'retry: 3000\n\n'
+        event = first_event
+        try:
+            while True:
+                event_type, data = event
+                if event_type == 'heartbeat':
+                    yield ': heartbeat\n\n'
+                else:
+                    yield f'event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+                event = next(events)
+        except StopIteration:
+            pass
+        except Exception as e:
+            print(f"Pod stream failed: {type(e).__name__}: {str(e)}")
+            yield f'event: error\ndata: {json.dumps({"message": f"{type(e).__name__}: {str(e)}"}, ensure_ascii=False)}\n\n'
+        finally:
+            events.close()
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # 关闭Nginx等反向代理的响应缓冲
+        'X-Accel-Buffering': 'no'
+    })
+
+def stream_limit_error(error):
+    """推送连接数达到上限时返回503，浏览器不会自动重连，页面仍可手动刷新"""
+    return jsonify({'success': False, 'message': str(error)}), 503, {'Retry-After': str(Config.POD_STREAM_HEARTBEAT)}
+
+@k8s_bp.route('/<cluster>/<namespace>/pods/stream', methods=['GET'])
+@login_required
+@permission_required('read')
+def stream_all_pods(cluster, namespace):
+    """以SSE推送指定命名空间下Pod的变化"""
+    kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
+    k8s_service = K8sService(kubeconfig_dir)
+    try:
+        return sse_response(k8s_service.stream_pods(cluster, namespace))
+    except StreamLimitExceeded as e:
+        return stream_limit_error(e)
+    except Exception as e:
+        import traceback
+        error_msg = f"{type(e).__name__}: {str(e)}"
+        stack_trace = traceback.format_exc()
+        print(f"Error in stream_all_pods: {error_msg}")
+        print(f"Stack trace: {stack_trace}")
+        return jsonify({'success': False, 'message': error_msg}), 500
+
+@k8s_bp.route('/<cluster>/<namespace>/<workload_type>/<workload_name>/pods/stream', methods=['GET'])
+@login_required
+@permission_required('read')
+def stream_workload_pods(cluster, namespace, workload_type, workload_name):
+    """以SSE推送指定工作负载的Pod变化"""
+    kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
+    k8s_service = K8sService(kubeconfig_dir)
+    try:
+        return sse_response(k8s_service.stream_pods(cluster, namespace, workload_type, workload_name))
+    except StreamLimitExceeded as e:
+        return stream_limit_error(e)
+    except Exception as e:
+        import traceback
+        error_msg = f"{type(e).__name__}: {str(e)}"
+        stack_trace = traceback.format_exc()
+        print(f"Error in stream_workload_pods: {error_msg}")
+        print(f"Stack trace: {stack_trace}")
+        return jsonify({'success': False, 'message': error_msg}), 500
+
 @k8s_bp.route('/<cluster>/<namespace>/<workload_type>/<name>/yaml', methods=['GET'])
 @login_required
 @permission_required('read')
@@ -486,6 +869,190 @@ def restore_traffic(cluster, namespace, pod_name):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@k8s_bp.route('/<cluster>/pods/search', methods=['GET'])
+@login_required
+@permission_required('read')
+def search_pods(cluster):
+    """在集群所有命名空间中按标签选择器、字段选择器和名称前缀搜索Pod
+    
+    查询参数: label_selector、field_selector、name_prefix、fields、limit、continue
+    """
+    fields, error = get_fields_arg(POD_FIELDS)
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    
+    kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
+    k8s_service = K8sService(kubeconfig_dir)
+    try:
+        limit, continue_token, error = get_page_args()
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+        result = k8s_service.search_pods(
+            cluster,
+            label_selector=request.args.get('label_selector'),
+            field_selector=request.args.get('field_selector'),
+            name_prefix=request.args.get('name_prefix'),
+            limit=limit,
+            continue_token=continue_token,
+            fields=fields
+        )
+        return jsonify(result)
+    except ContinueTokenError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        import traceback
+        # 选择器语法错误（400）属于请求参数问题
+        if isinstance(e, ApiException) and e.status == 400:
+            return jsonify({'success': False, 'message': f'{e.status} {e.reason}: {e.body}'}), 400
+        error_msg = f"{type(e).__name__}: {str(e)}"
+        stack_trace = traceback.format_exc()
+        print(f"Error in search_pods: {error_msg}")
+        print(f"Stack trace: {stack_trace}")
+        return jsonify({'success': False, 'message': error_msg}), 500
+
+@k8s_bp.route('/<cluster>/pods/batch-load', methods=['POST'])
+@login_required
+@permission_required('write')
+def batch_set_load(cluster):
+    """批量踢出Pod负载或恢复Pod流量
+    
+    请求体: {"targets": [{"namespace": "...", "pod": "..."}], "load": "done|online", "parallelism": 10}
+    """
+    data = request.get_json() or {}
+    targets = data.get('targets') or []
+    load_value = data.get('load')
+    parallelism = data.get('parallelism')
+    
+    if load_value not in (Config.LOAD_DONE_VALUE, Config.LOAD_ONLINE_VALUE):
+        return jsonify({'success': False, 'message': f'load必须为{Config.LOAD_DONE_VALUE}或{Config.LOAD_ONLINE_VALUE}'}), 400
+    if not targets or not all(isinstance(t, dict) and t.get('namespace') and t.get('pod') for t in targets):
+        return jsonify({'success': False, 'message': 'targets必须为包含namespace和pod的非空列表'}), 400
+    if len(targets) > Config.BATCH_PATCH_MAX_TARGETS:
+        return jsonify({'success': False, 'message': f'targets最多{Config.BATCH_PATCH_MAX_TARGETS}个'}), 400
+    if parallelism is not None and (not isinstance(parallelism, int) or parallelism <= 0):
+        return jsonify({'success': False, 'message': 'parallelism必须为正整数'}), 400
+    
+    kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
+    k8s_service = K8sService(kubeconfig_dir)
+    try:
+        results = k8s_service.set_pods_load(cluster, targets, load_value, parallelism)
+        
+        # 成功的操作一次性批量写入日志
+        username = session.get('username', 'unknown')
+        action = 'remove_load' if load_value == Config.LOAD_DONE_VALUE else 'restore_traffic'
+        auth_manager.log_manager.add_logs([
+            {
+                'username': username,
+                'action': action,
+                'resource': f"pod/{result['namespace']}/{result['pod']}",
+                'details': f'cluster={cluster}, batch'
+            }
+            for result in results if result['success']
+        ])
+        
+        succeeded = sum(1 for result in results if result['success'])
+        return jsonify({
+            'success': succeeded == len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@k8s_bp.route('/<cluster>/<namespace>/<workload_type>/<workload_name>/waves', methods=['POST'])
+@login_required
+@permission_required('write')
+def create_wave_job(cluster, namespace, workload_type, workload_name):
+    """创建分批踢出负载/恢复流量任务，后台执行
+    
+    请求体: {"load": "done|online", "wave_size": 5, "wave_percent": 20, "pause_seconds": 30,
+             "wait_ready": true, "ready_timeout": 300}
+    """
+    data = request.get_json() or {}
+    load_value = data.get('load')
+    wave_size = data.get('wave_size')
+    wave_percent = data.get('wave_percent')
+    pause_seconds = data.get('pause_seconds')
+    ready_timeout = data.get('ready_timeout')
+    
+    if workload_type not in ('deployment', 'statefulset', 'daemonset'):
+        return jsonify({'success': False, 'message': f'不支持的工作负载类型: {workload_type}'}), 400
+    if load_value not in (Config.LOAD_DONE_VALUE, Config.LOAD_ONLINE_VALUE):
+        return jsonify({'success': False, 'message': f'load必须为{Config.LOAD_DONE_VALUE}或{Config.LOAD_ONLINE_VALUE}'}), 400
+    if wave_size is not None and (not isinstance(wave_size, int) or wave_size <= 0):
+        return jsonify({'success': False, 'message': 'wave_size必须为正整数'}), 400
+    if wave_percent is not None and (not isinstance(wave_percent, (int, float)) or not 0 < wave_percent <= 100):
+        return jsonify({'success': False, 'message': 'wave_percent必须在0到100之间'}), 400
+    for name, value in (('pause_seconds', pause_seconds), ('ready_timeout', ready_timeout)):
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))
+                                  or not math.isfinite(value) or value < 0):
+            return jsonify({'success': False, 'message': f'{name}必须为非负数（秒）'}), 400
+    
+    kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
+    success, result = wave_job_manager.create_job(
+        k8s_service=K8sService(kubeconfig_dir),
+        username=session.get('username', 'unknown'),
+        cluster=cluster,
+        namespace=namespace,
+        workload_type=workload_type,
+        workload_name=workload_name,
+        load_value=load_value,
+        wave_size=wave_size,
+        wave_percent=wave_percent,
+        pause_seconds=pause_seconds or 0,
+        wait_ready=bool(data.get('wait_ready')),
+        ready_timeout=ready_timeout
+    )
+    if not success:
+        return jsonify({'success': False, 'message': result}), 409
+    
+    # 记录操作日志
+    auth_manager.log_manager.add_operation_log(
+        result.username, 
+        'create_wave_job', 
+        f'{workload_type}/{namespace}/{workload_name}',
+        f'cluster={cluster}, load={load_value}, job={result.id}'
+    )
+    return jsonify({'success': True, 'job_id': result.id, 'job': result.to_dict()}), 202
+
+@k8s_bp.route('/<cluster>/_wave-jobs', methods=['GET'])
+@login_required
+@permission_required('read')
+def get_wave_jobs(cluster):
+    """获取集群的分批任务列表"""
+    return jsonify([job.to_dict() for job in wave_job_manager.get_jobs(cluster)])
+
+@k8s_bp.route('/<cluster>/_wave-jobs/<job_id>', methods=['GET'])
+@login_required
+@permission_required('read')
+def get_wave_job(cluster, job_id):
+    """获取分批任务进度"""
+    job = wave_job_manager.get_job(job_id)
+    if not job or job.cluster != cluster:
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    return jsonify(job.to_dict())
+
+@k8s_bp.route('/<cluster>/_wave-jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+@permission_required('write')
+def cancel_wave_job(cluster, job_id):
+    """取消分批任务，当前批次完成后停止"""
+    job = wave_job_manager.get_job(job_id)
+    if not job or job.cluster != cluster:
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    job.cancel()
+    
+    # 记录操作日志
+    username = session.get('username', 'unknown')
+    auth_manager.log_manager.add_operation_log(
+        username, 
+        'cancel_wave_job', 
+        f'{job.workload_type}/{job.namespace}/{job.workload_name}',
+        f'cluster={cluster}, job={job_id}'
+    )
+    return jsonify({'success': True, 'message': '任务将在当前批次完成后停止'})
+
 @k8s_bp.route('/<cluster>/<namespace>/services', methods=['GET'])
 @login_required
 @permission_required('read')
@@ -495,9 +1062,19 @@ def get_services(cluster, namespace):
     kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
     service_type = request.args.get('type')
     k8s_service = K8sService(kubeconfig_dir)
+    fields, error = get_fields_arg()
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
     try:
-        services = k8s_service.get_services(cluster, namespace, service_type)
-        return jsonify(services)
+        limit, continue_token, error = get_page_args()
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+        services = k8s_service.get_services(cluster, namespace, service_type, limit, continue_token, etag_check=list_etag_check())
+        if services is None:
+            return not_modified()
+        return jsonify(project_fields(services, fields))
+    except ContinueTokenError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         error_msg = f"{type(e).__name__}: {str(e)}"
         stack_trace = traceback.format_exc()
@@ -531,10 +1108,20 @@ def get_configs(cluster, namespace):
     import traceback
     kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
     k8s_service = K8sService(kubeconfig_dir)
+    fields, error = get_fields_arg()
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
     try:
         config_type = request.args.get('type')
-        configs = k8s_service.get_configs(cluster, namespace, config_type)
-        return jsonify(configs)
+        limit, continue_token, error = get_page_args()
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+        configs = k8s_service.get_configs(cluster, namespace, config_type, limit, continue_token, etag_check=list_etag_check())
+        if configs is None:
+            return not_modified()
+        return jsonify(project_fields(configs, fields))
+    except ContinueTokenError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         error_msg = f"{type(e).__name__}: {str(e)}"
         stack_trace = traceback.format_exc()
@@ -568,10 +1155,20 @@ def get_storage(cluster, namespace):
     import traceback
     kubeconfig_dir = current_app.config['KUBECONFIG_DIR']
     k8s_service = K8sService(kubeconfig_dir)
+    fields, error = get_fields_arg()
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
     try:
         storage_type = request.args.get('type')
-        storage = k8s_service.get_storage(cluster, namespace, storage_type)
-        return jsonify(storage)
+        limit, continue_token, error = get_page_args()
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+        storage = k8s_service.get_storage(cluster, namespace, storage_type, limit, continue_token, etag_check=list_etag_check())
+        if storage is None:
+            return not_modified()
+        return jsonify(project_fields(storage, fields))
+    except ContinueTokenError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         error_msg = f"{type(e).__name__}: {str(e)}"
         stack_trace = traceback.format_exc()
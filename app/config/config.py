@@ -5,14 +5,86 @@ class Config:
     # Kubeconfig目录
     KUBECONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'kubeconfigs')
     
+    # 配置文件目录：用户配置、集群配置和操作日志
+    CONFIG_DIR = os.environ.get('CONFIG_DIR') or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config')
+    
     # Flask配置
-    DEBUG = True
+    DEBUG = os.environ.get('DEBUG', 'true').lower() in ('1', 'true', 'yes')
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
     
+    # 生产服务配置（gunicorn.conf.py）
+    SERVER_BIND = os.environ.get('SERVER_BIND', '0.0.0.0:5000')  # 监听地址
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 1))  # worker进程数
+    SERVER_WORKER_CLASS = os.environ.get('SERVER_WORKER_CLASS', 'gthread')  # worker类型：gthread线程或gevent协程
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 32))  # gthread每个进程的线程数
+    SERVER_WORKER_CONNECTIONS = int(os.environ.get('SERVER_WORKER_CONNECTIONS', 1000))  # gevent每个进程的最大并发连接数
+    SERVER_TIMEOUT = int(os.environ.get('SERVER_TIMEOUT', 120))  # worker无响应超时（秒），超时后重启
+    SERVER_GRACEFUL_TIMEOUT = int(os.environ.get('SERVER_GRACEFUL_TIMEOUT', 30))  # 收到SIGTERM后等待请求完成的时间（秒）
+    SERVER_KEEPALIVE = int(os.environ.get('SERVER_KEEPALIVE', 5))  # HTTP keep-alive空闲连接保持时间（秒）
+    SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS', 0))  # worker处理多少请求后重启，0为不重启
+    
     # API配置
     API_PREFIX = '/api'
     
+    # Prometheus指标配置
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')  # 是否开启请求计时和指标端点
+    METRICS_PATH = os.environ.get('METRICS_PATH', '/metrics')  # 指标端点路径
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'true').lower() in ('1', 'true', 'yes')  # 是否返回Server-Timing响应头
+    
     # 标签配置
     LOAD_LABEL = 'load'  # 现有标签名
     LOAD_ONLINE_VALUE = 'online'  # 正常流量值
     LOAD_DONE_VALUE = 'done'  # 踢出负载值
+    
+    # 批量踢出/恢复配置
+    BATCH_PATCH_PARALLELISM = int(os.environ.get('BATCH_PATCH_PARALLELISM', 10))  # 默认并发数
+    BATCH_PATCH_MAX_PARALLELISM = int(os.environ.get('BATCH_PATCH_MAX_PARALLELISM', 50))  # 并发数上限
+    BATCH_PATCH_MAX_TARGETS = int(os.environ.get('BATCH_PATCH_MAX_TARGETS', 500))  # 单次请求的Pod数上限
+    
+    # 分批踢出/恢复任务配置
+    WAVE_READY_TIMEOUT = int(os.environ.get('WAVE_READY_TIMEOUT', 300))  # 批次间等待Pod Ready的默认超时（秒）
+    WAVE_READY_POLL_INTERVAL = int(os.environ.get('WAVE_READY_POLL_INTERVAL', 3))  # Ready检查间隔（秒）
+    WAVE_JOB_RETENTION = int(os.environ.get('WAVE_JOB_RETENTION', 3600))  # 已结束任务保留时间（秒）
+    
+    # K8s客户端配置
+    K8S_CONNECTION_POOL_MAXSIZE = int(os.environ.get('K8S_CONNECTION_POOL_MAXSIZE', 20))  # 每个集群的HTTP连接池大小
+    K8S_EXECUTOR_MAX_WORKERS = int(os.environ.get('K8S_EXECUTOR_MAX_WORKERS', 32))  # 并发请求apiserver的共享线程池大小
+    K8S_CONNECT_TIMEOUT = float(os.environ.get('K8S_CONNECT_TIMEOUT', 5))  # 连接apiserver超时（秒）
+    K8S_READ_TIMEOUT = float(os.environ.get('K8S_READ_TIMEOUT', 30))  # 等待apiserver响应超时（秒），watch等长请求单独指定
+    K8S_RETRIES = int(os.environ.get('K8S_RETRIES', 1))  # 连接失败或读超时后的重试次数，总耗时最多为(重试次数+1)倍超时
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_BREAKER_FAILURE_THRESHOLD', 5))  # 集群连续失败多少次后熔断，0表示不熔断
+    CIRCUIT_BREAKER_PROBE_INTERVAL = float(os.environ.get('CIRCUIT_BREAKER_PROBE_INTERVAL', 10))  # 熔断后后台探测集群的间隔（秒）
+    
+    # 集群版本配置
+    CLUSTER_VERSION_TIMEOUT = float(os.environ.get('CLUSTER_VERSION_TIMEOUT', 3))  # 单个集群版本查询超时（秒）
+    AGGREGATE_CLUSTER_TIMEOUT = float(os.environ.get('AGGREGATE_CLUSTER_TIMEOUT', 10))  # 多集群聚合查询中单个集群的超时（秒）
+    CLUSTER_VERSION_CACHE_TTL = int(os.environ.get('CLUSTER_VERSION_CACHE_TTL', 300))  # 版本信息缓存有效期（秒）
+    CLUSTER_VERSION_ERROR_TTL = int(os.environ.get('CLUSTER_VERSION_ERROR_TTL', 30))  # 查询失败结果缓存有效期（秒）
+    NODE_INDEX_TTL = int(os.environ.get('NODE_INDEX_TTL', 30))  # 节点索引缓存有效期（秒）
+    CAPACITY_CACHE_TTL = int(os.environ.get('CAPACITY_CACHE_TTL', 30))  # 资源容量汇总缓存有效期（秒）
+    CAPACITY_LIST_CHUNK = int(os.environ.get('CAPACITY_LIST_CHUNK', 500))  # 计算资源容量时分块list的每页条数
+    METRICS_CACHE_TTL = int(os.environ.get('METRICS_CACHE_TTL', 15))  # metrics.k8s.io采样缓存有效期（秒），与metrics-server采集间隔一致
+    POD_SEARCH_LIMIT = int(os.environ.get('POD_SEARCH_LIMIT', 500))  # 集群范围Pod搜索未指定limit时的每页条数
+    POD_SEARCH_CHUNK_SIZE = int(os.environ.get('POD_SEARCH_CHUNK_SIZE', 500))  # 按名称前缀搜索时每次请求apiserver读取的Pod数，与limit无关
+    POD_SEARCH_MAX_CHUNKS = int(os.environ.get('POD_SEARCH_MAX_CHUNKS', 20))  # 按名称前缀搜索时单次请求最多读取的块数，达到后返回continue令牌
+    
+    # Pod变化推送（SSE）配置
+    POD_STREAM_HEARTBEAT = int(os.environ.get('POD_STREAM_HEARTBEAT', 15))  # 单轮watch时长（秒），每轮结束发送一次心跳
+    POD_STREAM_MAX_DURATION = int(os.environ.get('POD_STREAM_MAX_DURATION', 600))  # 单个连接最长时间（秒），到期后由浏览器自动重连
+    POD_STREAM_MAX_CLIENTS = int(os.environ.get('POD_STREAM_MAX_CLIENTS', max(1, SERVER_THREADS // 2)))  # 每个进程同时推送的连接数上限，超过后返回503，保证普通请求有空闲线程
+    POD_STREAM_QUEUE_SIZE = int(os.environ.get('POD_STREAM_QUEUE_SIZE', 1000))  # 单个连接积压事件上限，超过后丢弃积压并重新推送快照
+    
+    # Informer缓存配置（list+watch本地缓存，默认关闭）
+    INFORMER_ENABLED = os.environ.get('INFORMER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    INFORMER_MAX_STALENESS = int(os.environ.get('INFORMER_MAX_STALENESS', 90))  # 缓存最大陈旧时间（秒），超过后直接请求apiserver
+    INFORMER_WATCH_TIMEOUT = int(os.environ.get('INFORMER_WATCH_TIMEOUT', 60))  # 单轮watch超时（秒）
+    INFORMER_SYNC_TIMEOUT = int(os.environ.get('INFORMER_SYNC_TIMEOUT', 10))  # 首次list等待时间（秒）
+    INFORMER_IDLE_TIMEOUT = int(os.environ.get('INFORMER_IDLE_TIMEOUT', 900))  # 无访问自动停止时间（秒）
+    INFORMER_FORBIDDEN_RETRY = int(os.environ.get('INFORMER_FORBIDDEN_RETRY', 600))  # 无权限list全部命名空间（401/403）后多久再尝试启动（秒）
+    
+    # 操作日志配置
+    AUDIT_LOG_SEGMENT_BYTES = int(os.environ.get('AUDIT_LOG_SEGMENT_BYTES', 10 * 1024 * 1024))  # 单个日志分段大小上限（字节）
+    AUDIT_LOG_FSYNC = os.environ.get('AUDIT_LOG_FSYNC', 'interval')  # 刷盘策略：always、interval、never
+    AUDIT_LOG_FSYNC_INTERVAL = float(os.environ.get('AUDIT_LOG_FSYNC_INTERVAL', 1))  # interval策略的刷盘间隔（秒）
+    AUDIT_LOG_QUERY_LIMIT = int(os.environ.get('AUDIT_LOG_QUERY_LIMIT', 100))  # 日志查询每页默认条数
+    AUDIT_LOG_QUERY_MAX_LIMIT = int(os.environ.get('AUDIT_LOG_QUERY_MAX_LIMIT', 1000))  # 日志查询每页最大条数
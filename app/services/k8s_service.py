@@ -1,8 +1,61 @@
 from app.utils.k8s_client import K8sClient
+from app.utils.node_index import node_index, get_node_role, get_node_status, get_node_internal_ip
+from app.utils.informer import informer_manager, INFORMER_KINDS
+from app.utils.pod_watch import pod_watch_manager
+from app.utils.cache import cluster_version_cache, capacity_cache, node_metrics_cache, pod_metrics_cache
+from app.utils.quantity import parse_quantity_or_zero, pod_resources, GIB
+from app.utils.concurrency import get_executor, run_concurrently
+from app.utils.request_timing import phase, record as record_timing, with_request_context
 from app.config.config import Config
 import os
 import glob
 import kubernetes.client
+from kubernetes.client.rest import ApiException
+import base64
+import hashlib
+import heapq
+import json
+import datetime
+import threading
+import time
+from types import SimpleNamespace
+from concurrent.futures import wait, TimeoutError as FuturesTimeoutError
+
+class ContinueTokenError(ValueError):
+    """分页令牌无效或已过期，属于请求参数错误"""
+    pass
+
+# 可列出的资源类型：kind -> (API类, 全命名空间list方法, 按命名空间list方法)
+RESOURCE_KINDS = dict(INFORMER_KINDS, **{
+    'configmaps': ('CoreV1Api', 'list_config_map_for_all_namespaces', 'list_namespaced_config_map'),
+    'secrets': ('CoreV1Api', 'list_secret_for_all_namespaces', 'list_namespaced_secret'),
+    'persistentvolumeclaims': ('CoreV1Api', 'list_persistent_volume_claim_for_all_namespaces', 'list_namespaced_persistent_volume_claim'),
+    'persistentvolumes': ('CoreV1Api', 'list_persistent_volume', None),
+    'storageclasses': ('StorageV1Api', 'list_storage_class', None),
+})
+
+# 仅获取元数据和数据项数量的资源类型（Table格式，不下载data内容）：kind -> 资源路径
+SUMMARY_KINDS = {
+    'configmap_summaries': '/api/v1/namespaces/{namespace}/configmaps',
+    'secret_summaries': '/api/v1/namespaces/{namespace}/secrets',
+}
+
+# 服务端Table格式，对象只包含元数据
+TABLE_ACCEPT = 'application/json;as=Table;v=v1;g=meta.k8s.io,application/json'
+
+# get_pods返回的Pod字段，?fields=只能从中选择
+POD_FIELDS = (
+    'name', 'namespace', 'status', 'node_ip', 'pod_ip', 'created_time',
+    'start_time', 'restart_count', 'ready', 'has_removeload', 'labels'
+)
+
+# 支持多集群聚合查询的资源
+AGGREGATE_RESOURCES = ('pods', 'workloads', 'services')
+
+# 节点/Pod实时用量API（metrics-server提供）
+METRICS_GROUP = 'metrics.k8s.io'
+METRICS_VERSION = 'v1beta1'
+METRICS_SORT_KEYS = ('cpu', 'memory')
 
 class K8sService:
     """Kubernetes服务层，处理业务逻辑"""
@@ -16,14 +69,223 @@ class K8sService:
         """
         self.kubeconfig_dir = kubeconfig_dir
     
+    def _list_func(self, k8s_client, kind, namespace=None):
+        """获取直接请求apiserver的list函数，集群级资源忽略namespace"""
+        if kind in SUMMARY_KINDS:
+            return self._summary_list_func(k8s_client, kind, namespace)
+        
+        api_class, list_all_method, list_namespaced_method = RESOURCE_KINDS[kind]
+        api = getattr(kubernetes.client, api_class)(k8s_client.get_api_client())
+        if list_namespaced_method and namespace is not None:
+            list_namespaced = getattr(api, list_namespaced_method)
+            return lambda **kwargs: list_namespaced(namespace, **kwargs)
+        return getattr(api, list_all_method)
+    
+    def _summary_list_func(self, k8s_client, kind, namespace):
+        """
+        获取以Table格式列出资源摘要的list函数
+        
+        apiserver在服务端计算Data列（数据项数量），响应中只包含元数据，
+        ConfigMap和Secret的内容不会传输到本进程。apiserver或代理忽略Table格式、返回普通列表时，
+        从完整对象中计算数据项数量（内容不会保留）。
+        """
+        api_client = k8s_client.get_api_client()
+        resource_path = SUMMARY_KINDS[kind].format(namespace=namespace)
+        
+        def list_summaries(limit=None, _continue=None, label_selector=None):
+            query_params = [('includeObject', 'Metadata')]
+            if limit:
+                query_params.append(('limit', limit))
+            if _continue:
+                query_params.append(('continue', _continue))
+            if label_selector:
+                query_params.append(('labelSelector', label_selector))
+            table = api_client.call_api(
+                resource_path, 'GET',
+                query_params=query_params,
+                header_params={'Accept': TABLE_ACCEPT},
+                response_type='object',
+                auth_settings=['BearerToken'],
+                _return_http_data_only=True
+            )
+            
+            metadata = table.get('metadata') or {}
+            list_metadata = SimpleNamespace(_continue=metadata.get('continue'))
+            if table.get('kind') != 'Table':
+                if not isinstance(table.get('items'), list):
+                    raise ValueError(f"无法解析{resource_path}的响应: kind={table.get('kind')}")
+                return SimpleNamespace(items=[self._object_summary(obj) for obj in table['items']], metadata=list_metadata)
+            
+            columns = [column['name'] for column in table.get('columnDefinitions') or []]
+            data_index = columns.index('Data') if 'Data' in columns else None
+            items = []
+            for row in table.get('rows') or []:
+                metadata = (row.get('object') or {}).get('metadata') or {}
+                cells = row.get('cells') or []
+                creation_time = ""
+                if metadata.get('creationTimestamp'):
+                    creation_time = datetime.datetime.fromisoformat(metadata['creationTimestamp'].replace('Z', '+00:00')).isoformat()
+                items.append({
+                    'name': metadata.get('name') or (cells[0] if cells else ''),
+                    'data_count': int(cells[data_index]) if data_index is not None and data_index < len(cells) else 0,
+                    'creation_time': creation_time
+                })
+            return SimpleNamespace(items=items, metadata=list_metadata)
+        
+        return list_summaries
+    
+    @staticmethod
+    def _object_summary(obj):
+        """从完整的ConfigMap/Secret对象（JSON）生成与Table行相同的摘要"""
+        metadata = obj.get('metadata') or {}
+        creation_time = ""
+        if metadata.get('creationTimestamp'):
+            creation_time = datetime.datetime.fromisoformat(metadata['creationTimestamp'].replace('Z', '+00:00')).isoformat()
+        return {
+            'name': metadata.get('name') or '',
+            # 与kubectl的Data列一致：ConfigMap包含binaryData，Secret只有data
+            'data_count': len(obj.get('data') or {}) + len(obj.get('binaryData') or {}),
+            'creation_time': creation_time
+        }
+    
+    def _list_resources(self, k8s_client, kind, namespace=None, label_selector=None):
+        """列出资源，启用informer时从本地缓存读取，否则直接请求apiserver"""
+        items = informer_manager.list(k8s_client.cluster_name, kind, k8s_client.get_api_client(), namespace, label_selector)
+        if items is not None:
+            return items
+        
+        kwargs = {'label_selector': label_selector} if label_selector else {}
+        return self._list_func(k8s_client, kind, namespace)(**kwargs).items
+    
+    @staticmethod
+    def _encode_continue(kind_index, token):
+        """编码分页令牌：当前资源类型序号 + apiserver的continue令牌"""
+        raw = json.dumps({'k': kind_index, 'c': token or ''}).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+    
+    @staticmethod
+    def _decode_continue(continue_token, kind_count):
+        """
+        解码分页令牌
+        
+        Args:
+            continue_token: 上一页返回的令牌
+            kind_count: 本次分页的资源类型数量，令牌中的类型序号必须小于该值
+        
+        Raises:
+            ContinueTokenError: 令牌格式错误或类型序号越界
+        """
+        if not continue_token:
+            return 0, None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(continue_token.encode()))
+            kind_index, token = data['k'], data['c']
+        except (ValueError, KeyError, TypeError):
+            raise ContinueTokenError(f"无效的continue令牌: {continue_token}")
+        if (isinstance(kind_index, bool) or not isinstance(kind_index, int) or not 0 <= kind_index < kind_count
+                or not isinstance(token, str)):
+            raise ContinueTokenError(f"无效的continue令牌: {continue_token}")
+        return kind_index, token or None
+    
+    def _list_page(self, k8s_client, kinds, namespace, limit, continue_token=None, label_selector=None):
+        """
+        按kinds顺序分页列出多种资源，使用apiserver的分块list接口
+        
+        Returns:
+            tuple: (kind -> 资源列表, 下一页continue令牌，没有下一页时为None)
+        """
+        kind_index, token = self._decode_continue(continue_token, len(kinds))
+        results = {kind: [] for kind in kinds}
+        remaining = limit
+        while kind_index < len(kinds) and remaining > 0:
+            kind = kinds[kind_index]
+            kwargs = {'limit': remaining}
+            if token:
+                kwargs['_continue'] = token
+            if label_selector:
+                kwargs['label_selector'] = label_selector
+            try:
+                result = self._list_func(k8s_client, kind, namespace)(**kwargs)
+            except ApiException as e:
+                # apiserver的continue令牌无效（400）或已过期（410 Gone），需要从第一页重新获取
+                if token and e.status in (400, 410):
+                    raise ContinueTokenError(f"continue令牌无效或已过期，请从第一页重新获取: {e.status} {e.reason}")
+                raise
+            results[kind].extend(result.items)
+            remaining -= len(result.items)
+            token = result.metadata._continue
+            if not token:
+                # 当前类型已列完，转到下一种类型
+                kind_index += 1
+        
+        next_token = self._encode_continue(kind_index, token) if kind_index < len(kinds) else None
+        return results, next_token
+    
+    def _list_kinds(self, k8s_client, kinds, namespace, limit=None, continue_token=None, label_selector=None):
+        """
+        列出多种资源：指定limit时分页顺序获取，否则并发获取全部
+        
+        Returns:
+            tuple: (kind -> 资源列表, 下一页continue令牌)
+        """
+        with phase('list', ','.join(kinds)):
+            if limit:
+                return self._list_page(k8s_client, kinds, namespace, limit, continue_token, label_selector)
+            
+            tasks = {}
+            for kind in kinds:
+                tasks[kind] = lambda kind=kind: self._list_resources(k8s_client, kind, namespace, label_selector)
+            return run_concurrently(tasks), None
+    
+    @staticmethod
+    def _not_modified(etag_check, results, *extra):
+        """
+        按返回对象自身的(namespace, name, resourceVersion)判断客户端缓存是否仍然有效
+        
+        不使用list响应的resourceVersion：它是集群级的etcd版本，其他命名空间的任何变更都会改变它。
+        在格式化和序列化之前调用，命中时调用方直接返回None，不再处理列表内容。
+        
+        Args:
+            etag_check: 路由提供的检查函数，参数为列表内容的摘要，客户端缓存仍有效时返回True
+            results: kind -> 资源对象列表（ConfigMap/Secret为摘要dict）
+            extra: 影响返回内容的其他条件（如工作负载的标签选择器、下一页continue令牌）
+        """
+        if etag_check is None:
+            return False
+        digest = hashlib.sha1()
+        for kind, items in sorted(results.items()):
+            identities = []
+            for obj in items:
+                if isinstance(obj, dict):
+                    # Table摘要不含resourceVersion，返回内容只来自摘要字段，直接使用摘要
+                    identities.append(json.dumps(obj, sort_keys=True))
+                    continue
+                metadata = obj.metadata
+                if not metadata.resource_version:
+                    # 版本未知时不使用ETag
+                    return False
+                identities.append(f'{metadata.namespace}/{metadata.name}/{metadata.resource_version}')
+            digest.update(f'{kind}:{len(identities)}\n'.encode())
+            for identity in sorted(identities):
+                digest.update(f'{identity}\n'.encode())
+        for part in extra:
+            digest.update(f'{part}\n'.encode())
+        return etag_check(digest.hexdigest())
+    
+    @staticmethod
+    def _page_result(items, limit, next_token):
+        """分页时返回items和continue令牌，否则直接返回列表"""
+        if limit:
+            return {'items': items, 'continue': next_token}
+        return items
+    
     def get_namespaces(self, cluster):
         """获取指定集群的命名空间列表及详细信息"""
         k8s_client = K8sClient(cluster, self.kubeconfig_dir)
-        v1 = k8s_client.get_core_client()
         
         namespaces = []
         try:
-            for ns in v1.list_namespace().items:
+            for ns in self._list_resources(k8s_client, 'namespaces'):
                 # 获取命名空间状态
                 status = "Active"
                 if ns.status and ns.status.conditions:
@@ -55,68 +317,21 @@ class K8sService:
         nodes = []
         try:
             node_list = v1.list_node()
+            # 顺便刷新节点索引，供get_pods复用
+            node_index.update(k8s_client.cluster_name, node_list.items)
             for node in node_list.items:
-                # 获取节点角色
-                role = "worker"
-                if node.metadata.labels and "node-role.kubernetes.io/control-plane" in node.metadata.labels:
-                    role = "control-plane"
-                elif node.metadata.labels and "node-role.kubernetes.io/master" in node.metadata.labels:
-                    role = "master"
-                
-                # 获取节点状态
-                status = "NotReady"
-                for condition in node.status.conditions:
-                    if condition.type == "Ready":
-                        status = condition.status
-                        break
-                
-                # 获取节点IP
-                internal_ip = ""
-                for addr in node.status.addresses:
-                    if addr.type == "InternalIP":
-                        internal_ip = addr.address
-                        break
+                # 获取节点角色、状态和IP
+                role = get_node_role(node)
+                status = get_node_status(node)
+                internal_ip = get_node_internal_ip(node)
                 
                 # 获取节点资源信息
                 cpu_allocatable = node.status.allocatable.get("cpu", "0")
                 memory_allocatable = node.status.allocatable.get("memory", "0")
                 
-                # 转换CPU从各种单位到核
-                try:
-                    if "m" in cpu_allocatable:
-                        # 去掉"m"单位，转换为核
-                        cpu_cores = float(cpu_allocatable.replace("m", "")) / 1000
-                    elif "k" in cpu_allocatable:
-                        # 去掉"k"单位，转换为核（1k = 1000，所以除以1000）
-                        cpu_cores = float(cpu_allocatable.replace("k", "")) / 1000
-                    else:
-                        # 已经是核为单位或其他情况
-                        cpu_cores = float(cpu_allocatable)
-                except (ValueError, TypeError):
-                    # 处理转换失败的情况
-                    cpu_cores = 0.0
-                
-                # 转换内存从字节到GiB
-                try:
-                    if "Ki" in memory_allocatable:
-                        memory_bytes = float(memory_allocatable.replace("Ki", "")) * 1024
-                    elif "Mi" in memory_allocatable:
-                        memory_bytes = float(memory_allocatable.replace("Mi", "")) * 1024 * 1024
-                    elif "Gi" in memory_allocatable:
-                        memory_bytes = float(memory_allocatable.replace("Gi", "")) * 1024 * 1024 * 1024
-                    elif "Ti" in memory_allocatable:
-                        memory_bytes = float(memory_allocatable.replace("Ti", "")) * 1024 * 1024 * 1024 * 1024
-                    elif "Pi" in memory_allocatable:
-                        memory_bytes = float(memory_allocatable.replace("Pi", "")) * 1024 * 1024 * 1024 * 1024 * 1024
-                    else:
-                        # 假设是字节单位
-                        memory_bytes = float(memory_allocatable)
-                    
-                    # 转换为GiB并保留两位小数
-                    memory_gib = round(memory_bytes / (1024 * 1024 * 1024), 2)
-                except (ValueError, TypeError):
-                    # 处理转换失败的情况
-                    memory_gib = 0.0
+                # 转换CPU为核，内存为GiB并保留两位小数
+                cpu_cores = parse_quantity_or_zero(cpu_allocatable)
+                memory_gib = round(parse_quantity_or_zero(memory_allocatable) / GIB, 2)
                 
                 # 获取操作系统和Kubelet版本
                 os_image = node.status.node_info.os_image
@@ -139,23 +354,274 @@ class K8sService:
         
         return nodes
     
-    def get_workloads(self, cluster, namespace, workload_type=None):
-        """获取指定集群和命名空间的工作负载及详细信息"""
+    @staticmethod
+    def _list_raw(list_func, **kwargs):
+        """分块list并直接解析JSON，跳过客户端模型反序列化（大集群下远快于模型对象）"""
+        items = []
+        continue_token = None
+        while True:
+            resp = list_func(limit=Config.CAPACITY_LIST_CHUNK, _continue=continue_token, _preload_content=False, **kwargs)
+            data = json.loads(resp.data)
+            items.extend(data.get('items') or [])
+            continue_token = (data.get('metadata') or {}).get('continue')
+            if not continue_token:
+                return items
+    
+    @staticmethod
+    def _usage_summary(allocatable_cpu, allocatable_memory, totals):
+        """组装可分配量、requests、limits及占比"""
+        cpu_req, cpu_lim, mem_req, mem_lim, pods, missing_limits = totals
+        
+        def percent(value, total):
+            return round(value / total * 100, 1) if total else None
+        
+        return {
+            'pods': int(pods),
+            'containers_without_limits': int(missing_limits),
+            'cpu': {
+                'allocatable': round(allocatable_cpu, 3),
+                'requests': round(cpu_req, 3),
+                'limits': round(cpu_lim, 3),
+                'requests_percent': percent(cpu_req, allocatable_cpu),
+                'limits_percent': percent(cpu_lim, allocatable_cpu)
+            },
+            'memory': {
+                'allocatable': int(allocatable_memory),
+                'requests': int(mem_req),
+                'limits': int(mem_lim),
+                'requests_percent': percent(mem_req, allocatable_memory),
+                'limits_percent': percent(mem_lim, allocatable_memory)
+            }
+        }
+    
+    def _compute_capacity(self, k8s_client):
+        """
+        一次list节点和运行中Pod，计算整个集群按节点、按命名空间汇总的资源容量
+        
+        每个Pod只遍历一次：有效requests/limits按init容器和overhead规则计算，同时累加到集群、节点、
+        命名空间三个维度。数量字符串解析结果按字符串缓存，大集群中重复取值只解析一次。
+        """
+        core_v1 = k8s_client.get_core_client()
+        nodes = self._list_raw(core_v1.list_node)
+        # 已结束的Pod不占用资源
+        pods = self._list_raw(core_v1.list_pod_for_all_namespaces, field_selector='status.phase!=Succeeded,status.phase!=Failed')
+        
+        node_allocatable = {}
+        for node in nodes:
+            allocatable = (node.get('status') or {}).get('allocatable') or {}
+            node_allocatable[node['metadata']['name']] = (
+                parse_quantity_or_zero(allocatable.get('cpu')),
+                parse_quantity_or_zero(allocatable.get('memory'))
+            )
+        
+        # 累加列：cpu_req, cpu_lim, mem_req, mem_lim, pods, containers_without_limits
+        cluster_totals = [0.0] * 6
+        node_totals = {name: [0.0] * 6 for name in node_allocatable}
+        namespace_totals = {}
+        for pod in pods:
+            values = pod_resources(pod.get('spec') or {})
+            row = (values[0], values[1], values[2], values[3], 1, values[4])
+            targets = [cluster_totals]
+            namespace = pod['metadata'].get('namespace', '')
+            if namespace not in namespace_totals:
+                namespace_totals[namespace] = [0.0] * 6
+            targets.append(namespace_totals[namespace])
+            node_name = (pod.get('spec') or {}).get('nodeName')
+            if node_name in node_totals:
+                targets.append(node_totals[node_name])
+            for totals in targets:
+                for i in range(6):
+                    totals[i] += row[i]
+        
+        allocatable_cpu = sum(cpu for cpu, _ in node_allocatable.values())
+        allocatable_memory = sum(memory for _, memory in node_allocatable.values())
+        return {
+            'nodes': len(node_allocatable),
+            'allocatable': (allocatable_cpu, allocatable_memory),
+            'cluster': cluster_totals,
+            'by_node': node_totals,
+            'node_allocatable': node_allocatable,
+            'by_namespace': namespace_totals,
+            'generated_at': datetime.datetime.now().isoformat()
+        }
+    
+    def get_capacity(self, cluster, namespace=None):
+        """
+        获取集群或命名空间的资源容量：可分配量、requests、limits及占比
+        
+        整个集群的汇总结果按CAPACITY_CACHE_TTL缓存，集群和各命名空间的查询共用同一份计算结果。
+        
+        Args:
+            cluster: 集群名称
+            namespace: 命名空间，为空时返回整个集群及按节点的明细
+            
+        Returns:
+            dict: 资源容量汇总，CPU单位为核，内存单位为字节
+        """
+        k8s_client = K8sClient(cluster, self.kubeconfig_dir)
+        capacity = capacity_cache.get(k8s_client.cluster_name)
+        if capacity is None:
+            with phase('capacity'):
+                capacity = self._compute_capacity(k8s_client)
+            capacity_cache.set(k8s_client.cluster_name, capacity)
+        
+        allocatable_cpu, allocatable_memory = capacity['allocatable']
+        if namespace:
+            totals = capacity['by_namespace'].get(namespace, [0.0] * 6)
+            result = self._usage_summary(allocatable_cpu, allocatable_memory, totals)
+            result.update({'cluster': k8s_client.cluster_name, 'namespace': namespace})
+        else:
+            result = self._usage_summary(allocatable_cpu, allocatable_memory, capacity['cluster'])
+            result.update({'cluster': k8s_client.cluster_name, 'namespace': None})
+            result['by_node'] = [
+                dict(self._usage_summary(cpu, memory, capacity['by_node'][name]), name=name)
+                for name, (cpu, memory) in sorted(capacity['node_allocatable'].items())
+            ]
+        result['nodes'] = capacity['nodes']
+        result['generated_at'] = capacity['generated_at']
+        return result
+    
+    @staticmethod
+    def _container_usage(containers):
+        """累加容器用量，返回(CPU核数, 内存字节)"""
+        cpu = memory = 0.0
+        for container in containers or ():
+            usage = container.get('usage') or {}
+            cpu += parse_quantity_or_zero(usage.get('cpu'))
+            memory += parse_quantity_or_zero(usage.get('memory'))
+        return cpu, memory
+    
+    def _sample_metrics(self, k8s_client, plural):
+        """
+        获取整个集群的节点或Pod用量采样
+        
+        每个集群只发起一次metrics.k8s.io的list调用（Pod为所有命名空间），结果解析为精简的行后
+        按METRICS_CACHE_TTL缓存。metrics-server每个采集周期才更新一次数据，周期内重复请求没有意义。
+        
+        Args:
+            k8s_client: K8sClient实例
+            plural: nodes或pods
+            
+        Returns:
+            list: 用量行，CPU单位为核，内存单位为字节
+        """
+        cache = node_metrics_cache if plural == 'nodes' else pod_metrics_cache
+        rows = cache.get(k8s_client.cluster_name)
+        if rows is not None:
+            return rows
+        
+        custom_api = k8s_client.get_custom_objects_client()
+        data = custom_api.list_cluster_custom_object(METRICS_GROUP, METRICS_VERSION, plural)
+        rows = []
+        for item in data.get('items') or []:
+            metadata = item.get('metadata') or {}
+            if plural == 'nodes':
+                usage = item.get('usage') or {}
+                cpu = parse_quantity_or_zero(usage.get('cpu'))
+                memory = parse_quantity_or_zero(usage.get('memory'))
+                row = {'name': metadata.get('name')}
+            else:
+                containers = item.get('containers') or []
+                cpu, memory = self._container_usage(containers)
+                row = {
+                    'namespace': metadata.get('namespace'),
+                    'name': metadata.get('name'),
+                    'containers': len(containers)
+                }
+            row.update({
+                'cpu': round(cpu, 3),
+                'memory': int(memory),
+                'timestamp': item.get('timestamp'),
+                'window': item.get('window')
+            })
+            rows.append(row)
+        cache.set(k8s_client.cluster_name, rows)
+        return rows
+    
+    def _rank_metrics(self, rows, sort_by, top):
+        """按CPU或内存用量降序排列，指定top时只取前N个"""
+        if sort_by not in METRICS_SORT_KEYS:
+            raise ValueError(f'sort_by必须为{"或".join(METRICS_SORT_KEYS)}')
+        key = lambda row: row[sort_by]
+        if top:
+            # 只需前N个时用堆选择，避免对整个集群的Pod全量排序
+            return heapq.nlargest(top, rows, key=key)
+        return sorted(rows, key=key, reverse=True)
+    
+    def get_node_metrics(self, cluster, sort_by='cpu', top=None):
+        """
+        获取节点实时CPU/内存用量（metrics.k8s.io）
+        
+        Args:
+            cluster: 集群名称
+            sort_by: 排序字段，cpu或memory，降序
+            top: 只返回用量最高的前N个节点，为空时返回全部
+            
+        Returns:
+            dict: {'cluster', 'sort_by', 'total', 'items'}，CPU单位为核，内存单位为字节
+        """
+        k8s_client = K8sClient(cluster, self.kubeconfig_dir)
+        rows = self._sample_metrics(k8s_client, 'nodes')
+        return {
+            'cluster': k8s_client.cluster_name,
+            'sort_by': sort_by,
+            'total': len(rows),
+            'items': self._rank_metrics(rows, sort_by, top)
+        }
+    
+    def get_pod_metrics(self, cluster, namespace=None, sort_by='cpu', top=None):
+        """
+        获取Pod实时CPU/内存用量（metrics.k8s.io）
+        
+        整个集群的Pod用量通过一次list获取并缓存，按命名空间的查询从缓存中过滤。
+        
+        Args:
+            cluster: 集群名称
+            namespace: 命名空间，为空时返回所有命名空间
+            sort_by: 排序字段，cpu或memory，降序
+            top: 只返回用量最高的前N个Pod，为空时返回全部
+            
+        Returns:
+            dict: {'cluster', 'namespace', 'sort_by', 'total', 'items'}，CPU单位为核，内存单位为字节
+        """
+        k8s_client = K8sClient(cluster, self.kubeconfig_dir)
+        rows = self._sample_metrics(k8s_client, 'pods')
+        if namespace:
+            rows = [row for row in rows if row['namespace'] == namespace]
+        return {
+            'cluster': k8s_client.cluster_name,
+            'namespace': namespace,
+            'sort_by': sort_by,
+            'total': len(rows),
+            'items': self._rank_metrics(rows, sort_by, top)
+        }
+    
+    def get_workloads(self, cluster, namespace, workload_type=None, limit=None, continue_token=None, etag_check=None):
+        """获取指定集群和命名空间的工作负载及详细信息，指定limit时分页返回；etag_check命中时返回None"""
         k8s_client = K8sClient(cluster, self.kubeconfig_dir)
-        apps_v1 = k8s_client.get_apps_client()
         
         workloads = []
         
         try:
             print(f"开始获取工作负载，集群: {cluster}, 命名空间: {namespace}, 类型: {workload_type}")
             
+            # 获取各类工作负载列表（并发或分页），结果按固定顺序合并
+            kinds = [
+                kind for kind, kind_type in (('deployments', 'deployment'), ('statefulsets', 'statefulset'), ('daemonsets', 'daemonset'))
+                if workload_type == kind_type or not workload_type
+            ]
+            results, next_token = self._list_kinds(k8s_client, kinds, namespace, limit, continue_token)
+            if self._not_modified(etag_check, results, next_token):
+                return None
+            format_start = time.perf_counter()
+            
             # 只获取Deployment、StatefulSet和DaemonSet，跳过Job和CronJob
             # 获取Deployment
             if workload_type == 'deployment' or not workload_type:
                 print("获取Deployment...")
-                deployments = apps_v1.list_namespaced_deployment(namespace)
-                print(f"获取到 {len(deployments.items)} 个Deployment")
-                for deploy in deployments.items:
+                deployments = results['deployments']
+                print(f"获取到 {len(deployments)} 个Deployment")
+                for deploy in deployments:
                     # 获取状态
                     status = "Unknown"
                     if deploy.status.available_replicas is not None and deploy.status.available_replicas > 0:
@@ -186,9 +652,9 @@ class K8sService:
             # 获取StatefulSet
             if workload_type == 'statefulset' or not workload_type:
                 print("获取StatefulSet...")
-                statefulsets = apps_v1.list_namespaced_stateful_set(namespace)
-                print(f"获取到 {len(statefulsets.items)} 个StatefulSet")
-                for sts in statefulsets.items:
+                statefulsets = results['statefulsets']
+                print(f"获取到 {len(statefulsets)} 个StatefulSet")
+                for sts in statefulsets:
                     # 获取状态
                     status = "Unknown"
                     if sts.status.ready_replicas is not None and sts.status.ready_replicas > 0:
@@ -217,9 +683,9 @@ class K8sService:
             # 获取DaemonSet
             if workload_type == 'daemonset' or not workload_type:
                 print("获取DaemonSet...")
-                daemonsets = apps_v1.list_namespaced_daemon_set(namespace)
-                print(f"获取到 {len(daemonsets.items)} 个DaemonSet")
-                for ds in daemonsets.items:
+                daemonsets = results['daemonsets']
+                print(f"获取到 {len(daemonsets)} 个DaemonSet")
+                for ds in daemonsets:
                     # 获取状态
                     status = "Unknown"
                     if ds.status.number_ready is not None and ds.status.number_ready > 0:
@@ -250,15 +716,12 @@ class K8sService:
             traceback.print_exc()
             raise
         
+        record_timing('format', time.perf_counter() - format_start, 'workloads')
         print(f"获取工作负载完成，共 {len(workloads)} 个工作负载")
-        return workloads
+        return self._page_result(workloads, limit, next_token)
     
-    def get_pods(self, cluster, namespace, workload_type=None, workload_name=None):
-        """获取指定工作负载的Pod列表或所有Pod"""
-        k8s_client = K8sClient(cluster, self.kubeconfig_dir)
-        core_v1 = k8s_client.get_core_client()
-        apps_v1 = k8s_client.get_apps_client()
-        
+    def _resolve_pod_selector(self, apps_v1, namespace, workload_type, workload_name):
+        """根据工作负载的matchLabels生成Pod标签选择器，未指定工作负载时返回空字符串"""
         selector = ''
         
         if workload_type and workload_name:
@@ -273,74 +736,277 @@ class K8sService:
                 ds = apps_v1.read_namespaced_daemon_set(workload_name, namespace)
                 selector = ','.join([f'{k}={v}' for k, v in ds.spec.selector.match_labels.items()])
         
-        # 获取Pod列表
-        if selector:
-            pods = core_v1.list_namespaced_pod(namespace, label_selector=selector)
-        else:
-            # 获取所有Pod
-            pods = core_v1.list_namespaced_pod(namespace)
+        return selector
+    
+    def _node_ip_lookup(self, k8s_client, core_v1):
+        """
+        创建节点名称到InternalIP的查询函数
         
-        pod_list = []
-        for pod in pods.items:
-            # 判断是否已踢出负载：load标签值为done表示已踢出
-            has_removeload = pod.metadata.labels and Config.LOAD_LABEL in pod.metadata.labels and pod.metadata.labels[Config.LOAD_LABEL] == Config.LOAD_DONE_VALUE
-            
-            # 获取真实的节点IP地址
-            node_ip = pod.spec.node_name  # 默认使用节点名称
+        一次list_node获取节点索引，避免逐个Pod调用read_node；索引中没有该节点（如新加入的节点）时，
+        同一个查询函数最多重新拉取一次。
+        """
+        cluster_name = k8s_client.cluster_name
+        state = {'nodes': node_index.peek(cluster_name), 'refreshed': False}
+        if state['nodes'] is None:
+            state['refreshed'] = True
             try:
-                # 读取节点信息
-                node = core_v1.read_node(pod.spec.node_name)
-                # 遍历节点地址，找到InternalIP
-                for addr in node.status.addresses:
-                    if addr.type == 'InternalIP':
-                        node_ip = addr.address
-                        break
+                state['nodes'] = node_index.refresh(cluster_name, core_v1)
             except Exception as e:
-                print(f"Failed to get node IP for {pod.spec.node_name}: {e}")
-            
-            import datetime
-            
+                print(f"Failed to list nodes for {cluster_name}: {e}")
+                state['nodes'] = {}
+        
+        def lookup(node_name):
+            if node_name not in state['nodes'] and not state['refreshed']:
+                try:
+                    state['nodes'] = node_index.refresh(cluster_name, core_v1)
+                except Exception as e:
+                    print(f"Failed to refresh node index for {cluster_name}: {e}")
+                state['refreshed'] = True
+            node_info = state['nodes'].get(node_name)
+            if node_info and node_info['internal_ip']:
+                return node_info['internal_ip']
+            # 默认使用节点名称
+            return node_name
+        
+        return lookup
+    
+    def _format_pod(self, pod, namespace, node_ip_lookup, fields=None):
+        """
+        将Pod对象转换为get_pods返回的格式
+        
+        Args:
+            pod: Pod对象
+            namespace: 命名空间
+            node_ip_lookup: 节点名称到IP的查询函数，不需要node_ip字段时可以为None
+            fields: 需要返回的字段集合，为空时返回POD_FIELDS中的全部字段；未请求的字段不计算
+        """
+        fields = POD_FIELDS if fields is None else fields
+        result = {}
+        
+        if 'name' in fields:
+            result['name'] = pod.metadata.name
+        if 'namespace' in fields:
+            result['namespace'] = namespace
+        if 'status' in fields:
+            result['status'] = pod.status.phase
+        
+        if 'node_ip' in fields:
+            # 获取真实的节点IP地址
+            node_ip = pod.spec.node_name
+            if pod.spec.node_name:
+                node_ip = node_ip_lookup(pod.spec.node_name)
+            result['node_ip'] = node_ip
+        
+        if 'pod_ip' in fields:
+            result['pod_ip'] = pod.status.pod_ip
+        
+        if 'created_time' in fields:
             # 获取创建时间，并转换为UTC+8时间
-            created_time = '-'            
+            created_time = '-'
             if pod.metadata.creation_timestamp:
                 # Kubernetes API返回的是UTC时间，需要转换为UTC+8
                 utc_time = pod.metadata.creation_timestamp
                 # 设置时区为UTC+8
                 utc8_time = utc_time + datetime.timedelta(hours=8)
-                created_time = utc8_time.strftime('%Y-%m-%d %H:%M:%S')            
-            
-            # 计算运行时间
-            running_time = '-'            
-            if pod.status.start_time:
-                start_time = pod.status.start_time
-                current_time = datetime.datetime.now(start_time.tzinfo) if start_time.tzinfo else datetime.datetime.now()
-                delta = current_time - start_time
-                # 格式化运行时间为 天:时:分:秒
-                days = delta.days
-                hours, remainder = divmod(delta.seconds, 3600)
-                minutes, seconds = divmod(remainder, 60)
-                running_time = f'{days}d {hours}h {minutes}m {seconds}s'            
-            
+                created_time = utc8_time.strftime('%Y-%m-%d %H:%M:%S')
+            result['created_time'] = created_time
+        
+        if 'start_time' in fields:
+            # 启动时间（ISO格式），运行时长由客户端计算，返回内容不随时间变化，可以按resourceVersion缓存
+            result['start_time'] = pod.status.start_time.isoformat() if pod.status.start_time else None
+        
+        if 'restart_count' in fields:
             # 获取重启次数
             restart_count = 0
             if pod.status.container_statuses:
                 for container_status in pod.status.container_statuses:
                     restart_count += container_status.restart_count
+            result['restart_count'] = restart_count
+        
+        if 'ready' in fields:
+            # 获取Ready状态
+            ready = False
+            for condition in pod.status.conditions or []:
+                if condition.type == 'Ready':
+                    ready = condition.status == 'True'
+                    break
+            result['ready'] = ready
+        
+        if 'has_removeload' in fields:
+            # 判断是否已踢出负载：load标签值为done表示已踢出
+            result['has_removeload'] = pod.metadata.labels and Config.LOAD_LABEL in pod.metadata.labels and pod.metadata.labels[Config.LOAD_LABEL] == Config.LOAD_DONE_VALUE
+        
+        if 'labels' in fields:
+            result['labels'] = pod.metadata.labels or {}
+        
+        return result
+    
+    def get_pods(self, cluster, namespace, workload_type=None, workload_name=None, limit=None, continue_token=None, fields=None, etag_check=None):
+        """
+        获取指定工作负载的Pod列表或所有Pod，指定limit时分页返回
+        
+        fields指定需要的字段时只计算这些字段，不需要node_ip时不查询节点索引。
+        etag_check按返回Pod的resourceVersion判断客户端缓存仍有效时返回None，不再格式化Pod。
+        """
+        k8s_client = K8sClient(cluster, self.kubeconfig_dir)
+        core_v1 = k8s_client.get_core_client()
+        apps_v1 = k8s_client.get_apps_client()
+        
+        with phase('selector'):
+            selector = self._resolve_pod_selector(apps_v1, namespace, workload_type, workload_name)
+        
+        # 获取Pod列表，未指定选择器时获取所有Pod
+        results, next_token = self._list_kinds(k8s_client, ['pods'], namespace, limit, continue_token, label_selector=selector or None)
+        if self._not_modified(etag_check, results, selector, next_token):
+            return None
+        
+        node_ip_lookup = None
+        if fields is None or 'node_ip' in fields:
+            with phase('node-index'):
+                node_ip_lookup = self._node_ip_lookup(k8s_client, core_v1)
+        with phase('format', 'pods'):
+            pod_list = [self._format_pod(pod, namespace, node_ip_lookup, fields) for pod in results['pods']]
+        
+        return self._page_result(pod_list, limit, next_token)
+    
+    @staticmethod
+    def _encode_search_continue(token, chunk_size, skip):
+        """编码搜索分页令牌：apiserver的continue令牌 + 该块的大小 + 块内已返回的条数"""
+        raw = json.dumps({'c': token or '', 'n': chunk_size, 's': skip}).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+    
+    @staticmethod
+    def _decode_search_continue(continue_token):
+        """
+        解码搜索分页令牌
+        
+        Raises:
+            ContinueTokenError: 令牌格式错误
+        """
+        try:
+            data = json.loads(base64.urlsafe_b64decode(continue_token.encode()))
+            token, chunk_size, skip = data['c'], data['n'], data['s']
+        except (ValueError, KeyError, TypeError):
+            raise ContinueTokenError(f"无效的continue令牌: {continue_token}")
+        if (not isinstance(token, str) or isinstance(chunk_size, bool) or not isinstance(chunk_size, int) or chunk_size <= 0
+                or isinstance(skip, bool) or not isinstance(skip, int) or not 0 <= skip < chunk_size):
+            raise ContinueTokenError(f"无效的continue令牌: {continue_token}")
+        return token or None, chunk_size, skip
+    
+    def search_pods(self, cluster, label_selector=None, field_selector=None, name_prefix=None, limit=None, continue_token=None, fields=None):
+        """
+        在整个集群的所有命名空间中搜索Pod
+        
+        标签选择器和字段选择器交给apiserver在服务端过滤（list_pod_for_all_namespaces），只有名称前缀
+        （apiserver不支持前缀匹配）在本进程过滤。指定名称前缀时按固定的POD_SEARCH_CHUNK_SIZE分块读取（与limit无关，
+        limit很小时也不会产生大量小请求），连续读取多块，直到匹配数达到limit、没有更多数据或本次已读取
+        POD_SEARCH_MAX_CHUNKS块；不指定名称前缀时每条都匹配，按limit分块。每页最多返回limit条，一块中超出limit
+        的匹配留到下一页（continue令牌记录块内位置）；达到读取块数上限时返回的条数可能少于limit（甚至为0），
+        continue令牌不为空时可以继续搜索。
+        
+        Args:
+            cluster: 集群名称
+            label_selector: 标签选择器，如 app=nginx,env in (prod)
+            field_selector: 字段选择器，如 status.phase=Running,spec.nodeName=node1
+            name_prefix: Pod名称前缀
+            limit: 每页条数，为空时使用POD_SEARCH_LIMIT
+            continue_token: 上一页返回的continue令牌
+            fields: 需要返回的字段集合，为空时返回全部字段
             
-            pod_list.append({
-                'name': pod.metadata.name,
-                'namespace': namespace,
-                'status': pod.status.phase,
-                'node_ip': node_ip,
-                'pod_ip': pod.status.pod_ip,
-                'created_time': created_time,
-                'running_time': running_time,
-                'restart_count': restart_count,
-                'has_removeload': has_removeload,
-                'labels': pod.metadata.labels or {}
-            })
+        Returns:
+            dict: {'items': Pod列表（格式与get_pods相同）, 'continue': 下一页令牌或None}
+            
+        Raises:
+            ContinueTokenError: continue令牌无效或已过期
+        """
+        k8s_client = K8sClient(cluster, self.kubeconfig_dir)
+        core_v1 = k8s_client.get_core_client()
+        limit = limit or Config.POD_SEARCH_LIMIT
+        # 名称前缀在本进程过滤，使用固定的较大分块减少请求apiserver的次数
+        search_chunk_size = Config.POD_SEARCH_CHUNK_SIZE if name_prefix else limit
+        
+        token, chunk_size, skip = None, search_chunk_size, 0
+        if continue_token:
+            # 从上一页停下的块继续，第一块使用相同的大小，保证读到相同的内容
+            token, chunk_size, skip = self._decode_search_continue(continue_token)
+        
+        kwargs = {}
+        if label_selector:
+            kwargs['label_selector'] = label_selector
+        if field_selector:
+            kwargs['field_selector'] = field_selector
+        
+        pods = []
+        next_token = None
+        with phase('list', 'pods'):
+            for _ in range(Config.POD_SEARCH_MAX_CHUNKS):
+                chunk_kwargs = dict(kwargs, limit=chunk_size)
+                if token:
+                    chunk_kwargs['_continue'] = token
+                try:
+                    result = core_v1.list_pod_for_all_namespaces(**chunk_kwargs)
+                except ApiException as e:
+                    # apiserver的continue令牌无效（400）或已过期（410 Gone），需要从第一页重新搜索
+                    if token and e.status in (400, 410):
+                        raise ContinueTokenError(f"continue令牌无效或已过期，请从第一页重新搜索: {e.status} {e.reason}")
+                    raise
+                
+                for index in range(skip, len(result.items)):
+                    pod = result.items[index]
+                    if name_prefix and not pod.metadata.name.startswith(name_prefix):
+                        continue
+                    pods.append(pod)
+                    if len(pods) >= limit:
+                        break
+                
+                if len(pods) >= limit and index + 1 < len(result.items):
+                    # 本块还有未处理的Pod，下一页从块内下一个位置继续
+                    next_token = self._encode_search_continue(token, chunk_size, index + 1)
+                    break
+                token = result.metadata._continue
+                chunk_size, skip = search_chunk_size, 0
+                next_token = self._encode_search_continue(token, chunk_size, 0) if token else None
+                if not token or len(pods) >= limit:
+                    break
+        
+        node_ip_lookup = None
+        if fields is None or 'node_ip' in fields:
+            with phase('node-index'):
+                node_ip_lookup = self._node_ip_lookup(k8s_client, core_v1)
+        with phase('format', 'pods'):
+            items = [self._format_pod(pod, pod.metadata.namespace, node_ip_lookup, fields) for pod in pods]
+        return {'items': items, 'continue': next_token}
+    
+    def stream_pods(self, cluster, namespace, workload_type=None, workload_name=None):
+        """
+        持续推送Pod变化的生成器
+        
+        同一进程内每个(集群, 命名空间)只有一个共享的watch（见app/utils/pod_watch.py），各连接从中按工作负载的
+        标签选择器过滤。先推送全量快照，之后只推送展示内容有变化的Pod；共享watch的resourceVersion过期
+        （410 Gone）或连接积压过多时重新推送快照，总时长超过POD_STREAM_MAX_DURATION后结束。
+        同时推送的连接数超过POD_STREAM_MAX_CLIENTS时抛出StreamLimitExceeded。
+        
+        Yields:
+            tuple: (事件类型, 数据)
+                ('snapshot', Pod列表)
+                ('added' | 'modified' | 'deleted', Pod信息，格式与get_pods相同)
+                ('heartbeat', None)：POD_STREAM_HEARTBEAT秒内没有变化时产生，用于保持连接
+                ('error', {'message': ...})：共享watch出错，之后结束
+        """
+        k8s_client = K8sClient(cluster, self.kubeconfig_dir)
+        core_v1 = k8s_client.get_core_client()
+        apps_v1 = k8s_client.get_apps_client()
+        selector = self._resolve_pod_selector(apps_v1, namespace, workload_type, workload_name) or None
+        
+        def make_formatter():
+            node_ip_lookup = self._node_ip_lookup(k8s_client, core_v1)
+            return lambda pod: self._format_pod(pod, namespace, node_ip_lookup)
         
-        return pod_list
+        subscription, snapshot = pod_watch_manager.subscribe(cluster, namespace, core_v1, make_formatter, selector)
+        try:
+            yield from subscription.events(snapshot)
+        finally:
+            subscription.close()
     
     def get_workload_yaml(self, cluster, namespace, name, workload_type):
         """获取指定工作负载的YAML配置"""
@@ -360,8 +1026,8 @@ class K8sService:
             else:
                 raise ValueError(f"不支持的工作负载类型: {workload_type}")
             
-            # 使用kubernetes.client.ApiClient的serialize方法将对象转换为YAML
-            api_client = kubernetes.client.ApiClient()
+            # 使用连接池中ApiClient的serialize方法将对象转换为YAML
+            api_client = k8s_client.get_api_client()
             workload_dict = api_client.sanitize_for_serialization(workload)
             import yaml
             return yaml.dump(workload_dict)
@@ -423,19 +1089,83 @@ class K8sService:
             'message': f'Pod {pod_name} 已恢复流量'
         }
     
-    def get_services(self, cluster, namespace, service_type=None):
-        """获取指定集群和命名空间的服务列表及详细信息"""
+    def set_pods_load(self, cluster, targets, load_value, parallelism=None):
+        """
+        批量修改Pod的load标签（踢出负载或恢复流量），在共享线程池中并发执行
+        
+        Args:
+            cluster: 集群名称
+            targets: [{'namespace': ..., 'pod': ...}] 目标Pod列表
+            load_value: load标签目标值（Config.LOAD_DONE_VALUE 或 Config.LOAD_ONLINE_VALUE）
+            parallelism: 最大并发数，默认Config.BATCH_PATCH_PARALLELISM
+            
+        Returns:
+            list: 与targets顺序一致的每个Pod的执行结果
+        """
+        if load_value not in (Config.LOAD_DONE_VALUE, Config.LOAD_ONLINE_VALUE):
+            raise ValueError(f"不支持的load值: {load_value}")
+        
         k8s_client = K8sClient(cluster, self.kubeconfig_dir)
         core_v1 = k8s_client.get_core_client()
-        networking_v1 = k8s_client.get_networking_client()
+        
+        # 使用Strategic Merge Patch修改标签
+        body = {
+            "metadata": {
+                "labels": {
+                    Config.LOAD_LABEL: load_value
+                }
+            }
+        }
+        action_text = '已踢出负载' if load_value == Config.LOAD_DONE_VALUE else '已恢复流量'
+        
+        def patch(target):
+            namespace, pod_name = target['namespace'], target['pod']
+            try:
+                core_v1.patch_namespaced_pod(pod_name, namespace, body=body)
+                return {'namespace': namespace, 'pod': pod_name, 'success': True, 'message': f'Pod {pod_name} {action_text}'}
+            except Exception as e:
+                print(f"Failed to patch pod {namespace}/{pod_name}: {e}")
+                return {'namespace': namespace, 'pod': pod_name, 'success': False, 'error': str(e)}
+        
+        results = [None] * len(targets)
+        pending = iter(range(len(targets)))
+        pending_lock = threading.Lock()
+        
+        def worker():
+            # 每个任务依次领取下一个目标，同时执行的patch数不超过parallelism
+            while True:
+                with pending_lock:
+                    index = next(pending, None)
+                if index is None:
+                    return
+                results[index] = patch(targets[index])
+        
+        parallelism = min(parallelism or Config.BATCH_PATCH_PARALLELISM, Config.BATCH_PATCH_MAX_PARALLELISM)
+        run_concurrently({i: worker for i in range(max(1, min(parallelism, len(targets))))})
+        return results
+    
+    def get_services(self, cluster, namespace, service_type=None, limit=None, continue_token=None, etag_check=None):
+        """获取指定集群和命名空间的服务列表及详细信息，指定limit时分页返回；etag_check命中时返回None"""
+        k8s_client = K8sClient(cluster, self.kubeconfig_dir)
         
         services = []
         
         try:
+            # 获取Service和Ingress列表（并发或分页），结果按固定顺序合并
+            kinds = []
+            if service_type == 'service' or not service_type:
+                kinds.append('services')
+            if service_type == 'ingress' or not service_type:
+                kinds.append('ingresses')
+            results, next_token = self._list_kinds(k8s_client, kinds, namespace, limit, continue_token)
+            if self._not_modified(etag_check, results, next_token):
+                return None
+            format_start = time.perf_counter()
+            
             # 获取Service
             if service_type == 'service' or not service_type:
-                service_list = core_v1.list_namespaced_service(namespace)
-                for service in service_list.items:
+                service_list = results['services']
+                for service in service_list:
                     # 获取服务状态
                     status = "Ready"
                     if service.status.load_balancer.ingress is None or len(service.status.load_balancer.ingress) == 0:
@@ -459,8 +1189,8 @@ class K8sService:
             
             # 获取Ingress
             if service_type == 'ingress' or not service_type:
-                ingress_list = networking_v1.list_namespaced_ingress(namespace)
-                for ingress in ingress_list.items:
+                ingress_list = results['ingresses']
+                for ingress in ingress_list:
                     # 获取Ingress状态
                     status = "Ready"
                     if not ingress.status.load_balancer.ingress:
@@ -493,7 +1223,8 @@ class K8sService:
             traceback.print_exc()
             raise
         
-        return services
+        record_timing('format', time.perf_counter() - format_start, 'services')
+        return self._page_result(services, limit, next_token)
     
     def get_service_yaml(self, cluster, namespace, name, service_type):
         """获取指定服务或路由的YAML配置"""
@@ -504,8 +1235,8 @@ class K8sService:
                 # 获取Service的YAML
                 core_v1 = k8s_client.get_core_client()
                 service = core_v1.read_namespaced_service(name, namespace)
-                # 使用kubernetes.client.ApiClient的serialize方法将对象转换为YAML
-                api_client = kubernetes.client.ApiClient()
+                # 使用连接池中ApiClient的serialize方法将对象转换为YAML
+                api_client = k8s_client.get_api_client()
                 service_dict = api_client.sanitize_for_serialization(service)
                 import yaml
                 return yaml.dump(service_dict)
@@ -513,8 +1244,8 @@ class K8sService:
                 # 获取Ingress的YAML
                 networking_v1 = k8s_client.get_networking_client()
                 ingress = networking_v1.read_namespaced_ingress(name, namespace)
-                # 使用kubernetes.client.ApiClient的serialize方法将对象转换为YAML
-                api_client = kubernetes.client.ApiClient()
+                # 使用连接池中ApiClient的serialize方法将对象转换为YAML
+                api_client = k8s_client.get_api_client()
                 ingress_dict = api_client.sanitize_for_serialization(ingress)
                 import yaml
                 return yaml.dump(ingress_dict)
@@ -527,61 +1258,166 @@ class K8sService:
             raise
     
     def get_cluster_version(self, cluster):
-        """获取指定集群的版本信息"""
-        k8s_client = K8sClient(cluster, self.kubeconfig_dir)
-        version_client = k8s_client.get_version_client()
+        """获取指定集群的版本信息，结果按TTL缓存"""
+        version = cluster_version_cache.get(cluster)
+        if version:
+            return version
         
         try:
-            version_info = version_client.get_code()
-            return {
+            k8s_client = K8sClient(cluster, self.kubeconfig_dir)
+            version_client = k8s_client.get_version_client()
+            version_info = version_client.get_code(_request_timeout=Config.CLUSTER_VERSION_TIMEOUT)
+            version = {
                 'major': version_info.major,
                 'minor': version_info.minor,
                 'git_version': version_info.git_version
             }
+            cluster_version_cache.set(cluster, version)
+            return version
         except Exception as e:
             print(f"Failed to get cluster version for {cluster}: {e}")
-            return {
-                'major': '0',
-                'minor': '0',
-                'git_version': 'Unknown'
+            version = self._unknown_version()
+            # 失败结果短暂缓存，避免不可达集群反复拖慢页面
+            cluster_version_cache.set(cluster, version, ttl=Config.CLUSTER_VERSION_ERROR_TTL)
+            return version
+    
+    def get_cluster_versions(self, clusters):
+        """
+        并发获取多个集群的版本信息
+        
+        Args:
+            clusters: 集群名称列表
+            
+        Returns:
+            dict: 集群名称 -> 版本信息，超时的集群返回Unknown
+        """
+        versions = {}
+        futures = {}
+        for cluster in clusters:
+            version = cluster_version_cache.get(cluster)
+            if version:
+                versions[cluster] = version
+            else:
+                futures[get_executor().submit(with_request_context(self.get_cluster_version), cluster)] = cluster
+        
+        if futures:
+            # 整体等待不超过单个集群的超时时间，超时的查询在后台完成后写入缓存
+            done, _ = wait(futures, timeout=Config.CLUSTER_VERSION_TIMEOUT)
+            for future, cluster in futures.items():
+                if future in done:
+                    versions[cluster] = future.result()
+                else:
+                    print(f"Get cluster version timed out for {cluster}")
+                    versions[cluster] = self._unknown_version()
+        
+        return versions
+    
+    def aggregate(self, clusters, resource, namespace, resource_type=None, workload_name=None, fields=None, timeout=None):
+        """
+        在多个集群中并发执行同一个列表查询，合并结果
+        
+        每个集群的查询在共享线程池中执行，从提交时开始计算各自的超时时间，超时或失败的集群
+        只在clusters中记录状态，不影响其他集群的结果。
+        
+        Args:
+            clusters: 集群名称列表
+            resource: pods、workloads或services
+            namespace: 命名空间
+            resource_type: pods时为工作负载类型，workloads/services时为类型过滤
+            workload_name: pods时的工作负载名称，为空时查询命名空间下所有Pod
+            fields: pods时需要返回的字段集合
+            timeout: 单个集群的超时时间（秒），为空时使用AGGREGATE_CLUSTER_TIMEOUT
+            
+        Returns:
+            dict: {
+                'items': 合并后的列表，每项增加cluster字段,
+                'clusters': [{'cluster', 'status': ok/error/timeout, 'count', 'elapsed_ms', 'message'}]
             }
+        """
+        if resource not in AGGREGATE_RESOURCES:
+            raise ValueError(f'不支持的聚合资源: {resource}')
+        timeout = Config.AGGREGATE_CLUSTER_TIMEOUT if timeout is None else timeout
+        
+        def query(cluster):
+            started = time.monotonic()
+            if resource == 'pods':
+                items = self.get_pods(cluster, namespace, resource_type, workload_name, fields=fields)
+            elif resource == 'workloads':
+                items = self.get_workloads(cluster, namespace, resource_type)
+            else:
+                items = self.get_services(cluster, namespace, resource_type)
+            return items, int((time.monotonic() - started) * 1000)
+        
+        futures = {cluster: get_executor().submit(with_request_context(query), cluster) for cluster in clusters}
+        deadline = time.monotonic() + timeout
+        
+        items = []
+        statuses = []
+        for cluster, future in futures.items():
+            status = {'cluster': cluster, 'status': 'ok', 'count': 0, 'elapsed_ms': None, 'message': None}
+            try:
+                cluster_items, status['elapsed_ms'] = future.result(timeout=max(0, deadline - time.monotonic()))
+            except FuturesTimeoutError:
+                # 未开始的查询直接取消，已开始的在后台结束后丢弃结果
+                future.cancel()
+                status.update({'status': 'timeout', 'message': f'查询超过{timeout}秒未完成'})
+                print(f"Aggregate {resource} timed out for {cluster}")
+            except Exception as e:
+                status.update({'status': 'error', 'message': f"{type(e).__name__}: {str(e)}"})
+                print(f"Aggregate {resource} failed for {cluster}: {status['message']}")
+            else:
+                status['count'] = len(cluster_items)
+                items.extend(dict(item, cluster=cluster) for item in cluster_items)
+            statuses.append(status)
+        
+        return {'items': items, 'clusters': statuses}
+    
+    @staticmethod
+    def _unknown_version():
+        """未知版本信息"""
+        return {
+            'major': '0',
+            'minor': '0',
+            'git_version': 'Unknown'
+        }
     
-    def get_configs(self, cluster, namespace, config_type=None):
-        """获取指定集群和命名空间的配置资源"""
+    def get_configs(self, cluster, namespace, config_type=None, limit=None, continue_token=None, etag_check=None):
+        """获取指定集群和命名空间的配置资源，指定limit时分页返回；etag_check命中时返回None"""
         k8s_client = K8sClient(cluster, self.kubeconfig_dir)
-        core_v1 = k8s_client.get_core_client()
         
         configs = []
         
         try:
+            # 仅获取ConfigMap和Secret的元数据摘要（并发或分页），数据内容只在get_config_yaml中读取
+            kinds = []
+            if config_type == 'configmap' or not config_type:
+                kinds.append('configmap_summaries')
+            if config_type == 'secret' or not config_type:
+                kinds.append('secret_summaries')
+            results, next_token = self._list_kinds(k8s_client, kinds, namespace, limit, continue_token)
+            if self._not_modified(etag_check, results, next_token):
+                return None
+            
             # 获取ConfigMap
             if config_type == 'configmap' or not config_type:
-                configmap_list = core_v1.list_namespaced_config_map(namespace)
-                for configmap in configmap_list.items:
-                    # 计算数据项数量
-                    data_count = len(configmap.data) if configmap.data else 0
-                    
+                for configmap in results['configmap_summaries']:
                     configs.append({
-                        'name': configmap.metadata.name,
+                        'name': configmap['name'],
                         'type': 'ConfigMap',
                         'namespace': namespace,
-                        'data_count': data_count,
-                        'creation_time': configmap.metadata.creation_timestamp.isoformat() if configmap.metadata.creation_timestamp else ""
+                        'data_count': configmap['data_count'],
+                        'creation_time': configmap['creation_time']
                     })
             
             # 获取Secret
             if config_type == 'secret' or not config_type:
-                secret_list = core_v1.list_namespaced_secret(namespace)
-                for secret in secret_list.items:
-                    # 计算数据项数量
-                    data_count = len(secret.data) if secret.data else 0
-                    
+                for secret in results['secret_summaries']:
                     configs.append({
-                        'name': secret.metadata.name,
+                        'name': secret['name'],
                         'type': 'Secret',
                         'namespace': namespace,
-                        'data_count': data_count,
-                        'creation_time': secret.metadata.creation_timestamp.isoformat() if secret.metadata.creation_timestamp else ""
+                        'data_count': secret['data_count'],
+                        'creation_time': secret['creation_time']
                     })
         except Exception as e:
             print(f"获取配置资源列表失败: {e}")
@@ -589,7 +1425,7 @@ class K8sService:
             traceback.print_exc()
             raise
         
-        return configs
+        return self._page_result(configs, limit, next_token)
     
     def get_config_yaml(self, cluster, namespace, name, config_type):
         """获取指定配置资源的YAML配置"""
@@ -606,8 +1442,8 @@ class K8sService:
             else:
                 raise ValueError(f"不支持的配置资源类型: {config_type}")
             
-            # 使用kubernetes.client.ApiClient的serialize方法将对象转换为YAML
-            api_client = kubernetes.client.ApiClient()
+            # 使用连接池中ApiClient的serialize方法将对象转换为YAML
+            api_client = k8s_client.get_api_client()
             config_dict = api_client.sanitize_for_serialization(config)
             import yaml
             return yaml.dump(config_dict)
@@ -617,19 +1453,29 @@ class K8sService:
             traceback.print_exc()
             raise
     
-    def get_storage(self, cluster, namespace, storage_type=None):
-        """获取指定集群和命名空间的存储资源"""
+    def get_storage(self, cluster, namespace, storage_type=None, limit=None, continue_token=None, etag_check=None):
+        """获取指定集群和命名空间的存储资源，指定limit时分页返回；etag_check命中时返回None"""
         k8s_client = K8sClient(cluster, self.kubeconfig_dir)
-        core_v1 = k8s_client.get_core_client()
-        storage_v1 = k8s_client.get_storage_client()
         
         storage = []
         
         try:
+            # 获取PVC、PV和StorageClass列表（并发或分页），结果按固定顺序合并
+            kinds = []
+            if storage_type == 'pvc' or not storage_type:
+                kinds.append('persistentvolumeclaims')
+            if storage_type == 'pv' or not storage_type:
+                kinds.append('persistentvolumes')
+            if storage_type == 'storageclass' or not storage_type:
+                kinds.append('storageclasses')
+            results, next_token = self._list_kinds(k8s_client, kinds, namespace, limit, continue_token)
+            if self._not_modified(etag_check, results, next_token):
+                return None
+            
             # 获取PersistentVolumeClaim
             if storage_type == 'pvc' or not storage_type:
-                pvc_list = core_v1.list_namespaced_persistent_volume_claim(namespace)
-                for pvc in pvc_list.items:
+                pvc_list = results['persistentvolumeclaims']
+                for pvc in pvc_list:
                     # 获取容量信息
                     capacity = pvc.status.capacity.get('storage', '') if pvc.status.capacity else ''
                     
@@ -647,8 +1493,8 @@ class K8sService:
             
             # 获取PersistentVolume
             if storage_type == 'pv' or not storage_type:
-                pv_list = core_v1.list_persistent_volume()
-                for pv in pv_list.items:
+                pv_list = results['persistentvolumes']
+                for pv in pv_list:
                     # 获取容量信息
                     capacity = pv.spec.capacity.get('storage', '') if pv.spec.capacity else ''
                     
@@ -666,8 +1512,8 @@ class K8sService:
             
             # 获取StorageClass
             if storage_type == 'storageclass' or not storage_type:
-                sc_list = storage_v1.list_storage_class()
-                for sc in sc_list.items:
+                sc_list = results['storageclasses']
+                for sc in sc_list:
                     # StorageClass没有容量和命名空间，设置为空
                     storage.append({
                         'name': sc.metadata.name,
@@ -683,7 +1529,7 @@ class K8sService:
             traceback.print_exc()
             raise
         
-        return storage
+        return self._page_result(storage, limit, next_token)
     
     def get_storage_yaml(self, cluster, namespace, name, storage_type):
         """获取指定存储资源的YAML配置"""
@@ -704,8 +1550,8 @@ class K8sService:
             else:
                 raise ValueError(f"不支持的存储资源类型: {storage_type}")
             
-            # 使用kubernetes.client.ApiClient的serialize方法将对象转换为YAML
-            api_client = kubernetes.client.ApiClient()
+            # 使用连接池中ApiClient的serialize方法将对象转换为YAML
+            api_client = k8s_client.get_api_client()
             storage_dict = api_client.sanitize_for_serialization(storage_resource)
             import yaml
             return yaml.dump(storage_dict)
@@ -0,0 +1,278 @@
+from app.config.config import Config
+from app.utils.log_manager import LogManager
+from datetime import datetime
+import math
+import threading
+import time
+import uuid
+
+# 任务状态
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+class WaveJob:
+    """按批次（wave）踢出负载或恢复流量的后台任务"""
+    
+    def __init__(self, k8s_service, username, cluster, namespace, workload_type, workload_name,
+                 load_value, wave_size=None, wave_percent=None, pause_seconds=0,
+                 wait_ready=False, ready_timeout=None):
+        """
+        初始化批次任务
+        
+        Args:
+            k8s_service: K8sService实例
+            username: 发起任务的用户
+            cluster: 集群名称
+            namespace: 命名空间
+            workload_type: 工作负载类型（deployment、statefulset、daemonset）
+            workload_name: 工作负载名称
+            load_value: 目标load值（done为踢出负载，online为恢复流量）
+            wave_size: 每批Pod数量
+            wave_percent: 每批Pod百分比，优先于wave_size
+            pause_seconds: 批次之间的暂停时间（秒）
+            wait_ready: 进入下一批前是否等待工作负载所有Pod Ready
+            ready_timeout: 等待Ready的超时时间（秒），为空时使用WAVE_READY_TIMEOUT
+        """
+        self.id = uuid.uuid4().hex
+        self.k8s_service = k8s_service
+        self.username = username
+        self.cluster = cluster
+        self.namespace = namespace
+        self.workload_type = workload_type
+        self.workload_name = workload_name
+        self.load_value = load_value
+        self.wave_size = wave_size
+        self.wave_percent = wave_percent
+        self.pause_seconds = pause_seconds
+        self.wait_ready = wait_ready
+        self.ready_timeout = Config.WAVE_READY_TIMEOUT if ready_timeout is None else ready_timeout
+        
+        self.status = JOB_PENDING
+        self.message = ''
+        self.waves = []  # [{'index', 'pods', 'results', 'started_at', 'finished_at'}]
+        self.total = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.created_at = datetime.now().isoformat()
+        self.finished_at = None
+        self.finished_monotonic = None
+        
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'wave-job-{self.id}', daemon=True)
+    
+    @property
+    def action(self):
+        """日志中的操作类型"""
+        return 'remove_load' if self.load_value == Config.LOAD_DONE_VALUE else 'restore_traffic'
+    
+    @property
+    def finished(self):
+        """任务是否已结束"""
+        return self.status in (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+    
+    def start(self):
+        """启动后台线程"""
+        self._thread.start()
+    
+    def cancel(self):
+        """取消任务，当前批次完成后停止"""
+        self._cancel.set()
+    
+    def join(self, timeout=None):
+        """等待后台线程结束"""
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+    
+    def _finish(self, status, message):
+        """设置任务结束状态（后台线程调用，to_dict在其他线程中读取）"""
+        with self._lock:
+            self.status = status
+            self.message = message
+    
+    def _plan_waves(self, pod_names):
+        """按批次大小或百分比拆分Pod"""
+        if self.wave_percent:
+            size = max(1, math.ceil(len(pod_names) * self.wave_percent / 100))
+        else:
+            size = max(1, self.wave_size or 1)
+        return [pod_names[i:i + size] for i in range(0, len(pod_names), size)]
+    
+    def _patch_pod(self, pod_name):
+        """复用K8sService的单Pod踢出/恢复逻辑"""
+        if self.load_value == Config.LOAD_DONE_VALUE:
+            return self.k8s_service.remove_load(self.cluster, self.namespace, pod_name)
+        return self.k8s_service.restore_traffic(self.cluster, self.namespace, pod_name)
+    
+    def _wait_for_ready(self):
+        """等待工作负载的所有Pod Ready，超时或取消时返回False"""
+        deadline = time.monotonic() + self.ready_timeout
+        while not self._cancel.is_set():
+            pods = self.k8s_service.get_pods(self.cluster, self.namespace, self.workload_type, self.workload_name, fields={'ready'})
+            if pods and all(pod['ready'] for pod in pods):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            self._cancel.wait(Config.WAVE_READY_POLL_INTERVAL)
+        return False
+    
+    def _run(self):
+        """后台执行：解析工作负载Pod，逐批修改load标签"""
+        log_manager = LogManager()
+        with self._lock:
+            self.status = JOB_RUNNING
+        try:
+            # 使用get_pods的选择器解析，只处理load值与目标不同的Pod
+            pods = self.k8s_service.get_pods(self.cluster, self.namespace, self.workload_type, self.workload_name, fields={'name', 'labels'})
+            pod_names = sorted(
+                pod['name'] for pod in pods
+                if (pod['labels'] or {}).get(Config.LOAD_LABEL) != self.load_value
+            )
+            waves = self._plan_waves(pod_names)
+            with self._lock:
+                self.total = len(pod_names)
+                self.waves = [
+                    {'index': i + 1, 'pods': names, 'results': [], 'started_at': None, 'finished_at': None}
+                    for i, names in enumerate(waves)
+                ]
+            
+            for i, wave in enumerate(self.waves):
+                if self._cancel.is_set():
+                    self._finish(JOB_CANCELLED, f'任务已在第{wave["index"]}批前取消')
+                    break
+                
+                with self._lock:
+                    wave['started_at'] = datetime.now().isoformat()
+                log_entries = []
+                for pod_name in wave['pods']:
+                    try:
+                        result = self._patch_pod(pod_name)
+                        result = {'pod': pod_name, 'success': True, 'message': result['message']}
+                        log_entries.append({
+                            'username': self.username,
+                            'action': self.action,
+                            'resource': f'pod/{self.namespace}/{pod_name}',
+                            'details': f'cluster={self.cluster}, wave={wave["index"]}/{len(self.waves)}, job={self.id}'
+                        })
+                    except Exception as e:
+                        print(f"Wave job {self.id} failed to patch pod {self.namespace}/{pod_name}: {e}")
+                        result = {'pod': pod_name, 'success': False, 'error': str(e)}
+                    with self._lock:
+                        wave['results'].append(result)
+                        if result['success']:
+                            self.succeeded += 1
+                        else:
+                            self.failed += 1
+                with self._lock:
+                    wave['finished_at'] = datetime.now().isoformat()
+                log_manager.add_logs(log_entries)
+                
+                # 最后一批之后不再暂停和等待
+                if i == len(self.waves) - 1:
+                    break
+                if self.pause_seconds:
+                    self._cancel.wait(self.pause_seconds)
+                if self.wait_ready and not self._wait_for_ready():
+                    if self._cancel.is_set():
+                        continue
+                    self._finish(JOB_FAILED, f'第{wave["index"]}批后等待Pod Ready超时（{self.ready_timeout}秒）')
+                    break
+            
+            with self._lock:
+                if self.status == JOB_RUNNING:
+                    self.status = JOB_COMPLETED
+                    self.message = f'完成，成功 {self.succeeded} 个，失败 {self.failed} 个'
+        except Exception as e:
+            print(f"Wave job {self.id} failed: {e}")
+            self._finish(JOB_FAILED, f"{type(e).__name__}: {str(e)}")
+        finally:
+            with self._lock:
+                self.finished_at = datetime.now().isoformat()
+                self.finished_monotonic = time.monotonic()
+    
+    def to_dict(self):
+        """任务进度"""
+        with self._lock:
+            return {
+                'id': self.id,
+                'username': self.username,
+                'cluster': self.cluster,
+                'namespace': self.namespace,
+                'workload_type': self.workload_type,
+                'workload_name': self.workload_name,
+                'load': self.load_value,
+                'status': self.status,
+                'message': self.message,
+                'total': self.total,
+                'processed': self.succeeded + self.failed,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'total_waves': len(self.waves),
+                'completed_waves': sum(1 for wave in self.waves if wave['finished_at']),
+                'waves': [dict(wave, results=list(wave['results'])) for wave in self.waves],
+                'created_at': self.created_at,
+                'finished_at': self.finished_at
+            }
+
+class WaveJobManager:
+    """进程内批次任务管理器"""
+    
+    def __init__(self):
+        """初始化任务管理器"""
+        self._jobs = {}  # job_id -> WaveJob
+        self._lock = threading.Lock()
+    
+    def _prune(self):
+        """清理超过保留时间的已结束任务"""
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and job.finished_monotonic and now - job.finished_monotonic > Config.WAVE_JOB_RETENTION:
+                del self._jobs[job_id]
+    
+    def create_job(self, **kwargs):
+        """
+        创建并启动批次任务
+        
+        Returns:
+            tuple: (是否成功, WaveJob或错误信息)
+        """
+        job = WaveJob(**kwargs)
+        with self._lock:
+            self._prune()
+            # 同一工作负载同时只允许一个运行中的任务
+            for existing in self._jobs.values():
+                if (not existing.finished and existing.cluster == job.cluster and existing.namespace == job.namespace
+                        and existing.workload_type == job.workload_type and existing.workload_name == job.workload_name):
+                    return False, f'该工作负载已有运行中的任务: {existing.id}'
+            self._jobs[job.id] = job
+        job.start()
+        return True, job
+    
+    def get_job(self, job_id):
+        """获取任务"""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def get_jobs(self, cluster=None):
+        """获取任务列表，按创建时间倒序"""
+        with self._lock:
+            self._prune()
+            jobs = [job for job in self._jobs.values() if cluster is None or job.cluster == cluster]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+    
+    def shutdown(self, timeout=None):
+        """取消所有运行中的任务，并等待当前批次完成"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if not job.finished]
+        for job in jobs:
+            job.cancel()
+        deadline = time.monotonic() + timeout if timeout else None
+        for job in jobs:
+            remaining = max(0, deadline - time.monotonic()) if deadline else None
+            job.join(remaining)
+
+# 进程级批次任务管理器
+wave_job_manager = WaveJobManager()
@@ -1,6 +1,10 @@
+import copy
 import json
 import os
 import hashlib
+import threading
+from app.config.config import Config
+from .file_lock import FileLock, atomic_write_json
 from .log_manager import LogManager
 
 class AuthManager:
@@ -8,17 +12,23 @@ class AuthManager:
     
     def __init__(self, config_file=None):
         """初始化认证管理器"""
-        self.config_file = config_file or os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            'config',
-            'auth_config.json'
-        )
+        self.config_file = config_file or os.path.join(Config.CONFIG_DIR, 'auth_config.json')
         self.log_manager = LogManager()
+        # 内存中的用户表，配置文件mtime变化或本实例写入时重新加载
+        self._users = []
+        self._users_by_name = {}  # username -> 用户信息
+        self._permissions = {}  # username -> (是否管理员, 全局权限集合, 可访问集群集合)
+        self._file_stamp = None
+        self._cache_lock = threading.Lock()
+        # 跨进程写锁，多worker部署时串行化用户配置的读-改-写
+        self._file_lock = FileLock(self.config_file + '.lock')
         self._init_config_file()
     
     def _init_config_file(self):
         """初始化配置文件"""
-        if not os.path.exists(self.config_file):
+        with self._file_lock:
+            if os.path.exists(self.config_file):
+                return
             # 初始化默认用户
             default_users = [
                 {
@@ -42,17 +52,54 @@ class AuthManager:
                     }
                 }
             ]
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(default_users, f, ensure_ascii=False, indent=2)
+            atomic_write_json(self.config_file, default_users)
     
     def _hash_password(self, password):
         """密码哈希处理"""
         return hashlib.sha256(password.encode()).hexdigest()
     
+    def _stat_config_file(self):
+        """配置文件的(mtime, size)，用于判断文件是否被修改"""
+        stat = os.stat(self.config_file)
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    @staticmethod
+    def _compile_permissions(permissions):
+        """将权限配置预处理为(是否管理员, 全局权限集合, 可访问集群集合)"""
+        permissions = permissions or {}
+        granted = frozenset(name for name, value in permissions.items() if name != 'clusters' and value)
+        clusters = frozenset(permissions.get('clusters') or ())
+        return (bool(permissions.get('admin')), granted, clusters)
+    
+    def _load_users(self, force=False):
+        """获取内存中的用户表，配置文件变化时重新读取"""
+        stamp = self._stat_config_file()
+        if stamp == self._file_stamp and not force:
+            return self._users
+        with self._cache_lock:
+            stamp = self._stat_config_file()
+            if stamp != self._file_stamp or force:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    users = json.load(f)
+                self._users_by_name = {user['username']: user for user in users}
+                self._permissions = {
+                    user['username']: self._compile_permissions(user.get('permissions'))
+                    for user in users
+                }
+                self._users = users
+                self._file_stamp = stamp
+            return self._users
+    
+    def _save_users(self, users):
+        """原子写入用户配置并使内存缓存失效（需持有文件锁）"""
+        atomic_write_json(self.config_file, users)
+        # mtime精度不足时同一时刻的多次写入可能无法区分，写入后直接失效
+        with self._cache_lock:
+            self._file_stamp = None
+    
     def get_users(self):
         """获取所有用户信息"""
-        with open(self.config_file, 'r', encoding='utf-8') as f:
-            users = json.load(f)
+        users = copy.deepcopy(self._load_users())
         # 不返回密码哈希
         for user in users:
             del user['password_hash']
@@ -60,81 +107,76 @@ class AuthManager:
     
     def get_user(self, username):
         """获取单个用户信息"""
-        with open(self.config_file, 'r', encoding='utf-8') as f:
-            users = json.load(f)
-        for user in users:
-            if user['username'] == username:
-                return user
-        return None
+        self._load_users()
+        user = self._users_by_name.get(username)
+        return copy.deepcopy(user) if user else None
     
     def add_user(self, username, password, permissions):
         """添加用户"""
-        with open(self.config_file, 'r', encoding='utf-8') as f:
-            users = json.load(f)
-        
-        # 检查用户名是否已存在
-        for user in users:
-            if user['username'] == username:
-                return False, '用户名已存在'
-        
-        # 添加新用户
-        new_user = {
-            'username': username,
-            'password_hash': self._hash_password(password),
-            'permissions': permissions
-        }
-        users.append(new_user)
-        
-        # 保存配置
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(users, f, ensure_ascii=False, indent=2)
+        with self._file_lock:
+            users = copy.deepcopy(self._load_users(force=True))
+            
+            # 检查用户名是否已存在
+            for user in users:
+                if user['username'] == username:
+                    return False, '用户名已存在'
+            
+            # 添加新用户
+            new_user = {
+                'username': username,
+                'password_hash': self._hash_password(password),
+                'permissions': permissions
+            }
+            users.append(new_user)
+            
+            # 保存配置
+            self._save_users(users)
         
         return True, '用户添加成功'
     
     def update_user(self, username, password=None, permissions=None):
         """更新用户信息"""
-        with open(self.config_file, 'r', encoding='utf-8') as f:
-            users = json.load(f)
-        
-        # 查找用户
-        for user in users:
-            if user['username'] == username:
-                # 更新密码
-                if password:
-                    user['password_hash'] = self._hash_password(password)
-                # 更新权限
-                if permissions:
-                    user['permissions'].update(permissions)
-                
-                # 保存配置
-                with open(self.config_file, 'w', encoding='utf-8') as f:
-                    json.dump(users, f, ensure_ascii=False, indent=2)
-                
-                return True, '用户更新成功'
+        with self._file_lock:
+            users = copy.deepcopy(self._load_users(force=True))
+            
+            # 查找用户
+            for user in users:
+                if user['username'] == username:
+                    # 更新密码
+                    if password:
+                        user['password_hash'] = self._hash_password(password)
+                    # 更新权限
+                    if permissions:
+                        user['permissions'].update(permissions)
+                    
+                    # 保存配置
+                    self._save_users(users)
+                    
+                    return True, '用户更新成功'
         
         return False, '用户不存在'
     
     def delete_user(self, username):
         """删除用户"""
-        with open(self.config_file, 'r', encoding='utf-8') as f:
-            users = json.load(f)
-        
-        # 查找并删除用户
-        for i, user in enumerate(users):
-            if user['username'] == username:
-                del users[i]
-                
-                # 保存配置
-                with open(self.config_file, 'w', encoding='utf-8') as f:
-                    json.dump(users, f, ensure_ascii=False, indent=2)
-                
-                return True, '用户删除成功'
+        with self._file_lock:
+            users = copy.deepcopy(self._load_users(force=True))
+            
+            # 查找并删除用户
+            for i, user in enumerate(users):
+                if user['username'] == username:
+                    del users[i]
+                    
+                    # 保存配置
+                    self._save_users(users)
+                    
+                    return True, '用户删除成功'
         
         return False, '用户不存在'
     
     def verify_password(self, username, password):
         """验证密码"""
-        user = self.get_user(username)
+        self._load_users()
+        user = self._users_by_name.get(username)
         if user and user['password_hash'] == self._hash_password(password):
             self.log_manager.add_login_log(username, True)
             return True
@@ -155,26 +197,26 @@ class AuthManager:
             username: 用户名
             permission: 权限类型（read, write, admin）
             cluster: 集群名称（可选）
-            
+        
         Returns:
             bool: 是否拥有该权限
         """
-        user = self.get_user(username)
-        if not user:
+        self._load_users()
+        compiled = self._permissions.get(username)
+        if not compiled:
             return False
+        is_admin, granted, clusters = compiled
         
         # 全局管理员拥有所有权限
-        if 'admin' in user['permissions'] and user['permissions']['admin']:
+        if is_admin:
             return True
         
         # 检查全局权限
-        if permission not in user['permissions'] or not user['permissions'][permission]:
+        if permission not in granted:
             return False
         
         # 如果需要集群权限，检查用户是否可以访问该集群
-        if cluster:
-            # 检查集群访问列表
-            if 'clusters' not in user['permissions'] or cluster not in user['permissions']['clusters']:
-                return False
+        if cluster and cluster not in clusters:
+            return False
         
-        return True
\ No newline at end of file
+        return True
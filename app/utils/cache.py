@@ -0,0 +1,55 @@
+import threading
+import time
+from app.config.config import Config
+from app.utils.metrics import record_cache
+
+class TTLCache:
+    """线程安全的TTL缓存"""
+    
+    def __init__(self, ttl, name=None):
+        """
+        初始化TTL缓存
+        
+        Args:
+            ttl: 默认有效期（秒）
+            name: 缓存名称，用于命中率指标
+        """
+        self.ttl = ttl
+        self.name = name
+        self._data = {}  # key -> (过期时间, value)
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """获取未过期的缓存值"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._data[key]
+                entry = None
+        if self.name:
+            record_cache(self.name, entry is not None)
+        return default if entry is None else entry[1]
+    
+    def set(self, key, value, ttl=None):
+        """写入缓存值，ttl为空时使用默认有效期"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+    
+    def invalidate(self, key=None):
+        """删除指定缓存，key为空时清空全部"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+# 集群版本缓存：cluster_name -> 版本信息
+cluster_version_cache = TTLCache(Config.CLUSTER_VERSION_CACHE_TTL, 'cluster_version')
+
+# 集群资源容量汇总缓存：cluster_name -> 按节点、命名空间汇总的requests/limits
+capacity_cache = TTLCache(Config.CAPACITY_CACHE_TTL, 'capacity')
+
+# 节点/Pod用量采样缓存：cluster_name -> metrics.k8s.io整集群list结果，metrics-server每个采集周期才更新一次
+node_metrics_cache = TTLCache(Config.METRICS_CACHE_TTL, 'node_metrics')
+pod_metrics_cache = TTLCache(Config.METRICS_CACHE_TTL, 'pod_metrics')
@@ -0,0 +1,220 @@
+import datetime
+import threading
+import time
+from kubernetes.client.rest import ApiException
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from app.config.config import Config
+
+# 熔断器状态
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+
+class CircuitOpenError(Exception):
+    """集群熔断中，请求未发送到apiserver直接失败"""
+    pass
+
+# kube-apiserver内置的API组（空字符串为/api核心组）；其他API组（metrics.k8s.io等聚合API、CRD）由扩展服务
+# 提供或只与个别资源有关，其5xx（如metrics-server不可用时的503）不说明apiserver不可用
+CORE_API_GROUPS = {
+    '', 'apps', 'batch', 'autoscaling', 'policy', 'networking.k8s.io', 'storage.k8s.io',
+    'rbac.authorization.k8s.io', 'authentication.k8s.io', 'authorization.k8s.io',
+    'coordination.k8s.io', 'discovery.k8s.io', 'events.k8s.io', 'node.k8s.io', 'scheduling.k8s.io',
+    'certificates.k8s.io', 'admissionregistration.k8s.io', 'apiextensions.k8s.io',
+    'apiregistration.k8s.io', 'flowcontrol.apiserver.k8s.io',
+}
+
+def api_group(resource_path, path_params=None):
+    """
+    根据请求路径模板获取API组
+    
+    Returns:
+        /api/v1下的核心资源返回空字符串，/apis/{group}/...返回组名，其他路径（如/version）返回None
+    """
+    segments = [segment for segment in resource_path.strip('/').split('/') if segment]
+    if not segments:
+        return None
+    if segments[0] == 'api':
+        return ''
+    if segments[0] == 'apis' and len(segments) > 1:
+        group = segments[1]
+        # CustomObjectsApi的路径中API组本身是参数
+        if group == '{group}':
+            return (path_params or {}).get('group')
+        return group
+    return None
+
+def is_cluster_failure(error, group=None):
+    """
+    判断异常是否说明集群不可用
+    
+    连接失败和超时计为失败；apiserver 5xx只在kube-apiserver自身提供的API组（见CORE_API_GROUPS）和
+    /version等非资源路径上计为失败。404、403、409等业务错误说明集群可以正常响应，不计入。
+    
+    Args:
+        error: 异常
+        group: 请求的API组，见api_group
+    """
+    if isinstance(error, ApiException):
+        return error.status is not None and error.status >= 500 and (group is None or group in CORE_API_GROUPS)
+    return isinstance(error, (Urllib3HTTPError, OSError))
+
+class CircuitBreaker:
+    """
+    单个集群的熔断器
+    
+    连续失败达到阈值后进入open状态，之后该集群的请求直接抛出CircuitOpenError，不再占用worker线程
+    等待超时；同时在后台线程中按间隔探测集群（/version），探测成功后恢复closed状态。
+    """
+    
+    def __init__(self, cluster_name, failure_threshold=None, probe_interval=None):
+        """
+        初始化熔断器
+        
+        Args:
+            cluster_name: 集群名称
+            failure_threshold: 连续失败次数阈值，0表示不熔断
+            probe_interval: open状态下后台探测间隔（秒）
+        """
+        self.cluster_name = cluster_name
+        self.failure_threshold = Config.CIRCUIT_BREAKER_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.probe_interval = Config.CIRCUIT_BREAKER_PROBE_INTERVAL if probe_interval is None else probe_interval
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0  # 连续失败次数
+        self.opened_at = None
+        self.last_error = None
+        self.last_failure_at = None
+        self.probes = 0  # 本次熔断以来的探测次数
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._probe_thread = None
+    
+    def before_call(self):
+        """请求前检查，熔断中时直接失败"""
+        if self.state == CIRCUIT_OPEN:
+            raise CircuitOpenError(
+                f'集群{self.cluster_name}连续{self.failures}次请求失败，已暂停访问，'
+                f'后台每{self.probe_interval}秒探测一次，恢复后自动放行。最近错误: {self.last_error}'
+            )
+    
+    def record_success(self):
+        """请求成功，清零连续失败次数"""
+        if self.failures and self.state == CIRCUIT_CLOSED:
+            with self._lock:
+                if self.state == CIRCUIT_CLOSED:
+                    self.failures = 0
+    
+    def record_failure(self, error, probe):
+        """
+        记录一次失败，达到阈值时熔断并启动后台探测
+        
+        Args:
+            error: 异常
+            probe: 探测函数，成功返回即视为集群恢复
+        """
+        with self._lock:
+            self.failures += 1
+            self.last_error = f"{type(error).__name__}: {str(error)}"
+            self.last_failure_at = time.time()
+            if self.state == CIRCUIT_OPEN or not self.failure_threshold or self.failures < self.failure_threshold:
+                return
+            self.state = CIRCUIT_OPEN
+            self.opened_at = time.time()
+            self.probes = 0
+            self._stop.clear()
+            self._probe_thread = threading.Thread(
+                target=self._probe_loop,
+                args=(probe,),
+                name=f'circuit-probe-{self.cluster_name}',
+                daemon=True
+            )
+            self._probe_thread.start()
+        print(f"Circuit opened for cluster {self.cluster_name} after {self.failures} failures: {self.last_error}")
+    
+    def _probe_loop(self, probe):
+        """后台探测，直到集群恢复或熔断器被重置"""
+        while not self._stop.wait(self.probe_interval):
+            try:
+                probe()
+            except Exception as e:
+                # 4xx等响应说明apiserver已经可以正常响应，视为恢复
+                if is_cluster_failure(e):
+                    with self._lock:
+                        self.probes += 1
+                        self.last_error = f"{type(e).__name__}: {str(e)}"
+                    continue
+            with self._lock:
+                self.probes += 1
+                if self._stop.is_set():
+                    return
+                self.state = CIRCUIT_CLOSED
+                self.failures = 0
+                self.opened_at = None
+            print(f"Circuit closed for cluster {self.cluster_name}, probe succeeded")
+            return
+    
+    def stop(self):
+        """停止后台探测"""
+        self._stop.set()
+    
+    def snapshot(self):
+        """熔断器状态"""
+        def isoformat(timestamp):
+            return datetime.datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+        
+        with self._lock:
+            return {
+                'cluster': self.cluster_name,
+                'state': self.state,
+                'failures': self.failures,
+                'failure_threshold': self.failure_threshold,
+                'opened_at': isoformat(self.opened_at),
+                'last_failure_at': isoformat(self.last_failure_at),
+                'last_error': self.last_error,
+                'probes': self.probes
+            }
+
+class CircuitBreakerRegistry:
+    """进程级熔断器注册表，每个集群一个熔断器"""
+    
+    def __init__(self):
+        self._breakers = {}  # cluster_name -> CircuitBreaker
+        self._lock = threading.Lock()
+    
+    def get(self, cluster_name):
+        """获取集群的熔断器，不存在时创建"""
+        breaker = self._breakers.get(cluster_name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(cluster_name)
+                if breaker is None:
+                    breaker = CircuitBreaker(cluster_name)
+                    self._breakers[cluster_name] = breaker
+        return breaker
+    
+    def reset(self, cluster_name):
+        """移除集群的熔断器（如kubeconfig变化或集群删除），下次访问时重新计数"""
+        with self._lock:
+            breaker = self._breakers.pop(cluster_name, None)
+        if breaker:
+            breaker.stop()
+    
+    def state(self, cluster_name):
+        """集群当前的熔断状态，未访问过的集群为closed"""
+        breaker = self._breakers.get(cluster_name)
+        return breaker.state if breaker else CIRCUIT_CLOSED
+    
+    def states(self):
+        """所有集群的熔断器状态"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return [breaker.snapshot() for breaker in sorted(breakers, key=lambda b: b.cluster_name)]
+    
+    def stop_all(self):
+        """停止所有后台探测"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        for breaker in breakers:
+            breaker.stop()
+
+# 进程级熔断器注册表
+circuit_breakers = CircuitBreakerRegistry()
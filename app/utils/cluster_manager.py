@@ -1,125 +1,305 @@
 import json
 import os
+import threading
+from urllib.parse import quote
+from app.config.config import Config
+from app.utils.file_lock import FileLock, atomic_write, atomic_write_json
+
+class ClusterRegistry:
+    """集群注册表
+    
+    集群元数据（name、display_name）保存在cluster_configs.json中，kubeconfig内容按集群单独保存在
+    cluster_kubeconfigs目录下。元数据常驻内存并按name和display_name建立索引，kubeconfig在首次使用时加载，
+    文件变化（包括其他进程写入）或本进程写入后重新加载。
+    """
+    
+    def __init__(self, config_file):
+        """
+        初始化集群注册表
+        
+        Args:
+            config_file: 集群元数据文件路径
+        """
+        self.config_file = config_file
+        self.kubeconfig_dir = os.path.join(os.path.dirname(config_file), 'cluster_kubeconfigs')
+        self._lock = threading.RLock()
+        # 跨进程写锁，多worker部署时串行化集群配置的读-改-写
+        self._file_lock = FileLock(config_file + '.lock')
+        self._file_stamp = None
+        self._clusters = []  # 按配置顺序排列的元数据
+        self._by_name = {}  # name -> 元数据
+        self._by_display_name = {}  # display_name -> 元数据（重名时取第一个）
+        self._kubeconfigs = {}  # name -> (文件stamp, kubeconfig内容)
+    
+    @staticmethod
+    def _stat(path):
+        """文件的(mtime, size)，文件不存在时返回None"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _kubeconfig_path(self, cluster_name):
+        """集群kubeconfig文件路径"""
+        return os.path.join(self.kubeconfig_dir, quote(cluster_name, safe='') + '.kubeconfig')
+    
+    def _write_metadata(self, clusters):
+        """保存集群元数据（需持有锁）"""
+        atomic_write_json(self.config_file, clusters)
+        self._file_stamp = None
+    
+    def _write_kubeconfig(self, cluster_name, kubeconfig_content):
+        """保存集群kubeconfig（需持有锁）"""
+        os.makedirs(self.kubeconfig_dir, exist_ok=True)
+        atomic_write(self._kubeconfig_path(cluster_name), kubeconfig_content)
+        self._kubeconfigs.pop(cluster_name, None)
+    
+    def _remove_kubeconfig(self, cluster_name):
+        """删除集群kubeconfig（需持有锁）"""
+        self._kubeconfigs.pop(cluster_name, None)
+        try:
+            os.remove(self._kubeconfig_path(cluster_name))
+        except FileNotFoundError:
+            pass
+    
+    def _read_metadata(self):
+        """读取集群元数据文件，文件不存在时返回空列表"""
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+    
+    def initialize(self):
+        """创建集群元数据文件并迁移旧版格式，只在创建注册表时执行一次，之后读取不再加文件锁"""
+        with self._lock, self._file_lock:
+            if not os.path.exists(self.config_file):
+                atomic_write_json(self.config_file, [])
+            self._load(force=True)
+    
+    def _migrate(self):
+        """将旧版内嵌在cluster_configs.json中的kubeconfig拆分到单独文件"""
+        with self._file_lock:
+            # 其他进程可能已经完成迁移
+            clusters = self._read_metadata()
+            if not any('kubeconfig_content' in cluster for cluster in clusters):
+                return clusters
+            for cluster in clusters:
+                if 'kubeconfig_content' in cluster:
+                    self._write_kubeconfig(cluster['name'], cluster.pop('kubeconfig_content') or '')
+            self._write_metadata(clusters)
+            return clusters
+    
+    def _load(self, force=False):
+        """获取内存中的集群元数据，文件变化时重新读取（写入都是原子rename，读取不需要文件锁）"""
+        stamp = self._stat(self.config_file)
+        if stamp == self._file_stamp and not force:
+            return self._clusters
+        with self._lock:
+            stamp = self._stat(self.config_file)
+            if stamp == self._file_stamp and not force:
+                return self._clusters
+            clusters = self._read_metadata()
+            if any('kubeconfig_content' in cluster for cluster in clusters):
+                clusters = self._migrate()
+                stamp = self._stat(self.config_file)
+            
+            clusters = [{'name': c['name'], 'display_name': c.get('display_name', c['name'])} for c in clusters]
+            by_display_name = {}
+            for cluster in clusters:
+                by_display_name.setdefault(cluster['display_name'], cluster)
+            self._by_name = {cluster['name']: cluster for cluster in clusters}
+            self._by_display_name = by_display_name
+            self._clusters = clusters
+            self._file_stamp = stamp
+            return self._clusters
+    
+    def list(self):
+        """获取所有集群元数据（不含kubeconfig）"""
+        return [dict(cluster) for cluster in self._load()]
+    
+    def get(self, cluster_name):
+        """按集群名称获取元数据"""
+        self._load()
+        cluster = self._by_name.get(cluster_name)
+        return dict(cluster) if cluster else None
+    
+    def find(self, name_or_display_name):
+        """先按name再按display_name查找集群元数据"""
+        self._load()
+        cluster = self._by_name.get(name_or_display_name) or self._by_display_name.get(name_or_display_name)
+        return dict(cluster) if cluster else None
+    
+    def get_kubeconfig(self, cluster_name):
+        """按需加载集群kubeconfig内容，不存在时返回None"""
+        self._load()
+        path = self._kubeconfig_path(cluster_name)
+        stamp = self._stat(path)
+        if stamp is None:
+            return None
+        entry = self._kubeconfigs.get(cluster_name)
+        if entry and entry[0] == stamp:
+            return entry[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            kubeconfig_content = f.read()
+        self._kubeconfigs[cluster_name] = (stamp, kubeconfig_content)
+        return kubeconfig_content
+    
+    def add(self, cluster_name, display_name, kubeconfig_content):
+        """添加集群，集群名已存在时返回False"""
+        with self._lock, self._file_lock:
+            clusters = [dict(cluster) for cluster in self._load(force=True)]
+            if any(cluster['name'] == cluster_name for cluster in clusters):
+                return False
+            # 先写kubeconfig，再写元数据，避免列表中出现没有kubeconfig的集群
+            self._write_kubeconfig(cluster_name, kubeconfig_content)
+            clusters.append({'name': cluster_name, 'display_name': display_name})
+            self._write_metadata(clusters)
+            return True
+    
+    def update(self, cluster_name, display_name=None, kubeconfig_content=None):
+        """更新集群，集群不存在时返回False"""
+        with self._lock, self._file_lock:
+            clusters = [dict(cluster) for cluster in self._load(force=True)]
+            for cluster in clusters:
+                if cluster['name'] == cluster_name:
+                    if kubeconfig_content is not None:
+                        self._write_kubeconfig(cluster_name, kubeconfig_content)
+                    if display_name is not None:
+                        cluster['display_name'] = display_name
+                        self._write_metadata(clusters)
+                    return True
+            return False
+    
+    def delete(self, cluster_name):
+        """删除集群，集群不存在时返回False"""
+        with self._lock, self._file_lock:
+            clusters = [dict(cluster) for cluster in self._load(force=True)]
+            remaining = [cluster for cluster in clusters if cluster['name'] != cluster_name]
+            if len(remaining) == len(clusters):
+                return False
+            self._write_metadata(remaining)
+            self._remove_kubeconfig(cluster_name)
+            return True
+
+# 每个配置文件一个注册表，进程内所有ClusterManager共享
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_cluster_registry(config_file):
+    """获取配置文件对应的进程级集群注册表，首次获取时初始化配置文件"""
+    key = os.path.abspath(config_file)
+    with _registries_lock:
+        if key not in _registries:
+            registry = ClusterRegistry(key)
+            registry.initialize()
+            _registries[key] = registry
+        return _registries[key]
 
 class ClusterManager:
     """集群配置管理类"""
     
     def __init__(self, config_file=None):
         """初始化集群管理器"""
-        self.config_file = config_file or os.path.join(
+        self.config_file = config_file or os.path.join(Config.CONFIG_DIR, 'cluster_configs.json')
+        # 配置文件的创建和迁移只在进程内首次获取注册表时执行，请求路径上创建ClusterManager不加文件锁
+        self.registry = get_cluster_registry(self.config_file)
+    
+    def _invalidate_cluster_caches(self, cluster_name):
+        """清理集群相关的客户端和缓存"""
+        from app.utils.k8s_client import api_client_pool
+        from app.utils.node_index import node_index
+        from app.utils.informer import informer_manager
+        from app.utils.pod_watch import pod_watch_manager
+        from app.utils.circuit_breaker import circuit_breakers
+        from app.utils.cache import cluster_version_cache, capacity_cache, node_metrics_cache, pod_metrics_cache
+        informer_manager.stop_cluster(cluster_name)
+        pod_watch_manager.stop_cluster(cluster_name)
+        api_client_pool.invalidate(cluster_name)
+        circuit_breakers.reset(cluster_name)
+        node_index.invalidate(cluster_name)
+        cluster_version_cache.invalidate(cluster_name)
+        capacity_cache.invalidate(cluster_name)
+        node_metrics_cache.invalidate(cluster_name)
+        pod_metrics_cache.invalidate(cluster_name)
+    
+    def _import_kubeconfig_files(self):
+        """集群配置为空时，导入kubeconfigs目录中的现有kubeconfig文件"""
+        # 获取现有kubeconfig文件目录
+        kubeconfig_dir = os.path.join(
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            'config',
-            'cluster_configs.json'
+            'kubeconfigs'
         )
-        self._init_config_file()
-    
-    def _init_config_file(self):
-        """初始化配置文件"""
-        if not os.path.exists(self.config_file):
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
+        if not os.path.exists(kubeconfig_dir):
+            return
+        
+        for filename in os.listdir(kubeconfig_dir):
+            file_path = os.path.join(kubeconfig_dir, filename)
+            if os.path.isfile(file_path):
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        kubeconfig_content = f.read()
+                    
+                    # 添加到集群配置中
+                    self.registry.add(filename, filename, kubeconfig_content)
+                except Exception as e:
+                    print(f"Failed to import kubeconfig file {filename}: {e}")
     
     def get_clusters(self):
-        """获取所有集群配置，包括现有kubeconfig文件"""
-        # 从配置文件读取集群配置
-        with open(self.config_file, 'r', encoding='utf-8') as f:
-            clusters = json.load(f)
+        """获取所有集群的元数据（name、display_name），不加载kubeconfig内容"""
+        clusters = self.registry.list()
         
         # 检查是否已有配置，如果没有，尝试导入现有kubeconfig文件
         if not clusters:
-            # 获取现有kubeconfig文件目录
-            kubeconfig_dir = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                'kubeconfigs'
-            )
-            
-            # 导入现有kubeconfig文件
-            if os.path.exists(kubeconfig_dir):
-                for filename in os.listdir(kubeconfig_dir):
-                    file_path = os.path.join(kubeconfig_dir, filename)
-                    if os.path.isfile(file_path):
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                kubeconfig_content = f.read()
-                            
-                            # 添加到集群配置中
-                            new_cluster = {
-                                'name': filename,
-                                'display_name': filename,
-                                'kubeconfig_content': kubeconfig_content
-                            }
-                            clusters.append(new_cluster)
-                        except Exception as e:
-                            print(f"Failed to import kubeconfig file {filename}: {e}")
-                
-                # 如果导入了集群配置，保存到配置文件
-                if clusters:
-                    with open(self.config_file, 'w', encoding='utf-8') as f:
-                        json.dump(clusters, f, ensure_ascii=False, indent=2)
+            self._import_kubeconfig_files()
+            clusters = self.registry.list()
         
         return clusters
     
+    def find_cluster(self, name_or_display_name):
+        """按集群名称或显示名称查找集群元数据"""
+        cluster = self.registry.find(name_or_display_name)
+        if cluster is None and not self.registry.list():
+            # 配置为空时先导入现有kubeconfig文件
+            self.get_clusters()
+            cluster = self.registry.find(name_or_display_name)
+        return cluster
+    
+    def get_kubeconfig(self, cluster_name):
+        """获取集群的kubeconfig内容"""
+        return self.registry.get_kubeconfig(cluster_name)
+    
     def add_cluster(self, cluster_name, display_name, kubeconfig_content):
         """添加集群配置"""
-        clusters = self.get_clusters()
+        # /api/_aggregate等下划线开头的路径保留给跨集群接口，避免与集群的资源路径冲突
+        if cluster_name.startswith('_'):
+            return False, '集群名不能以下划线开头'
         
         # 检查集群名是否已存在
-        for cluster in clusters:
-            if cluster['name'] == cluster_name:
-                return False, '集群名已存在'
-        
-        # 添加新集群
-        new_cluster = {
-            'name': cluster_name,
-            'display_name': display_name,
-            'kubeconfig_content': kubeconfig_content
-        }
-        clusters.append(new_cluster)
-        
-        # 保存配置
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(clusters, f, ensure_ascii=False, indent=2)
+        if not self.registry.add(cluster_name, display_name, kubeconfig_content):
+            return False, '集群名已存在'
         
         return True, '集群添加成功'
     
     def update_cluster(self, cluster_name, display_name=None, kubeconfig_content=None):
         """更新集群配置"""
-        clusters = self.get_clusters()
+        if not self.registry.update(cluster_name, display_name, kubeconfig_content):
+            return False, '集群不存在'
         
-        # 查找集群
-        for cluster in clusters:
-            if cluster['name'] == cluster_name:
-                if display_name is not None:
-                    cluster['display_name'] = display_name
-                if kubeconfig_content is not None:
-                    cluster['kubeconfig_content'] = kubeconfig_content
-                
-                # 保存配置
-                with open(self.config_file, 'w', encoding='utf-8') as f:
-                    json.dump(clusters, f, ensure_ascii=False, indent=2)
-                
-                return True, '集群更新成功'
+        # kubeconfig变化时重建该集群的ApiClient和缓存
+        if kubeconfig_content is not None:
+            self._invalidate_cluster_caches(cluster_name)
         
-        return False, '集群不存在'
+        return True, '集群更新成功'
     
     def delete_cluster(self, cluster_name):
         """删除集群配置"""
-        clusters = self.get_clusters()
-        
-        # 查找并删除集群
-        cluster_found = False
-        for i, cluster in enumerate(clusters):
-            if cluster['name'] == cluster_name:
-                del clusters[i]
-                cluster_found = True
-                break
-        
-        if not cluster_found:
+        if not self.registry.delete(cluster_name):
             return False, '集群不存在'
         
-        # 保存配置
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(clusters, f, ensure_ascii=False, indent=2)
+        # 释放该集群的ApiClient和缓存
+        self._invalidate_cluster_caches(cluster_name)
         
         # 删除kubeconfigs目录中的对应文件
         kubeconfig_dir = os.path.join(
@@ -136,11 +316,8 @@ class ClusterManager:
         return True, '集群删除成功'
     
     def get_cluster(self, cluster_name):
-        """获取单个集群配置"""
-        clusters = self.get_clusters()
-        
-        for cluster in clusters:
-            if cluster['name'] == cluster_name:
-                return cluster
-        
-        return None
+        """获取单个集群配置（包含kubeconfig内容）"""
+        cluster = self.registry.get(cluster_name)
+        if cluster:
+            cluster['kubeconfig_content'] = self.registry.get_kubeconfig(cluster_name)
+        return cluster
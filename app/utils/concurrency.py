@@ -0,0 +1,38 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.config.config import Config
+from app.utils.request_timing import with_request_context
+
+WORKER_THREAD_PREFIX = 'k8s-worker'
+
+# 进程级共享线程池，用于并发请求apiserver
+_executor = ThreadPoolExecutor(
+    max_workers=Config.K8S_EXECUTOR_MAX_WORKERS,
+    thread_name_prefix=WORKER_THREAD_PREFIX
+)
+
+def get_executor():
+    """获取共享线程池"""
+    return _executor
+
+def in_worker_thread():
+    """当前是否运行在共享线程池的工作线程中"""
+    return threading.current_thread().name.startswith(WORKER_THREAD_PREFIX)
+
+def run_concurrently(tasks):
+    """
+    在共享线程池中并发执行多个无参任务
+    
+    已在工作线程中时直接顺序执行，避免嵌套提交占满线程池导致死锁。
+    
+    Args:
+        tasks: dict，任务名 -> 可调用对象
+        
+    Returns:
+        dict: 任务名 -> 返回值，顺序与tasks一致；任一任务异常时按tasks顺序抛出第一个异常
+    """
+    if len(tasks) <= 1 or in_worker_thread():
+        return {name: func() for name, func in tasks.items()}
+    
+    futures = {name: _executor.submit(with_request_context(func)) for name, func in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows下没有fcntl，只使用进程内锁
+    fcntl = None
+
+# 进程内每个锁文件共享一把线程锁和线程本地的持有状态（flock只在进程之间互斥）
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+def _get_thread_lock(lock_file):
+    """获取锁文件对应的(进程内锁, 线程本地持有状态)"""
+    key = os.path.abspath(lock_file)
+    with _thread_locks_guard:
+        if key not in _thread_locks:
+            _thread_locks[key] = (threading.RLock(), threading.local())
+        return _thread_locks[key]
+
+class FileLock:
+    """跨进程文件锁：进程内线程锁 + fcntl文件锁，可重入（同一线程内嵌套使用只加一次flock）"""
+    
+    def __init__(self, lock_file):
+        """
+        初始化文件锁
+        
+        Args:
+            lock_file: 锁文件路径，不存在时自动创建
+        """
+        self.lock_file = lock_file
+        self.thread_lock, self._local = _get_thread_lock(lock_file)
+    
+    def __enter__(self):
+        self.thread_lock.acquire()
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0 and fcntl:
+            fd = None
+            try:
+                fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except Exception:
+                if fd is not None:
+                    os.close(fd)
+                self.thread_lock.release()
+                raise
+            self._local.fd = fd
+        self._local.depth = depth + 1
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._local.depth -= 1
+            fd = getattr(self._local, 'fd', None)
+            if self._local.depth == 0 and fd is not None:
+                self._local.fd = None
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+        finally:
+            self.thread_lock.release()
+
+def atomic_write(path, content):
+    """先写入同目录临时文件再rename替换，读取方不会看到写了一半的文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def atomic_write_json(path, data):
+    """原子写入JSON文件"""
+    atomic_write(path, json.dumps(data, ensure_ascii=False, indent=2))
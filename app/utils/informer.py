@@ -0,0 +1,292 @@
+import threading
+import time
+import kubernetes.client
+from kubernetes.client.rest import ApiException
+from kubernetes.watch import Watch
+from kubernetes.watch.watch import iter_resp_lines
+from app.config.config import Config
+from app.utils.metrics import record_cache
+
+# 支持informer缓存的资源类型：kind -> (API类, 全命名空间list方法, 按命名空间list方法)
+# Secret和ConfigMap不做缓存：配置视图只列出元数据摘要，避免在Web进程中常驻配置和密钥内容
+INFORMER_KINDS = {
+    'pods': ('CoreV1Api', 'list_pod_for_all_namespaces', 'list_namespaced_pod'),
+    'namespaces': ('CoreV1Api', 'list_namespace', None),
+    'services': ('CoreV1Api', 'list_service_for_all_namespaces', 'list_namespaced_service'),
+    'deployments': ('AppsV1Api', 'list_deployment_for_all_namespaces', 'list_namespaced_deployment'),
+    'statefulsets': ('AppsV1Api', 'list_stateful_set_for_all_namespaces', 'list_namespaced_stateful_set'),
+    'daemonsets': ('AppsV1Api', 'list_daemon_set_for_all_namespaces', 'list_namespaced_daemon_set'),
+    'ingresses': ('NetworkingV1Api', 'list_ingress_for_all_namespaces', 'list_namespaced_ingress'),
+}
+
+HTTP_STATUS_GONE = 410
+# 无权限list全部命名空间，重试没有意义
+HTTP_STATUS_FORBIDDEN = (401, 403)
+
+def parse_equality_selector(label_selector):
+    """解析仅包含等值条件的标签选择器（如 app=web,tier=api），其他形式返回None"""
+    labels = {}
+    if not label_selector:
+        return labels
+    for term in label_selector.split(','):
+        term = term.strip()
+        if not term:
+            continue
+        if '!=' in term or '=' not in term or ' ' in term:
+            return None
+        key, _, value = term.partition('==') if '==' in term else term.partition('=')
+        labels[key.strip()] = value.strip()
+    return labels
+
+class Informer:
+    """单个(集群, 资源类型)的list+watch本地缓存"""
+    
+    def __init__(self, cluster_name, kind, api_client, on_stop=None):
+        """
+        初始化informer
+        
+        Args:
+            cluster_name: 集群名称
+            kind: 资源类型，见INFORMER_KINDS
+            api_client: 集群的ApiClient
+            on_stop: informer退出时的回调
+        """
+        api_class, list_all_method, _ = INFORMER_KINDS[kind]
+        self.cluster_name = cluster_name
+        self.kind = kind
+        self.list_func = getattr(getattr(kubernetes.client, api_class)(api_client), list_all_method)
+        self.on_stop = on_stop
+        
+        self._store = {}  # (namespace, name) -> 资源对象
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._first_attempt = threading.Event()  # 首次list完成或失败
+        self._stop = threading.Event()
+        self.last_error = None
+        self.forbidden = False
+        self.resource_version = None
+        self.last_sync = 0.0
+        self.last_access = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f'informer-{cluster_name}-{kind}',
+            daemon=True
+        )
+    
+    def start(self):
+        """启动后台list+watch线程"""
+        self._thread.start()
+    
+    def stop(self):
+        """停止informer"""
+        self._stop.set()
+    
+    @property
+    def stopped(self):
+        """informer是否已停止"""
+        return self._stop.is_set()
+    
+    def wait_for_sync(self, timeout):
+        """
+        等待首次list完成
+        
+        首次list失败后不再等待：informer在后台重试期间立即返回False，调用方直接请求apiserver，
+        避免每个请求都等待INFORMER_SYNC_TIMEOUT。
+        """
+        self._first_attempt.wait(timeout)
+        return self._synced.is_set()
+    
+    def is_fresh(self):
+        """本地缓存是否在允许的陈旧时间内"""
+        return self._synced.is_set() and time.monotonic() - self.last_sync <= Config.INFORMER_MAX_STALENESS
+    
+    @staticmethod
+    def _key(obj):
+        """资源对象在本地缓存中的键"""
+        return (obj.metadata.namespace or '', obj.metadata.name)
+    
+    def _relist(self):
+        """全量list并重建本地缓存"""
+        result = self.list_func()
+        store = {self._key(obj): obj for obj in result.items}
+        with self._lock:
+            self._store = store
+            self.resource_version = result.metadata.resource_version
+            self.last_sync = time.monotonic()
+        self.last_error = None
+        self._synced.set()
+        self._first_attempt.set()
+    
+    def _watch(self):
+        """从当前resourceVersion开始watch一轮，直到服务端超时断开"""
+        watch = Watch()
+        return_type = watch.get_return_type(self.list_func)
+        resp = self.list_func(
+            watch=True,
+            resource_version=self.resource_version,
+            allow_watch_bookmarks=True,
+            timeout_seconds=Config.INFORMER_WATCH_TIMEOUT,
+            _request_timeout=Config.INFORMER_WATCH_TIMEOUT + 10,
+            _preload_content=False
+        )
+        try:
+            for line in iter_resp_lines(resp):
+                if self._stop.is_set():
+                    break
+                event = watch.unmarshal_event(line, return_type)
+                event_type = event['type']
+                if event_type == 'ERROR':
+                    obj = event['raw_object']
+                    raise ApiException(status=obj.get('code'), reason=f"{obj.get('reason')}: {obj.get('message')}")
+                
+                with self._lock:
+                    if event_type == 'BOOKMARK':
+                        self.resource_version = event['raw_object']['metadata']['resourceVersion']
+                    elif event_type == 'DELETED':
+                        self._store.pop(self._key(event['object']), None)
+                        self.resource_version = event['object'].metadata.resource_version
+                    else:
+                        self._store[self._key(event['object'])] = event['object']
+                        self.resource_version = event['object'].metadata.resource_version
+                    self.last_sync = time.monotonic()
+        finally:
+            resp.close()
+            resp.release_conn()
+        
+        # 正常结束一轮watch说明与apiserver保持同步
+        self.last_sync = time.monotonic()
+    
+    def _run(self):
+        """后台线程：首次list，之后循环watch，410 Gone时重新list，401/403时停止"""
+        backoff = 1
+        need_relist = True
+        try:
+            while not self._stop.is_set():
+                # 长时间无人读取时自动退出，释放watch连接和内存
+                if time.monotonic() - self.last_access > Config.INFORMER_IDLE_TIMEOUT:
+                    print(f"Informer {self.cluster_name}/{self.kind} idle, stopping")
+                    break
+                try:
+                    if need_relist:
+                        self._relist()
+                        need_relist = False
+                    self._watch()
+                    backoff = 1
+                except Exception as e:
+                    need_relist = True
+                    if isinstance(e, ApiException) and e.status == HTTP_STATUS_GONE:
+                        # resourceVersion过期，立即重新list
+                        continue
+                    self.last_error = f"{type(e).__name__}: {str(e)}"
+                    self._first_attempt.set()
+                    if isinstance(e, ApiException) and e.status in HTTP_STATUS_FORBIDDEN:
+                        # 没有全部命名空间的list/watch权限，由管理器在INFORMER_FORBIDDEN_RETRY秒内不再启动
+                        print(f"Informer {self.cluster_name}/{self.kind} forbidden, stopping: {e.status} {e.reason}")
+                        self.forbidden = True
+                        break
+                    print(f"Informer {self.cluster_name}/{self.kind} watch failed: {e}")
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, 30)
+        finally:
+            self._stop.set()
+            self._first_attempt.set()
+            if self.on_stop:
+                self.on_stop(self)
+    
+    def list(self, namespace=None, label_selector=None):
+        """
+        从本地缓存读取资源列表
+        
+        Returns:
+            按(namespace, name)排序的资源对象列表；缓存未同步、已过期或选择器不支持时返回None
+        """
+        self.last_access = time.monotonic()
+        if not self.is_fresh():
+            return None
+        match_labels = parse_equality_selector(label_selector)
+        if match_labels is None:
+            return None
+        
+        with self._lock:
+            items = [
+                obj for key, obj in self._store.items()
+                if namespace is None or key[0] == namespace
+            ]
+        if match_labels:
+            items = [
+                obj for obj in items
+                if all((obj.metadata.labels or {}).get(k) == v for k, v in match_labels.items())
+            ]
+        items.sort(key=self._key)
+        return items
+
+class InformerManager:
+    """进程级informer管理器，每个(集群, 资源类型)只维护一个list+watch"""
+    
+    def __init__(self):
+        """初始化informer管理器"""
+        self._informers = {}  # (cluster_name, kind) -> Informer
+        self._forbidden = {}  # (cluster_name, kind) -> 允许重新启动的时间（monotonic）
+        self._lock = threading.Lock()
+    
+    def _remove(self, informer):
+        """informer退出时从管理器中移除，因无权限退出的记录下来，暂不重新启动"""
+        with self._lock:
+            key = (informer.cluster_name, informer.kind)
+            if self._informers.get(key) is informer:
+                del self._informers[key]
+                if informer.forbidden:
+                    self._forbidden[key] = time.monotonic() + Config.INFORMER_FORBIDDEN_RETRY
+    
+    def get_informer(self, cluster_name, kind, api_client):
+        """获取或启动(集群, 资源类型)对应的informer，无权限list全部命名空间时返回None"""
+        key = (cluster_name, kind)
+        with self._lock:
+            informer = self._informers.get(key)
+            if informer and not informer.stopped:
+                return informer
+            if time.monotonic() < self._forbidden.get(key, 0):
+                return None
+            self._forbidden.pop(key, None)
+            informer = Informer(cluster_name, kind, api_client, on_stop=self._remove)
+            self._informers[key] = informer
+        informer.start()
+        return informer
+    
+    def list(self, cluster_name, kind, api_client, namespace=None, label_selector=None):
+        """
+        从informer缓存读取资源列表
+        
+        Returns:
+            资源对象列表；informer未启用、未同步或已过期时返回None，调用方应直接请求apiserver
+        """
+        if not Config.INFORMER_ENABLED or kind not in INFORMER_KINDS:
+            return None
+        informer = self.get_informer(cluster_name, kind, api_client)
+        if informer is None or not informer.wait_for_sync(Config.INFORMER_SYNC_TIMEOUT):
+            record_cache('informer', False)
+            return None
+        items = informer.list(namespace, label_selector)
+        record_cache('informer', items is not None)
+        return items
+    
+    def stop_cluster(self, cluster_name):
+        """停止指定集群的所有informer（更新kubeconfig后可能已有权限，同时清除无权限记录）"""
+        with self._lock:
+            self._forbidden = {key: until for key, until in self._forbidden.items() if key[0] != cluster_name}
+            informers = [i for (c, _), i in self._informers.items() if c == cluster_name]
+            for informer in informers:
+                del self._informers[(informer.cluster_name, informer.kind)]
+        for informer in informers:
+            informer.stop()
+    
+    def stop_all(self):
+        """停止所有informer"""
+        with self._lock:
+            informers = list(self._informers.values())
+            self._informers.clear()
+        for informer in informers:
+            informer.stop()
+
+# 进程级informer管理器
+informer_manager = InformerManager()
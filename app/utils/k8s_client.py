@@ -1,6 +1,144 @@
-from kubernetes.config import load_kube_config
+from kubernetes.config import load_kube_config_from_dict
 import kubernetes.client
-import os
+from kubernetes.client.rest import ApiException
+import hashlib
+import threading
+import time
+import yaml
+from app.config.config import Config
+from app.utils.circuit_breaker import circuit_breakers, is_cluster_failure, api_group, CircuitOpenError
+from app.utils.metrics import APISERVER_REQUEST_DURATION, APISERVER_REQUEST_ERRORS, APISERVER_REQUESTS_IN_FLIGHT, api_verb_and_resource
+from app.utils import request_timing
+
+def request_timeout(timeout=None):
+    """
+    生成(连接超时, 读超时)
+    
+    kubernetes客户端只接受int或二元组形式的_request_timeout，float会被忽略导致没有超时，这里统一转换为二元组。
+    
+    Args:
+        timeout: 调用方指定的超时，为空时使用K8S_CONNECT_TIMEOUT/K8S_READ_TIMEOUT；数字表示读超时
+    """
+    if timeout is None:
+        return (Config.K8S_CONNECT_TIMEOUT, Config.K8S_READ_TIMEOUT)
+    if isinstance(timeout, (int, float)):
+        return (min(Config.K8S_CONNECT_TIMEOUT, timeout), timeout)
+    return timeout
+
+class ClusterApiClient(kubernetes.client.ApiClient):
+    """绑定集群的ApiClient：所有请求使用默认连接/读超时，并经过集群熔断器"""
+    
+    def __init__(self, configuration, cluster_name):
+        super().__init__(configuration)
+        self.cluster_name = cluster_name
+    
+    def _probe(self):
+        """熔断后的探测请求，不经过熔断器"""
+        super().call_api(
+            '/version/', 'GET',
+            response_type='object',
+            auth_settings=['BearerToken'],
+            _return_http_data_only=True,
+            _request_timeout=request_timeout()
+        )
+    
+    def call_api(self, resource_path, method, path_params=None, query_params=None, *args, **kwargs):
+        """所有API类（CoreV1Api等）和watch最终都通过这里发送请求"""
+        kwargs['_request_timeout'] = request_timeout(kwargs.get('_request_timeout'))
+        verb, resource = api_verb_and_resource(resource_path, method, path_params, query_params)
+        breaker = circuit_breakers.get(self.cluster_name)
+        try:
+            breaker.before_call()
+        except CircuitOpenError as e:
+            APISERVER_REQUEST_ERRORS.labels(self.cluster_name, verb, resource, type(e).__name__).inc()
+            raise
+        
+        in_flight = APISERVER_REQUESTS_IN_FLIGHT.labels(self.cluster_name)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            result = super().call_api(resource_path, method, path_params, query_params, *args, **kwargs)
+        except Exception as e:
+            code = str(e.status) if isinstance(e, ApiException) else type(e).__name__
+            APISERVER_REQUEST_ERRORS.labels(self.cluster_name, verb, resource, code).inc()
+            if is_cluster_failure(e, api_group(resource_path, path_params)):
+                breaker.record_failure(e, self._probe)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            APISERVER_REQUEST_DURATION.labels(self.cluster_name, verb, resource).observe(duration)
+            request_timing.record(f'k8s.{verb}.{resource}', duration, self.cluster_name)
+            in_flight.dec()
+        breaker.record_success()
+        return result
+
+class ApiClientPool:
+    """进程级ApiClient连接池，按集群名称和kubeconfig内容哈希缓存长连接客户端"""
+    
+    def __init__(self, pool_maxsize=None):
+        """
+        初始化ApiClient连接池
+        
+        Args:
+            pool_maxsize: 每个集群的HTTP连接池大小
+        """
+        self.pool_maxsize = pool_maxsize or Config.K8S_CONNECTION_POOL_MAXSIZE
+        self._clients = {}  # cluster_name -> (kubeconfig_hash, ApiClient)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _hash_kubeconfig(kubeconfig_content):
+        """计算kubeconfig内容哈希"""
+        return hashlib.sha256(kubeconfig_content.encode()).hexdigest()
+    
+    def _build_client(self, cluster_name, kubeconfig_content):
+        """在内存中加载kubeconfig并创建ApiClient，不写临时文件"""
+        configuration = kubernetes.client.Configuration()
+        load_kube_config_from_dict(
+            yaml.safe_load(kubeconfig_content),
+            client_configuration=configuration,
+            persist_config=False
+        )
+        # 禁用SSL验证，保持HTTP长连接
+        configuration.verify_ssl = False
+        configuration.connection_pool_maxsize = self.pool_maxsize
+        # urllib3默认重试3次，集群不可达时会把超时放大4倍
+        configuration.retries = Config.K8S_RETRIES
+        return ClusterApiClient(configuration, cluster_name)
+    
+    def get(self, cluster_name, kubeconfig_content):
+        """获取集群对应的ApiClient，kubeconfig内容变化时重建"""
+        kubeconfig_hash = self._hash_kubeconfig(kubeconfig_content)
+        with self._lock:
+            entry = self._clients.get(cluster_name)
+            if entry and entry[0] == kubeconfig_hash:
+                return entry[1]
+            
+            api_client = self._build_client(cluster_name, kubeconfig_content)
+            self._clients[cluster_name] = (kubeconfig_hash, api_client)
+        
+        # 关闭旧客户端的连接池
+        if entry:
+            self._close(entry[1])
+        return api_client
+    
+    def invalidate(self, cluster_name):
+        """移除指定集群的ApiClient，下次访问时重建"""
+        with self._lock:
+            entry = self._clients.pop(cluster_name, None)
+        if entry:
+            self._close(entry[1])
+    
+    @staticmethod
+    def _close(api_client):
+        """关闭ApiClient"""
+        try:
+            api_client.close()
+        except Exception as e:
+            print(f"Failed to close api client: {e}")
+
+# 进程级ApiClient连接池
+api_client_pool = ApiClientPool()
 
 class K8sClient:
     """Kubernetes客户端工具类"""
@@ -17,38 +155,26 @@ class K8sClient:
         self.cluster_display_name = cluster_display_name
         self.cluster_manager = ClusterManager()
         
-        # 获取集群配置
-        clusters = self.cluster_manager.get_clusters()
-        # 先尝试按name匹配，再尝试按display_name匹配
-        self.cluster = next((c for c in clusters if c['name'] == cluster_display_name), None)
-        if not self.cluster:
-            self.cluster = next((c for c in clusters if c['display_name'] == cluster_display_name), None)
+        # 按name或display_name查找集群元数据
+        self.cluster = self.cluster_manager.find_cluster(cluster_display_name)
         
         if not self.cluster:
             raise ValueError(f'Cluster not found: {cluster_display_name}')
         
-        # 将kubeconfig内容写入临时文件
-        import tempfile
-        self.temp_config_file = tempfile.NamedTemporaryFile(mode='w', delete=False)
-        self.temp_config_file.write(self.cluster['kubeconfig_content'])
-        self.temp_config_file.close()
-        
-        self.config_file = self.temp_config_file.name
+        self.cluster_name = self.cluster['name']
+    
+    def get_api_client(self):
+        """从连接池获取当前集群的ApiClient"""
+        kubeconfig_content = self.cluster_manager.get_kubeconfig(self.cluster_name)
+        if not kubeconfig_content:
+            raise FileNotFoundError(f'Kubeconfig not found for cluster: {self.cluster_display_name}')
+        return api_client_pool.get(self.cluster_name, kubeconfig_content)
     
     def _get_client(self, client_type):
         """获取指定类型的Kubernetes客户端"""
-        if not self.config_file:
-            raise FileNotFoundError(f'Kubeconfig file not found for cluster: {self.cluster_display_name}')
-        
-        # 加载kubeconfig
-        load_kube_config(self.config_file)
-        
-        # 创建配置对象并禁用SSL验证
-        configuration = kubernetes.client.Configuration.get_default_copy()
-        configuration.verify_ssl = False
-        api_client = kubernetes.client.ApiClient(configuration)
+        api_client = self.get_api_client()
         
-        # 根据客户端类型返回对应实例，使用禁用SSL验证的配置
+        # 根据客户端类型返回对应实例，共享同一个长连接ApiClient
         if client_type == 'core':
             return kubernetes.client.CoreV1Api(api_client)
         elif client_type == 'apps':
@@ -106,5 +232,5 @@ class K8sClient:
         return self._get_client('custom_objects')
     
     def get_config_file(self):
-        """获取kubeconfig文件路径"""
-        return self.config_file
+        """获取kubeconfig文件路径（kubeconfig已在内存中加载，不再生成临时文件）"""
+        return None
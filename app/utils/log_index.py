@@ -0,0 +1,232 @@
+import bisect
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+# 从日志details中解析集群名称，如 "cluster=cls-xxx, batch"
+CLUSTER_PATTERN = re.compile(r'cluster=([^,\s]+)')
+
+def parse_query_time(value, end_of_day=False):
+    """解析查询时间参数（ISO格式），只有日期时按当天开始或结束处理，带时区（如+08:00、Z）时转换为本地时间"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+    # 日志时间为本地时间且不带时区
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.isoformat()
+
+class AuditLogIndex:
+    """操作日志的内存二级索引
+    
+    只保存每条日志在分段文件中的位置和用于过滤的字段，按时间、用户、操作类型、集群建立索引，
+    查询时只读取命中的日志行。新追加的日志在每次查询前增量读取。
+    
+    位置按时间升序排列，时间范围用二分查找。日志通常按时间顺序写入，只需追加；出现时间早于已索引
+    日志的记录（如迁移的旧日志、系统时钟回拨）时按时间重新排序整个索引。
+    """
+    
+    def __init__(self, log_manager):
+        """
+        初始化日志索引
+        
+        Args:
+            log_manager: LogManager实例，提供分段文件位置
+        """
+        self.log_manager = log_manager
+        self._lock = threading.Lock()
+        self._offsets = {}  # seq -> 已索引的字节偏移
+        self._reset()
+    
+    @staticmethod
+    def _extract_cluster(entry):
+        """从日志中提取集群名称"""
+        match = CLUSTER_PATTERN.search(entry.get('details') or '')
+        if match:
+            return match.group(1)
+        resource = entry.get('resource') or ''
+        if resource.startswith('cluster/'):
+            return resource[len('cluster/'):]
+        return None
+    
+    @classmethod
+    def _record(cls, seq, offset, entry):
+        """从日志中提取索引字段：(时间, 分段序号, 行偏移, 用户名, 操作类型, 集群, 资源)"""
+        return (entry.get('timestamp') or '', seq, offset, entry.get('username'), entry.get('action'),
+                cls._extract_cluster(entry), entry.get('resource') or '')
+    
+    def _records(self):
+        """已索引的全部记录，按位置顺序"""
+        return [
+            (self._timestamps[i], seq, offset, self._usernames[i], self._actions[i], self._clusters[i], self._resources[i])
+            for i, (seq, offset) in enumerate(self._locations)
+        ]
+    
+    def _reset(self):
+        """清空位置数组和二级索引"""
+        # 按位置（日志时间升序）排列的并行数组
+        self._locations = []  # (seq, 行偏移)
+        self._timestamps = []
+        self._usernames = []
+        self._actions = []
+        self._clusters = []
+        self._resources = []
+        # 二级索引：字段值 -> 升序位置列表
+        self._by_username = {}
+        self._by_action = {}
+        self._by_cluster = {}
+    
+    def _add(self, record):
+        """在末尾索引单条日志"""
+        timestamp, seq, offset, username, action, cluster, resource = record
+        position = len(self._locations)
+        
+        self._locations.append((seq, offset))
+        self._timestamps.append(timestamp)
+        self._usernames.append(username)
+        self._actions.append(action)
+        self._clusters.append(cluster)
+        self._resources.append(resource)
+        
+        self._by_username.setdefault(username, []).append(position)
+        self._by_action.setdefault(action, []).append(position)
+        if cluster:
+            self._by_cluster.setdefault(cluster, []).append(position)
+    
+    def _extend(self, records):
+        """索引新读取的日志，保持位置按时间升序"""
+        previous = self._timestamps[-1] if self._timestamps else ''
+        for record in records:
+            if record[0] < previous:
+                break
+            previous = record[0]
+        else:
+            for record in records:
+                self._add(record)
+            return
+        
+        # 有乱序的记录，按时间稳定排序后重建（同一时间保持写入顺序）
+        print(f"Audit log index: out-of-order timestamps in {self.log_manager.log_dir}, re-sorting")
+        records = sorted(self._records() + records, key=lambda record: record[0])
+        self._reset()
+        for record in records:
+            self._add(record)
+    
+    def refresh(self):
+        """增量索引新写入的日志（已滚动的分段不会再变化）"""
+        with self._lock:
+            records = []
+            for seq, path in self.log_manager._list_segments():
+                offset = self._offsets.get(seq, 0)
+                if os.path.getsize(path) <= offset:
+                    continue
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    for line in f:
+                        # 只索引完整的行，未写完的行留到下次
+                        if not line.endswith(b'\n'):
+                            break
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            entry = None
+                        if entry:
+                            records.append(self._record(seq, offset, entry))
+                        offset += len(line)
+                self._offsets[seq] = offset
+            if records:
+                self._extend(records)
+    
+    def _read_entries(self, positions):
+        """按位置读取日志内容"""
+        entries = []
+        files = {}
+        try:
+            for position in positions:
+                seq, offset = self._locations[position]
+                if seq not in files:
+                    files[seq] = open(self.log_manager._segment_path(seq), 'rb')
+                f = files[seq]
+                f.seek(offset)
+                entries.append(json.loads(f.readline()))
+        finally:
+            for f in files.values():
+                f.close()
+        return entries
+    
+    def query(self, start=None, end=None, username=None, action=None, cluster=None,
+              resource_prefix=None, limit=100, cursor=None):
+        """
+        查询日志，按时间倒序返回
+        
+        Args:
+            start: 起始时间（ISO格式，包含）
+            end: 结束时间（ISO格式，包含）
+            username: 用户名
+            action: 操作类型
+            cluster: 集群名称
+            resource_prefix: 资源前缀，如 pod/default/
+            limit: 每页条数
+            cursor: 上一页返回的游标
+        
+        Returns:
+            tuple: (日志列表, 下一页游标，没有更多时为None)
+        """
+        self.refresh()
+        with self._lock:
+            # 位置范围 [low, high)
+            high = len(self._locations)
+            if cursor is not None:
+                high = min(high, int(cursor))
+            low = 0
+            if start:
+                low = bisect.bisect_left(self._timestamps, start, 0, high)
+            if end:
+                high = bisect.bisect_right(self._timestamps, end, low, high)
+            
+            # 选择命中最少的二级索引作为候选集
+            filters = []
+            if username is not None:
+                filters.append((self._by_username.get(username, []), self._usernames, username))
+            if action is not None:
+                filters.append((self._by_action.get(action, []), self._actions, action))
+            if cluster is not None:
+                filters.append((self._by_cluster.get(cluster, []), self._clusters, cluster))
+            
+            if filters:
+                filters.sort(key=lambda item: len(item[0]))
+                postings = filters[0][0]
+                candidates = reversed(postings[bisect.bisect_left(postings, low):bisect.bisect_left(postings, high)])
+                other_filters = filters[1:]
+            else:
+                candidates = range(high - 1, low - 1, -1)
+                other_filters = []
+            
+            matched = []
+            for position in candidates:
+                if any(values[position] != expected for _, values, expected in other_filters):
+                    continue
+                if resource_prefix and not self._resources[position].startswith(resource_prefix):
+                    continue
+                matched.append(position)
+                if len(matched) >= limit:
+                    break
+            
+            next_cursor = str(matched[-1]) if len(matched) >= limit else None
+            return self._read_entries(matched), next_cursor
+
+# 每个日志目录一个索引
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_log_index(log_manager):
+    """获取日志目录对应的进程级索引"""
+    key = os.path.abspath(log_manager.log_dir)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = AuditLogIndex(log_manager)
+        return _indexes[key]
@@ -1,53 +1,199 @@
 import json
 import os
+import threading
+import time
 from datetime import datetime
+from app.config.config import Config
+from app.utils.file_lock import FileLock
+from app.utils.log_index import get_log_index
 
 class LogManager:
-    """日志管理类"""
+    """日志管理类
     
-    def __init__(self, log_file=None):
+    操作日志以JSON Lines格式追加写入按大小滚动的分段文件（audit-000001.jsonl、audit-000002.jsonl……），
+    每次写入只追加新记录，不重写历史，历史记录全部保留。
+    """
+    
+    SEGMENT_PREFIX = 'audit-'
+    SEGMENT_SUFFIX = '.jsonl'
+    
+    def __init__(self, log_dir=None):
         """初始化日志管理器"""
-        self.log_file = log_file or os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            'config',
-            'logs.json'
-        )
-        self._init_log_file()
+        self.log_dir = log_dir or os.path.join(Config.CONFIG_DIR, 'logs')
+        # 旧版单文件日志，首次启动时迁移
+        self.legacy_log_file = os.path.join(os.path.dirname(self.log_dir), 'logs.json')
+        self.lock_file = os.path.join(self.log_dir, '.lock')
+        self._active_seq = None
+        self._last_fsync = 0.0
+        # interval策略下间隔内写入的分段，由定时器到期后刷盘
+        self._pending_fsync = set()
+        self._fsync_timer = None
+        self._fsync_lock = threading.Lock()
+        self._init_log_dir()
     
-    def _init_log_file(self):
-        """初始化日志文件"""
-        if not os.path.exists(self.log_file):
-            with open(self.log_file, 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
+    def _init_log_dir(self):
+        """初始化日志目录，并迁移旧版logs.json"""
+        os.makedirs(self.log_dir, exist_ok=True)
+        with self._locked():
+            if self._list_segments() or not os.path.exists(self.legacy_log_file):
+                return
+            try:
+                with open(self.legacy_log_file, 'r', encoding='utf-8') as f:
+                    legacy_logs = json.load(f)
+            except Exception as e:
+                print(f"Failed to migrate legacy log file {self.legacy_log_file}: {e}")
+                return
+            self._append_lines([self._encode(entry) for entry in legacy_logs])
+            os.replace(self.legacy_log_file, self.legacy_log_file + '.migrated')
     
-    def _read_logs(self):
-        """读取所有日志"""
-        with open(self.log_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    def _locked(self):
+        """获取进程内锁和跨进程文件锁"""
+        return FileLock(self.lock_file)
+    
+    def _segment_path(self, seq):
+        """分段文件路径"""
+        return os.path.join(self.log_dir, f'{self.SEGMENT_PREFIX}{seq:06d}{self.SEGMENT_SUFFIX}')
+    
+    def _list_segments(self):
+        """按序号升序列出所有分段 [(seq, path)]"""
+        segments = []
+        for filename in os.listdir(self.log_dir):
+            if filename.startswith(self.SEGMENT_PREFIX) and filename.endswith(self.SEGMENT_SUFFIX):
+                try:
+                    seq = int(filename[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)])
+                except ValueError:
+                    continue
+                segments.append((seq, os.path.join(self.log_dir, filename)))
+        return sorted(segments)
+    
+    def _current_segment(self):
+        """获取当前写入分段的序号，超过大小上限时滚动到新分段（需持有锁）"""
+        if self._active_seq is None:
+            segments = self._list_segments()
+            self._active_seq = segments[-1][0] if segments else 1
+        # 其他进程可能已经滚动到新分段
+        while os.path.exists(self._segment_path(self._active_seq + 1)):
+            self._active_seq += 1
+        
+        path = self._segment_path(self._active_seq)
+        if os.path.exists(path) and os.path.getsize(path) >= Config.AUDIT_LOG_SEGMENT_BYTES:
+            self._active_seq += 1
+        return self._active_seq
+    
+    @staticmethod
+    def _encode(entry):
+        """序列化单条日志"""
+        return json.dumps(entry, ensure_ascii=False) + '\n'
+    
+    def _append_lines(self, lines):
+        """以O_APPEND方式一次性追加写入（需持有锁）"""
+        if not lines:
+            return
+        data = ''.join(lines).encode('utf-8')
+        path = self._segment_path(self._current_segment())
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            self._maybe_fsync(fd, path)
+        finally:
+            os.close(fd)
+    
+    def _maybe_fsync(self, fd, path):
+        """
+        按配置的策略刷盘：always每次刷盘，interval按时间间隔刷盘，never交给操作系统
+        
+        interval策略下距上次刷盘不足间隔的写入不立即刷盘，而是由定时器在间隔到期时刷盘，
+        之后没有新的写入也最多丢失AUDIT_LOG_FSYNC_INTERVAL秒内的日志。
+        """
+        policy = Config.AUDIT_LOG_FSYNC
+        if policy == 'always':
+            os.fsync(fd)
+        elif policy == 'interval':
+            now = time.monotonic()
+            elapsed = now - self._last_fsync
+            if elapsed >= Config.AUDIT_LOG_FSYNC_INTERVAL:
+                os.fsync(fd)
+                self._last_fsync = now
+            else:
+                self._schedule_fsync(path, Config.AUDIT_LOG_FSYNC_INTERVAL - elapsed)
+    
+    def _schedule_fsync(self, path, delay):
+        """登记待刷盘的分段，没有等待中的定时器时启动一个"""
+        with self._fsync_lock:
+            self._pending_fsync.add(path)
+            if self._fsync_timer is not None:
+                return
+            self._fsync_timer = threading.Timer(delay, self._flush_pending)
+            self._fsync_timer.daemon = True
+            self._fsync_timer.start()
     
-    def _write_logs(self, logs):
-        """写入日志"""
-        with open(self.log_file, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, ensure_ascii=False, indent=2)
+    def _flush_pending(self):
+        """定时器到期：刷盘间隔内写入过的分段"""
+        with self._fsync_lock:
+            paths = self._pending_fsync
+            self._pending_fsync = set()
+            self._fsync_timer = None
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                print(f"Failed to fsync audit log {path}: {e}")
+        self._last_fsync = time.monotonic()
+    
+    def _read_segment(self, path):
+        """读取单个分段的全部日志"""
+        logs = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    logs.append(json.loads(line))
+                except ValueError:
+                    # 跳过异常中断时写入的不完整行
+                    continue
+        return logs
+    
+    def _read_logs(self):
+        """按时间顺序读取所有日志"""
+        logs = []
+        for _, path in self._list_segments():
+            logs.extend(self._read_segment(path))
+        return logs
     
     def add_log(self, username, action, resource=None, details=None):
         """添加日志记录"""
-        logs = self._read_logs()
-        
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
+        self.add_logs([{
             'username': username,
             'action': action,
             'resource': resource,
             'details': details
-        }
-        
-        logs.append(log_entry)
-        # 只保留最近1000条日志
-        if len(logs) > 1000:
-            logs = logs[-1000:]
+        }])
+    
+    def add_logs(self, entries):
+        """批量添加日志记录，一次追加写入"""
+        if not entries:
+            return
         
-        self._write_logs(logs)
+        with self._locked():
+            # 持有跨进程锁时取时间，保证日志文件中的时间按写入顺序递增（查询索引按时间二分查找）
+            timestamp = datetime.now().isoformat()
+            lines = [
+                self._encode({
+                    'timestamp': timestamp,
+                    'username': entry['username'],
+                    'action': entry['action'],
+                    'resource': entry.get('resource'),
+                    'details': entry.get('details')
+                })
+                for entry in entries
+            ]
+            self._append_lines(lines)
     
     def add_login_log(self, username, success, details=None):
         """添加登录日志"""
@@ -63,13 +209,32 @@ class LogManager:
         self.add_log(username, action, resource, details)
     
     def get_logs(self, limit=None, action=None):
-        """获取日志记录"""
-        logs = self._read_logs()
-        
-        if action:
-            logs = [log for log in logs if log['action'] == action]
+        """获取日志记录（按时间顺序），指定limit时从最新分段向前读取，只返回最近limit条"""
+        if not limit:
+            logs = self._read_logs()
+            if action:
+                logs = [log for log in logs if log['action'] == action]
+            return logs
         
-        if limit:
-            logs = logs[-limit:]
+        logs = []
+        for _, path in reversed(self._list_segments()):
+            segment_logs = self._read_segment(path)
+            if action:
+                segment_logs = [log for log in segment_logs if log['action'] == action]
+            logs = segment_logs + logs
+            if len(logs) >= limit:
+                break
+        return logs[-limit:]
+    
+    def query_logs(self, start=None, end=None, username=None, action=None, cluster=None,
+                   resource_prefix=None, limit=100, cursor=None):
+        """
+        通过索引查询日志，按时间倒序分页返回
         
-        return logs
+        Returns:
+            tuple: (日志列表, 下一页游标，没有更多时为None)
+        """
+        return get_log_index(self).query(
+            start=start, end=end, username=username, action=action, cluster=cluster,
+            resource_prefix=resource_prefix, limit=limit, cursor=cursor
+        )
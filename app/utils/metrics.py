@@ -0,0 +1,133 @@
+import os
+import time
+from flask import Response, request, g
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client import multiprocess
+from app.config.config import Config
+
+# 延迟分桶（秒）：覆盖本地缓存命中（毫秒级）到大集群list（数十秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'k8s_manager_http_request_duration_seconds',
+    'HTTP请求处理耗时',
+    ['method', 'endpoint', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'k8s_manager_http_requests_in_progress',
+    '正在处理的HTTP请求数',
+    ['method', 'endpoint'],
+    multiprocess_mode='livesum'
+)
+APISERVER_REQUEST_DURATION = Histogram(
+    'k8s_manager_apiserver_request_duration_seconds',
+    'apiserver请求耗时（watch和流式请求为收到响应头的时间）',
+    ['cluster', 'verb', 'resource'],
+    buckets=LATENCY_BUCKETS
+)
+APISERVER_REQUEST_ERRORS = Counter(
+    'k8s_manager_apiserver_request_errors_total',
+    'apiserver请求失败次数，code为HTTP状态码或异常类型',
+    ['cluster', 'verb', 'resource', 'code']
+)
+APISERVER_REQUESTS_IN_FLIGHT = Gauge(
+    'k8s_manager_apiserver_requests_in_flight',
+    '正在进行的apiserver请求数',
+    ['cluster'],
+    multiprocess_mode='livesum'
+)
+CACHE_REQUESTS = Counter(
+    'k8s_manager_cache_requests_total',
+    '缓存访问次数，命中率 = hit / (hit + miss)',
+    ['cache', 'result']
+)
+
+# HTTP方法 -> Kubernetes API动词（GET按是否指定名称和watch参数细分）
+HTTP_METHOD_VERBS = {
+    'POST': 'create',
+    'PUT': 'update',
+    'PATCH': 'patch',
+    'DELETE': 'delete',
+}
+
+def api_verb_and_resource(resource_path, method, path_params=None, query_params=None):
+    """
+    根据请求路径模板推断Kubernetes API动词和资源类型
+    
+    kubernetes客户端调用call_api时传入的是路径模板（如 /api/v1/namespaces/{namespace}/pods/{name}），
+    资源类型取最后一个非参数段，标签取值有限，不会因资源名称产生大量时间序列。
+    
+    Returns:
+        tuple: (verb, resource)
+    """
+    path_params = path_params or {}
+    segments = [segment for segment in resource_path.strip('/').split('/') if segment]
+    resource = 'unknown'
+    named = False
+    for segment in reversed(segments):
+        if segment.startswith('{') and segment.endswith('}'):
+            param = segment[1:-1]
+            # 自定义资源的路径中资源类型本身是参数，加上API组区分同名资源（如metrics.k8s.io的nodes）
+            if param == 'plural' and path_params.get(param):
+                resource = path_params[param]
+                if path_params.get('group'):
+                    resource = f"{resource}.{path_params['group']}"
+                break
+            named = named or param == 'name'
+            continue
+        resource = segment
+        break
+    
+    if method != 'GET':
+        return HTTP_METHOD_VERBS.get(method, method.lower()), resource
+    watch = any(key == 'watch' and value for key, value in query_params or ())
+    if watch:
+        return 'watch', resource
+    return ('get' if named else 'list'), resource
+
+def record_cache(cache_name, hit):
+    """记录一次缓存访问"""
+    CACHE_REQUESTS.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+def _request_endpoint():
+    """请求对应的路由模板，未匹配路由时为unmatched"""
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+def _before_request():
+    """记录请求开始时间，正在处理的请求数加一"""
+    g._metrics_start = time.perf_counter()
+    g._metrics_in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(request.method, _request_endpoint())
+    g._metrics_in_progress.inc()
+
+def _after_request(response):
+    """按路由模板、方法和状态码记录请求耗时"""
+    start = g.pop('_metrics_start', None)
+    if start is not None:
+        HTTP_REQUEST_DURATION.labels(request.method, _request_endpoint(), str(response.status_code)).observe(time.perf_counter() - start)
+    return response
+
+def _teardown_request(error=None):
+    """请求结束，正在处理的请求数减一（流式响应在输出结束后才执行，期间计为正在处理）"""
+    gauge = g.pop('_metrics_in_progress', None)
+    if gauge is not None:
+        gauge.dec()
+
+def metrics_view():
+    """Prometheus文本格式的指标"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # 多worker部署时汇总所有worker写入的指标文件
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+def init_app(app):
+    """注册请求计时钩子和/metrics端点"""
+    if not Config.METRICS_ENABLED:
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule(Config.METRICS_PATH, 'metrics', metrics_view)
@@ -0,0 +1,85 @@
+import threading
+import time
+from app.config.config import Config
+from app.utils.metrics import record_cache
+
+def get_node_role(node):
+    """获取节点角色"""
+    role = "worker"
+    if node.metadata.labels and "node-role.kubernetes.io/control-plane" in node.metadata.labels:
+        role = "control-plane"
+    elif node.metadata.labels and "node-role.kubernetes.io/master" in node.metadata.labels:
+        role = "master"
+    return role
+
+def get_node_status(node):
+    """获取节点Ready状态"""
+    status = "NotReady"
+    for condition in node.status.conditions or []:
+        if condition.type == "Ready":
+            status = condition.status
+            break
+    return status
+
+def get_node_internal_ip(node):
+    """获取节点InternalIP"""
+    internal_ip = ""
+    for addr in node.status.addresses or []:
+        if addr.type == "InternalIP":
+            internal_ip = addr.address
+            break
+    return internal_ip
+
+class NodeIndex:
+    """集群节点索引，缓存节点名称到InternalIP、角色和Ready状态的映射"""
+    
+    def __init__(self, ttl=None):
+        """
+        初始化节点索引
+        
+        Args:
+            ttl: 索引有效期（秒）
+        """
+        self.ttl = Config.NODE_INDEX_TTL if ttl is None else ttl
+        self._indexes = {}  # cluster_name -> (更新时间, {node_name: node_info})
+        self._lock = threading.Lock()
+    
+    def update(self, cluster_name, nodes):
+        """使用list_node的结果刷新集群节点索引"""
+        index = {}
+        for node in nodes:
+            index[node.metadata.name] = {
+                'internal_ip': get_node_internal_ip(node),
+                'role': get_node_role(node),
+                'ready': get_node_status(node) == "True"
+            }
+        with self._lock:
+            self._indexes[cluster_name] = (time.monotonic(), index)
+        return index
+    
+    def refresh(self, cluster_name, core_v1):
+        """通过一次list_node调用重建集群节点索引"""
+        return self.update(cluster_name, core_v1.list_node().items)
+    
+    def peek(self, cluster_name):
+        """获取未过期的集群节点索引，不存在或已过期时返回None"""
+        with self._lock:
+            entry = self._indexes.get(cluster_name)
+        hit = bool(entry) and time.monotonic() - entry[0] < self.ttl
+        record_cache('node_index', hit)
+        return entry[1] if hit else None
+    
+    def get(self, cluster_name, core_v1, force_refresh=False):
+        """获取集群节点索引，过期或强制刷新时重新拉取"""
+        index = None if force_refresh else self.peek(cluster_name)
+        if index is None:
+            index = self.refresh(cluster_name, core_v1)
+        return index
+    
+    def invalidate(self, cluster_name):
+        """移除指定集群的节点索引"""
+        with self._lock:
+            self._indexes.pop(cluster_name, None)
+
+# 进程级节点索引
+node_index = NodeIndex()
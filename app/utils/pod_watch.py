@@ -0,0 +1,358 @@
+import queue
+import threading
+import time
+from kubernetes.client.rest import ApiException
+from kubernetes.watch import Watch
+from app.config.config import Config
+from app.utils.informer import HTTP_STATUS_GONE, parse_equality_selector
+
+class StreamLimitExceeded(Exception):
+    """推送连接数已达上限"""
+    pass
+
+class WatchStopped(Exception):
+    """共享watch被管理器停止（如集群配置已更新或删除），推送连接需要重新建立"""
+    pass
+
+class PodWatch:
+    """
+    单个(集群, 命名空间)共享的Pod watch
+    
+    后台线程list一次后持续watch，维护格式化后的Pod内容，只把展示内容有变化的Pod分发给所有订阅的推送连接；
+    同一命名空间的多个推送连接（包括按工作负载过滤的连接）只占用一个watch。
+    """
+    
+    def __init__(self, cluster_name, namespace, core_v1, make_formatter, on_stop=None):
+        """
+        初始化共享watch
+        
+        Args:
+            cluster_name: 集群名称
+            namespace: 命名空间
+            core_v1: 集群的CoreV1Api
+            make_formatter: 返回Pod格式化函数（pod -> dict）的工厂，每轮watch重新调用一次以刷新节点索引
+            on_stop: watch退出时的回调
+        """
+        self.cluster_name = cluster_name
+        self.namespace = namespace
+        self.core_v1 = core_v1
+        self.make_formatter = make_formatter
+        self.on_stop = on_stop
+        
+        self._pods = {}  # Pod名称 -> 格式化后的内容
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self.resource_version = None
+        self.error = None
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f'pod-watch-{cluster_name}-{namespace}',
+            daemon=True
+        )
+    
+    def start(self):
+        """启动后台list+watch线程"""
+        self._thread.start()
+    
+    def stop(self):
+        """停止watch，当前一轮watch最迟在POD_STREAM_HEARTBEAT秒后结束"""
+        self._stop.set()
+    
+    def abort(self, reason):
+        """停止watch并通知所有订阅者结束推送，客户端重连时建立新的watch"""
+        self._stop.set()
+        with self._lock:
+            self.error = WatchStopped(reason)
+            self._publish(('error', {'message': f"WatchStopped: {reason}"}))
+        self._ready.set()
+    
+    @property
+    def stopped(self):
+        """watch是否已停止"""
+        return self._stop.is_set()
+    
+    def wait_ready(self, timeout):
+        """
+        等待首次list完成
+        
+        Raises:
+            首次list失败时抛出对应的异常
+        """
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"Pod list of {self.cluster_name}/{self.namespace} timed out")
+        if self.error is not None and self.resource_version is None:
+            raise self.error
+    
+    def _publish(self, event):
+        """把事件放入所有订阅者的队列，需在持有self._lock时调用"""
+        for subscription in self._subscribers:
+            subscription.put(event)
+    
+    def _relist(self):
+        """全量list，重建Pod内容并通知订阅者重新推送快照"""
+        format_pod = self.make_formatter()
+        result = self.core_v1.list_namespaced_pod(self.namespace)
+        pods = {}
+        for pod in result.items:
+            item = format_pod(pod)
+            pods[item['name']] = item
+        with self._lock:
+            self._pods = pods
+            self.resource_version = result.metadata.resource_version
+            self._publish(('snapshot', None))
+        self._ready.set()
+    
+    def _watch(self):
+        """从当前resourceVersion开始watch一轮，直到服务端在POD_STREAM_HEARTBEAT秒后结束"""
+        format_pod = self.make_formatter()
+        watch = Watch()
+        for event in watch.stream(
+            self.core_v1.list_namespaced_pod,
+            self.namespace,
+            resource_version=self.resource_version,
+            allow_watch_bookmarks=True,
+            timeout_seconds=Config.POD_STREAM_HEARTBEAT,
+            _request_timeout=Config.POD_STREAM_HEARTBEAT + 10
+        ):
+            if self._stop.is_set():
+                watch.stop()
+                break
+            self.resource_version = watch.resource_version or self.resource_version
+            if event['type'] not in ('ADDED', 'MODIFIED', 'DELETED'):
+                continue
+            
+            pod = format_pod(event['object'])
+            with self._lock:
+                if event['type'] == 'DELETED':
+                    if self._pods.pop(pod['name'], None) is not None:
+                        self._publish(('deleted', pod))
+                    continue
+                
+                # 只分发展示内容有变化的Pod（如load标签、状态、Ready变化）
+                previous = self._pods.get(pod['name'])
+                if previous == pod:
+                    continue
+                self._pods[pod['name']] = pod
+                self._publish(('added' if previous is None else 'modified', pod))
+    
+    def _run(self):
+        """后台线程：首次list，之后循环watch，410 Gone时重新list，其他错误通知订阅者后退出"""
+        need_relist = True
+        try:
+            while not self._stop.is_set():
+                try:
+                    if need_relist:
+                        self._relist()
+                        need_relist = False
+                    self._watch()
+                except ApiException as e:
+                    if e.status != HTTP_STATUS_GONE:
+                        raise
+                    # resourceVersion过期，重新list并推送快照
+                    need_relist = True
+        except Exception as e:
+            print(f"Pod watch {self.cluster_name}/{self.namespace} failed: {type(e).__name__}: {str(e)}")
+            with self._lock:
+                self.error = e
+                self._publish(('error', {'message': f"{type(e).__name__}: {str(e)}"}))
+        finally:
+            self._stop.set()
+            self._ready.set()
+            if self.on_stop:
+                self.on_stop(self)
+    
+    def subscribe(self, subscription):
+        """添加订阅者"""
+        with self._lock:
+            self._subscribers.add(subscription)
+    
+    def unsubscribe(self, subscription):
+        """移除订阅者，返回是否已没有订阅者"""
+        with self._lock:
+            self._subscribers.discard(subscription)
+            return not self._subscribers
+    
+    def resync(self, subscription):
+        """清空订阅者积压的事件并返回当前Pod内容的快照"""
+        with self._lock:
+            subscription.clear()
+            if self.error is not None:
+                # watch已出错退出，保留错误事件，订阅者推送快照后结束
+                subscription.put(('error', {'message': f"{type(self.error).__name__}: {str(self.error)}"}))
+            return list(self._pods.values())
+
+class PodSubscription:
+    """单个推送连接对共享Pod watch的订阅，按标签选择器过滤并生成推送事件"""
+    
+    def __init__(self, manager, watch, label_selector=None):
+        """
+        初始化订阅
+        
+        Args:
+            manager: 所属的PodWatchManager，关闭时归还连接数
+            watch: 共享的PodWatch
+            label_selector: 等值标签选择器（如工作负载的matchLabels），为空时推送命名空间下所有Pod
+        """
+        self.manager = manager
+        self.watch = watch
+        self.match_labels = parse_equality_selector(label_selector) or {}
+        self.queue = queue.Queue(maxsize=Config.POD_STREAM_QUEUE_SIZE)
+        self.overflow = False
+        self.closed = False
+    
+    def put(self, event):
+        """由共享watch调用；队列已满（客户端读取过慢）时丢弃积压事件，下次读取时重新推送快照"""
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflow = True
+    
+    def clear(self):
+        """清空积压的事件"""
+        self.overflow = False
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+    
+    def _matches(self, pod):
+        """Pod是否符合订阅的标签选择器"""
+        labels = pod.get('labels') or {}
+        return all(labels.get(k) == v for k, v in self.match_labels.items())
+    
+    def _snapshot(self, pods):
+        """过滤快照中的Pod，按名称排序"""
+        return sorted((pod for pod in pods if self._matches(pod)), key=lambda pod: pod['name'])
+    
+    def events(self, snapshot):
+        """
+        生成推送事件，直到连接超过POD_STREAM_MAX_DURATION或共享watch出错
+        
+        Yields:
+            tuple: (事件类型, 数据)，与K8sService.stream_pods相同
+        """
+        deadline = time.monotonic() + Config.POD_STREAM_MAX_DURATION
+        pods = self._snapshot(snapshot)
+        known = {pod['name'] for pod in pods}
+        yield 'snapshot', pods
+        
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if self.overflow:
+                event_type, data = 'snapshot', None
+            else:
+                try:
+                    event_type, data = self.queue.get(timeout=min(Config.POD_STREAM_HEARTBEAT, remaining))
+                except queue.Empty:
+                    yield 'heartbeat', None
+                    continue
+            
+            if event_type == 'error':
+                yield 'error', data
+                return
+            if event_type == 'snapshot':
+                pods = self._snapshot(self.watch.resync(self))
+                known = {pod['name'] for pod in pods}
+                yield 'snapshot', pods
+                continue
+            
+            name = data['name']
+            if event_type == 'deleted' or not self._matches(data):
+                # 删除或标签不再匹配（如工作负载的Pod被改标签）时从客户端列表中移除
+                if name in known:
+                    known.discard(name)
+                    yield 'deleted', data
+                continue
+            yield ('modified' if name in known else 'added'), data
+            known.add(name)
+    
+    def close(self):
+        """取消订阅并归还连接数"""
+        if self.closed:
+            return
+        self.closed = True
+        self.manager.unsubscribe(self)
+
+class PodWatchManager:
+    """进程级Pod推送管理器：每个(集群, 命名空间)共享一个watch，并限制同时推送的连接数"""
+    
+    def __init__(self):
+        """初始化管理器"""
+        self._watches = {}  # (cluster_name, namespace) -> PodWatch
+        self._clients = 0
+        self._lock = threading.Lock()
+    
+    def _remove(self, watch):
+        """watch退出时从管理器中移除"""
+        with self._lock:
+            key = (watch.cluster_name, watch.namespace)
+            if self._watches.get(key) is watch:
+                del self._watches[key]
+    
+    def subscribe(self, cluster_name, namespace, core_v1, make_formatter, label_selector=None):
+        """
+        订阅(集群, 命名空间)的Pod变化
+        
+        Returns:
+            tuple: (PodSubscription, 当前Pod内容的快照)
+        
+        Raises:
+            StreamLimitExceeded: 推送连接数已达POD_STREAM_MAX_CLIENTS
+        """
+        key = (cluster_name, namespace)
+        with self._lock:
+            if self._clients >= Config.POD_STREAM_MAX_CLIENTS:
+                raise StreamLimitExceeded(f"推送连接数已达上限（{Config.POD_STREAM_MAX_CLIENTS}），请稍后重试")
+            self._clients += 1
+            watch = self._watches.get(key)
+            created = watch is None or watch.stopped
+            if created:
+                watch = PodWatch(cluster_name, namespace, core_v1, make_formatter, on_stop=self._remove)
+                self._watches[key] = watch
+            subscription = PodSubscription(self, watch, label_selector)
+            watch.subscribe(subscription)
+        
+        if created:
+            watch.start()
+        try:
+            watch.wait_ready(Config.K8S_READ_TIMEOUT + Config.K8S_CONNECT_TIMEOUT)
+        except Exception:
+            subscription.close()
+            raise
+        # 首次list可能在订阅之后才完成，快照取就绪后的内容，之前积压的事件已包含在快照中
+        return subscription, watch.resync(subscription)
+    
+    def unsubscribe(self, subscription):
+        """取消订阅，共享watch没有订阅者时停止"""
+        watch = subscription.watch
+        with self._lock:
+            self._clients -= 1
+            if watch.unsubscribe(subscription):
+                watch.stop()
+                if self._watches.get((watch.cluster_name, watch.namespace)) is watch:
+                    del self._watches[(watch.cluster_name, watch.namespace)]
+    
+    def stop_cluster(self, cluster_name):
+        """停止指定集群的所有共享watch，已连接的推送收到error事件后结束（集群kubeconfig更新或集群删除时调用）"""
+        with self._lock:
+            watches = [watch for (c, _), watch in self._watches.items() if c == cluster_name]
+            for watch in watches:
+                del self._watches[(watch.cluster_name, watch.namespace)]
+        for watch in watches:
+            watch.abort('集群配置已变更，请重新连接')
+    
+    def stop_all(self):
+        """停止所有共享watch"""
+        with self._lock:
+            watches = list(self._watches.values())
+            self._watches.clear()
+        for watch in watches:
+            watch.stop()
+
+# 进程级Pod推送管理器
+pod_watch_manager = PodWatchManager()
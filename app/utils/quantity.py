@@ -0,0 +1,114 @@
+from functools import lru_cache
+
+# Kubernetes资源数量后缀：二进制（Ki、Mi……）和十进制（n、u、m、k、M……）
+BINARY_SUFFIXES = {
+    'Ki': 2 ** 10,
+    'Mi': 2 ** 20,
+    'Gi': 2 ** 30,
+    'Ti': 2 ** 40,
+    'Pi': 2 ** 50,
+    'Ei': 2 ** 60,
+}
+DECIMAL_SUFFIXES = {
+    'n': 1e-9,
+    'u': 1e-6,
+    'm': 1e-3,
+    'k': 1e3,
+    'M': 1e6,
+    'G': 1e9,
+    'T': 1e12,
+    'P': 1e15,
+    'E': 1e18,
+}
+
+GIB = 2 ** 30
+
+@lru_cache(maxsize=8192)
+def _parse_quantity_str(quantity):
+    """解析字符串形式的数量，结果按字符串缓存（集群中的requests/limits取值高度重复）"""
+    quantity = quantity.strip()
+    # 纯数字和科学计数法（如 100、0.5、1e3）
+    try:
+        return float(quantity)
+    except ValueError:
+        pass
+    
+    suffix = quantity[-2:]
+    if suffix in BINARY_SUFFIXES:
+        return float(quantity[:-2]) * BINARY_SUFFIXES[suffix]
+    suffix = quantity[-1:]
+    if suffix in DECIMAL_SUFFIXES:
+        return float(quantity[:-1]) * DECIMAL_SUFFIXES[suffix]
+    raise ValueError(f'Invalid quantity: {quantity}')
+
+def parse_quantity(quantity):
+    """
+    解析Kubernetes资源数量
+    
+    Args:
+        quantity: 数量字符串（如 500m、2、1.5Gi、128974848），也接受int/float，None视为0
+    
+    Returns:
+        float: CPU为核数，内存为字节数
+    
+    Raises:
+        ValueError: 格式不合法
+    """
+    if quantity is None:
+        return 0.0
+    if isinstance(quantity, (int, float)):
+        return float(quantity)
+    return _parse_quantity_str(str(quantity))
+
+def parse_quantity_or_zero(quantity):
+    """解析资源数量，格式不合法时返回0"""
+    try:
+        return parse_quantity(quantity)
+    except ValueError:
+        return 0.0
+
+def pod_resources(pod_spec):
+    """
+    计算Pod的有效资源requests和limits（与调度器一致）
+    
+    有效值 = max(所有业务容器之和, 任一init容器) + Pod overhead
+    
+    Args:
+        pod_spec: Pod spec字典（apiserver原始JSON）
+    
+    Returns:
+        tuple: (CPU requests核数, CPU limits核数, 内存requests字节, 内存limits字节, 未设置limits的容器数)
+    """
+    cpu_req = cpu_lim = mem_req = mem_lim = 0.0
+    missing_limits = 0
+    for container in pod_spec.get('containers') or ():
+        resources = container.get('resources') or {}
+        requests = resources.get('requests') or {}
+        limits = resources.get('limits') or {}
+        cpu_req += parse_quantity_or_zero(requests.get('cpu'))
+        mem_req += parse_quantity_or_zero(requests.get('memory'))
+        cpu_lim += parse_quantity_or_zero(limits.get('cpu'))
+        mem_lim += parse_quantity_or_zero(limits.get('memory'))
+        if 'cpu' not in limits or 'memory' not in limits:
+            missing_limits += 1
+    
+    # init容器顺序执行，只取单个init容器的最大值
+    for container in pod_spec.get('initContainers') or ():
+        resources = container.get('resources') or {}
+        requests = resources.get('requests') or {}
+        limits = resources.get('limits') or {}
+        cpu_req = max(cpu_req, parse_quantity_or_zero(requests.get('cpu')))
+        mem_req = max(mem_req, parse_quantity_or_zero(requests.get('memory')))
+        cpu_lim = max(cpu_lim, parse_quantity_or_zero(limits.get('cpu')))
+        mem_lim = max(mem_lim, parse_quantity_or_zero(limits.get('memory')))
+    
+    overhead = pod_spec.get('overhead') or {}
+    if overhead:
+        cpu_overhead = parse_quantity_or_zero(overhead.get('cpu'))
+        mem_overhead = parse_quantity_or_zero(overhead.get('memory'))
+        cpu_req += cpu_overhead
+        mem_req += mem_overhead
+        cpu_lim += cpu_overhead
+        mem_lim += mem_overhead
+    
+    return cpu_req, cpu_lim, mem_req, mem_lim, missing_limits
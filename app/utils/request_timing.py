@@ -0,0 +1,139 @@
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from app.config.config import Config
+
+# 当前请求的计时记录；共享线程池中的任务通过with_request_context继承
+_current = contextvars.ContextVar('request_timing', default=None)
+
+class RequestTiming:
+    """单个请求内的计时记录：apiserver调用和服务层各阶段"""
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.entries = []  # (名称, 耗时秒, 说明)
+        self._lock = threading.Lock()
+    
+    def add(self, name, duration, desc=None):
+        """记录一项耗时，可能在多个线程中并发调用"""
+        with self._lock:
+            self.entries.append((name, duration, desc))
+    
+    def summary(self):
+        """按名称合并耗时，保持首次出现的顺序"""
+        grouped = {}
+        with self._lock:
+            entries = list(self.entries)
+        for name, duration, desc in entries:
+            item = grouped.setdefault(name, {'duration': 0.0, 'count': 0, 'desc': set()})
+            item['duration'] += duration
+            item['count'] += 1
+            if desc:
+                item['desc'].add(desc)
+        return grouped
+    
+    def server_timing(self):
+        """
+        生成Server-Timing响应头
+        
+        同名的多次调用合并为一项（如逐个Pod的请求），desc中注明次数，避免响应头过长。
+        最后一项total为请求开始到生成响应头的总耗时。
+        """
+        metrics = []
+        for name, item in self.summary().items():
+            desc = ','.join(sorted(item['desc']))
+            if item['count'] > 1:
+                desc = f"{desc} x{item['count']}" if desc else f"x{item['count']}"
+            metric = f"{name};dur={item['duration'] * 1000:.1f}"
+            if desc:
+                metric += ';desc="' + desc.replace('\\', '').replace('"', '') + '"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ', '.join(metrics)
+    
+    def detail(self):
+        """未合并的计时明细，按记录顺序，耗时单位为毫秒"""
+        with self._lock:
+            entries = list(self.entries)
+        return {
+            'total_ms': round((time.perf_counter() - self.start) * 1000, 1),
+            'entries': [
+                {'name': name, 'duration_ms': round(duration * 1000, 1), 'desc': desc}
+                for name, duration, desc in entries
+            ]
+        }
+
+def record(name, duration, desc=None):
+    """记录一项耗时，不在请求中时忽略"""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(name, duration, desc)
+
+@contextmanager
+def phase(name, desc=None):
+    """记录服务层一个阶段的耗时"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - start, desc)
+
+def with_request_context(func):
+    """包装提交到线程池的任务，使其中的apiserver调用计入当前请求（每个任务使用独立的上下文副本）"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """记录jsonify序列化耗时的JSON provider"""
+    
+    def dumps(self, obj, **kwargs):
+        with phase('json'):
+            return super().dumps(obj, **kwargs)
+
+def _debug_requested():
+    """请求是否要求在响应体中返回计时明细"""
+    return request.args.get('debug_timing', '').lower() in ('1', 'true', 'yes')
+
+def _before_request():
+    """为请求创建计时记录"""
+    _current.set(RequestTiming())
+
+def _after_request(response):
+    """添加Server-Timing响应头，debug_timing=1时在JSON响应中附加计时明细"""
+    timing = _current.get()
+    if timing is None:
+        return response
+    
+    if _debug_requested() and response.status_code == 200 and response.is_json and not response.is_streamed:
+        body = response.get_json()
+        # 列表响应包装为对象，只在显式请求调试信息时改变响应结构
+        if not isinstance(body, dict):
+            body = {'items': body}
+        body['_timing'] = timing.detail()
+        response.set_data(json.dumps(body, ensure_ascii=False))
+        # 响应体已改变，之前按内容生成的ETag不再有效
+        response.headers.pop('ETag', None)
+    
+    response.headers['Server-Timing'] = timing.server_timing()
+    return response
+
+def _teardown_request(error=None):
+    """请求结束，清除计时记录"""
+    _current.set(None)
+
+def init_app(app):
+    """注册请求计时钩子和计时JSON provider"""
+    if not Config.SERVER_TIMING_ENABLED:
+        return
+    app.json = TimedJSONProvider(app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
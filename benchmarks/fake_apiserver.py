@@ -0,0 +1,505 @@
+"""
+本地模拟的Kubernetes apiserver，供基准测试使用
+
+按参数生成命名空间、节点、Deployment、Pod、Service、Secret、ConfigMap以及metrics.k8s.io采样数据，
+支持list（labelSelector、fieldSelector、limit/continue分页、Table格式）、get、patch和watch（无事件，
+到期结束）。对象的JSON在生成时序列化一次，list时直接拼接，模拟端的开销不会计入被测服务的耗时。
+"""
+import base64
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+CREATION_TIMESTAMP = '2025-01-01T00:00:00Z'
+
+# (API组, 资源) -> 存储键；metrics.k8s.io的nodes、pods与核心资源同名，单独存放
+RESOURCE_KEYS = {
+    ('', 'namespaces'): 'namespaces',
+    ('', 'nodes'): 'nodes',
+    ('', 'pods'): 'pods',
+    ('', 'services'): 'services',
+    ('', 'secrets'): 'secrets',
+    ('', 'configmaps'): 'configmaps',
+    ('', 'persistentvolumeclaims'): 'persistentvolumeclaims',
+    ('', 'persistentvolumes'): 'persistentvolumes',
+    ('apps', 'deployments'): 'deployments',
+    ('apps', 'statefulsets'): 'statefulsets',
+    ('apps', 'daemonsets'): 'daemonsets',
+    ('networking.k8s.io', 'ingresses'): 'ingresses',
+    ('storage.k8s.io', 'storageclasses'): 'storageclasses',
+    ('metrics.k8s.io', 'nodes'): 'nodes.metrics.k8s.io',
+    ('metrics.k8s.io', 'pods'): 'pods.metrics.k8s.io',
+}
+
+# 支持Table格式列出的资源（ConfigMap、Secret摘要）
+TABLE_KEYS = ('secrets', 'configmaps')
+
+class SyntheticCluster:
+    """
+    合成的集群数据
+    
+    Pod平均分布在各命名空间中，每pods_per_deployment个Pod属于一个Deployment，每个Deployment
+    对应一个Service；Pod按顺序分配到各节点。
+    """
+    
+    def __init__(self, pods=1000, namespaces=10, nodes=None, pods_per_deployment=10, secrets_per_namespace=20, configmaps_per_namespace=5):
+        """
+        生成集群数据
+        
+        Args:
+            pods: Pod总数
+            namespaces: 命名空间数量
+            nodes: 节点数量，为空时按每节点30个Pod计算（至少3个）
+            pods_per_deployment: 每个Deployment的副本数
+            secrets_per_namespace: 每个命名空间的Secret数量
+            configmaps_per_namespace: 每个命名空间的ConfigMap数量
+        """
+        self.pod_count = pods
+        self.namespace_names = [f'ns-{i:03d}' for i in range(max(1, namespaces))]
+        self.node_names = [f'node-{i:05d}' for i in range(nodes or max(3, pods // 30))]
+        self.resource_version = 1
+        self._lock = threading.Lock()
+        # 存储键 -> 命名空间（集群级资源为''） -> 名称 -> [对象, JSON]
+        self._store = {key: {} for key in RESOURCE_KEYS.values()}
+        
+        for index, name in enumerate(self.node_names):
+            self._add('nodes', '', self._node(index, name))
+            self._add('nodes.metrics.k8s.io', '', {
+                'metadata': {'name': name, 'creationTimestamp': CREATION_TIMESTAMP},
+                'timestamp': CREATION_TIMESTAMP,
+                'window': '15s',
+                'usage': {'cpu': f'{4000 + index % 16 * 1000}m', 'memory': f'{32 + index % 64}Gi'}
+            })
+        
+        pod_index = 0
+        for ns_index, namespace in enumerate(self.namespace_names):
+            self._add('namespaces', '', {
+                'metadata': {'name': namespace, 'creationTimestamp': CREATION_TIMESTAMP, 'resourceVersion': '1'},
+                'status': {'phase': 'Active'}
+            })
+            ns_pods = pods // len(self.namespace_names) + (1 if ns_index < pods % len(self.namespace_names) else 0)
+            for deploy_index in range(0, ns_pods, pods_per_deployment):
+                name = f'app-{deploy_index // pods_per_deployment:05d}'
+                replicas = min(pods_per_deployment, ns_pods - deploy_index)
+                self._add('deployments', namespace, self._deployment(namespace, name, replicas))
+                self._add('services', namespace, self._service(namespace, name, pod_index))
+                for replica in range(replicas):
+                    pod = self._pod(namespace, name, replica, pod_index)
+                    self._add('pods', namespace, pod)
+                    self._add('pods.metrics.k8s.io', namespace, {
+                        'metadata': {'name': pod['metadata']['name'], 'namespace': namespace, 'creationTimestamp': CREATION_TIMESTAMP},
+                        'timestamp': CREATION_TIMESTAMP,
+                        'window': '15s',
+                        'containers': [{'name': 'app', 'usage': {'cpu': f'{pod_index % 500 * 1000000 + 1000000}n', 'memory': f'{pod_index % 400 * 1024 + 65536}Ki'}}]
+                    })
+                    pod_index += 1
+            for index in range(secrets_per_namespace):
+                self._add('secrets', namespace, {
+                    'metadata': {'name': f'secret-{index:04d}', 'namespace': namespace, 'creationTimestamp': CREATION_TIMESTAMP, 'resourceVersion': '1'},
+                    'type': 'Opaque',
+                    'data': {
+                        'username': base64.b64encode(b'bench').decode(),
+                        'password': base64.b64encode(f'password-{index}'.encode()).decode()
+                    }
+                })
+            for index in range(configmaps_per_namespace):
+                self._add('configmaps', namespace, {
+                    'metadata': {'name': f'config-{index:04d}', 'namespace': namespace, 'creationTimestamp': CREATION_TIMESTAMP, 'resourceVersion': '1'},
+                    'data': {'application.yaml': 'server:\n  port: 8080\n' * 20, 'log.level': 'info'}
+                })
+    
+    def _node(self, index, name):
+        """节点对象"""
+        return {
+            'metadata': {
+                'name': name,
+                'creationTimestamp': CREATION_TIMESTAMP,
+                'resourceVersion': '1',
+                'labels': {'kubernetes.io/hostname': name, 'node-role.kubernetes.io/worker': ''}
+            },
+            'spec': {'podCIDR': f'10.244.{index % 256}.0/24'},
+            'status': {
+                'addresses': [
+                    {'type': 'InternalIP', 'address': f'10.0.{index // 256}.{index % 256}'},
+                    {'type': 'Hostname', 'address': name}
+                ],
+                'allocatable': {'cpu': '32', 'memory': '128Gi', 'pods': '110'},
+                'capacity': {'cpu': '32', 'memory': '131072Mi', 'pods': '110'},
+                'conditions': [{'type': 'Ready', 'status': 'True', 'reason': 'KubeletReady'}],
+                'nodeInfo': {
+                    'architecture': 'amd64',
+                    'bootID': f'boot-{index}',
+                    'containerRuntimeVersion': 'containerd://1.7.13',
+                    'kernelVersion': '5.15.0',
+                    'kubeProxyVersion': 'v1.29.2',
+                    'kubeletVersion': 'v1.29.2',
+                    'machineID': f'machine-{index}',
+                    'operatingSystem': 'linux',
+                    'osImage': 'Ubuntu 22.04.4 LTS',
+                    'systemUUID': f'uuid-{index}'
+                }
+            }
+        }
+    
+    @staticmethod
+    def _container(name):
+        """容器定义"""
+        return {
+            'name': 'app',
+            'image': f'registry.local/{name}:1.0.0',
+            'ports': [{'containerPort': 8080, 'protocol': 'TCP'}],
+            'resources': {
+                'requests': {'cpu': '100m', 'memory': '128Mi'},
+                'limits': {'cpu': '500m', 'memory': '512Mi'}
+            }
+        }
+    
+    def _deployment(self, namespace, name, replicas):
+        """Deployment对象"""
+        return {
+            'metadata': {'name': name, 'namespace': namespace, 'creationTimestamp': CREATION_TIMESTAMP, 'resourceVersion': '1', 'generation': 1},
+            'spec': {
+                'replicas': replicas,
+                'selector': {'matchLabels': {'app': name}},
+                'template': {
+                    'metadata': {'labels': {'app': name}},
+                    'spec': {'containers': [self._container(name)]}
+                }
+            },
+            'status': {'replicas': replicas, 'readyReplicas': replicas, 'availableReplicas': replicas, 'updatedReplicas': replicas}
+        }
+    
+    @staticmethod
+    def _service(namespace, name, index):
+        """Service对象"""
+        return {
+            'metadata': {'name': name, 'namespace': namespace, 'creationTimestamp': CREATION_TIMESTAMP, 'resourceVersion': '1'},
+            'spec': {
+                'type': 'ClusterIP',
+                'clusterIP': f'10.96.{index // 256 % 256}.{index % 256}',
+                'selector': {'app': name},
+                'ports': [{'port': 80, 'targetPort': 8080, 'protocol': 'TCP'}]
+            },
+            'status': {'loadBalancer': {}}
+        }
+    
+    def _pod(self, namespace, name, replica, index):
+        """Pod对象"""
+        pod_name = f'{name}-{replica:04d}'
+        return {
+            'metadata': {
+                'name': pod_name,
+                'namespace': namespace,
+                'creationTimestamp': CREATION_TIMESTAMP,
+                'resourceVersion': '1',
+                'labels': {'app': name, 'load': 'online'},
+                'ownerReferences': [{'apiVersion': 'apps/v1', 'kind': 'ReplicaSet', 'name': f'{name}-rs', 'uid': f'rs-{name}'}]
+            },
+            'spec': {'nodeName': self.node_names[index % len(self.node_names)], 'containers': [self._container(name)]},
+            'status': {
+                'phase': 'Running',
+                'podIP': f'10.244.{index // 256 % 256}.{index % 256}',
+                'hostIP': f'10.0.{index % len(self.node_names) // 256}.{index % len(self.node_names) % 256}',
+                'startTime': CREATION_TIMESTAMP,
+                'conditions': [
+                    {'type': 'Ready', 'status': 'True'},
+                    {'type': 'ContainersReady', 'status': 'True'},
+                    {'type': 'PodScheduled', 'status': 'True'}
+                ],
+                'containerStatuses': [{
+                    'name': 'app',
+                    'image': f'registry.local/{name}:1.0.0',
+                    'imageID': f'registry.local/{name}@sha256:0',
+                    'containerID': f'containerd://{index:064d}',
+                    'ready': True,
+                    'started': True,
+                    'restartCount': index % 3,
+                    'state': {'running': {'startedAt': CREATION_TIMESTAMP}}
+                }]
+            }
+        }
+    
+    def _add(self, key, namespace, obj):
+        """保存对象并序列化"""
+        self._store[key].setdefault(namespace, {})[obj['metadata']['name']] = [obj, json.dumps(obj).encode()]
+    
+    def pod_names(self, namespace):
+        """命名空间下的Pod名称"""
+        return list(self._store['pods'].get(namespace, {}))
+    
+    def first(self, key, namespace):
+        """命名空间下的第一个对象名称"""
+        return next(iter(self._store[key].get(namespace, {})), None)
+    
+    def entries(self, key, namespace=None):
+        """列出对象，namespace为空时返回所有命名空间"""
+        buckets = self._store[key]
+        if namespace is not None:
+            return list(buckets.get(namespace, {}).values())
+        return [entry for bucket in buckets.values() for entry in bucket.values()]
+    
+    def get(self, key, namespace, name):
+        """获取单个对象，不存在时返回None"""
+        return self._store[key].get(namespace or '', {}).get(name)
+    
+    def patch(self, key, namespace, name, patch):
+        """按JSON merge patch语义修改对象（标签修改与strategic merge patch结果相同）"""
+        with self._lock:
+            entry = self.get(key, namespace, name)
+            if entry is None:
+                return None
+            obj = json.loads(entry[1])
+            _merge(obj, patch)
+            self.resource_version += 1
+            obj['metadata']['resourceVersion'] = str(self.resource_version)
+            entry[0], entry[1] = obj, json.dumps(obj).encode()
+            return entry[1]
+
+def _merge(target, patch):
+    """JSON merge patch：None删除字段，字典递归合并，其他值直接替换"""
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+
+def _field(obj, path):
+    """按点分路径取字段值"""
+    for part in path.split('.'):
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(part)
+    return obj
+
+def parse_selector(selector, field=False):
+    """
+    解析标签或字段选择器
+    
+    支持 k=v、k==v、k!=v，标签选择器另外支持 k 和 !k；不支持的语法抛出ValueError。
+    
+    Returns:
+        list: 匹配函数列表，参数为对象
+    """
+    matchers = []
+    for requirement in filter(None, (part.strip() for part in (selector or '').split(','))):
+        if '!=' in requirement:
+            key, value = requirement.split('!=', 1)
+            negate = True
+        elif '=' in requirement:
+            key, value = requirement.replace('==', '=').split('=', 1)
+            negate = False
+        elif not field and ' ' not in requirement and '(' not in requirement:
+            key = requirement.lstrip('!')
+            exists = not requirement.startswith('!')
+            matchers.append(lambda obj, key=key, exists=exists: (key in (obj['metadata'].get('labels') or {})) == exists)
+            continue
+        else:
+            raise ValueError(f'unable to parse requirement: {requirement}')
+        key, value = key.strip(), value.strip()
+        if field:
+            getter = lambda obj, key=key: _field(obj, key)
+        else:
+            getter = lambda obj, key=key: (obj['metadata'].get('labels') or {}).get(key)
+        matchers.append(lambda obj, getter=getter, value=value, negate=negate: (getter(obj) == value) != negate)
+    return matchers
+
+class FakeApiServer:
+    """在本地端口上提供SyntheticCluster数据的HTTP服务"""
+    
+    def __init__(self, cluster, host='127.0.0.1', port=0, latency=0.0):
+        """
+        Args:
+            cluster: SyntheticCluster
+            host: 监听地址
+            port: 监听端口，0为自动分配
+            latency: 每个请求额外的延迟（秒），模拟网络往返
+        """
+        self.cluster = cluster
+        self.latency = latency
+        self.requests = 0  # 收到的请求数
+        self._counter_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def url(self):
+        """服务地址"""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+    
+    def kubeconfig(self):
+        """指向本服务的kubeconfig内容"""
+        return (
+            'apiVersion: v1\n'
+            'kind: Config\n'
+            'clusters:\n'
+            f'- cluster: {{server: "{self.url}"}}\n'
+            '  name: bench\n'
+            'contexts:\n'
+            '- context: {cluster: bench, user: bench}\n'
+            '  name: bench\n'
+            'current-context: bench\n'
+            'users:\n'
+            '- name: bench\n'
+            '  user: {token: bench-token}\n'
+        )
+    
+    def count_request(self):
+        """请求计数加一"""
+        with self._counter_lock:
+            self.requests += 1
+    
+    def start(self):
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-apiserver', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
+
+def _make_handler(server):
+    """创建绑定到FakeApiServer的请求处理类"""
+    cluster = server.cluster
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # 响应头和响应体分两次写入，关闭Nagle算法避免与客户端延迟ACK叠加产生约40ms的等待
+        disable_nagle_algorithm = True
+        
+        def log_message(self, format, *args):
+            pass
+        
+        def _send(self, body, status=200, content_type='application/json'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def _status(self, code, reason, message):
+            body = {'kind': 'Status', 'apiVersion': 'v1', 'status': 'Failure', 'reason': reason, 'message': message, 'code': code}
+            self._send(json.dumps(body).encode(), code)
+        
+        def _route(self):
+            """解析请求路径，返回(存储键, 命名空间, 名称, 查询参数)，无法识别时返回None"""
+            url = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            segments = [segment for segment in url.path.split('/') if segment]
+            if segments[:2] == ['api', 'v1']:
+                group, rest = '', segments[2:]
+            elif segments[:1] == ['apis'] and len(segments) >= 3:
+                group, rest = segments[1], segments[3:]
+            else:
+                return None
+            
+            namespace = name = None
+            if len(rest) >= 3 and rest[0] == 'namespaces':
+                namespace, plural, name = rest[1], rest[2], (rest[3] if len(rest) > 3 else None)
+                if len(rest) > 4:
+                    return None  # 子资源
+            elif rest:
+                plural, name = rest[0], (rest[1] if len(rest) > 1 else None)
+                if len(rest) > 2:
+                    return None
+            else:
+                return None
+            key = RESOURCE_KEYS.get((group, plural))
+            return (key, namespace, name, query) if key else None
+        
+        def _list(self, key, namespace, query):
+            if query.get('watch') in ('1', 'true'):
+                # 没有事件的watch：保持连接到timeoutSeconds后结束
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                time.sleep(min(float(query.get('timeoutSeconds', 60)), 60))
+                self.wfile.write(b'0\r\n\r\n')
+                return
+            
+            try:
+                matchers = parse_selector(query.get('labelSelector')) + parse_selector(query.get('fieldSelector'), field=True)
+            except ValueError as e:
+                return self._status(400, 'BadRequest', str(e))
+            entries = cluster.entries(key, namespace)
+            if matchers:
+                entries = [entry for entry in entries if all(match(entry[0]) for match in matchers)]
+            
+            offset = int(query.get('continue') or 0)
+            limit = int(query.get('limit') or 0)
+            metadata = {'resourceVersion': str(cluster.resource_version)}
+            if limit:
+                if offset + limit < len(entries):
+                    metadata['continue'] = str(offset + limit)
+                entries = entries[offset:offset + limit]
+            
+            if key in TABLE_KEYS and 'as=Table' in (self.headers.get('Accept') or ''):
+                return self._send(self._table(key, entries, metadata))
+            body = b''.join([
+                b'{"apiVersion":"v1","kind":"List","metadata":', json.dumps(metadata).encode(),
+                b',"items":[', b','.join(entry[1] for entry in entries), b']}'
+            ])
+            self._send(body)
+        
+        @staticmethod
+        def _table(key, entries, metadata):
+            """Table格式：只返回元数据和数据项数量"""
+            secret = key == 'secrets'
+            columns = [{'name': 'Name', 'type': 'string'}]
+            if secret:
+                columns.append({'name': 'Type', 'type': 'string'})
+            columns += [{'name': 'Data', 'type': 'string'}, {'name': 'Age', 'type': 'string'}]
+            rows = []
+            for obj, _ in entries:
+                cells = [obj['metadata']['name']]
+                if secret:
+                    cells.append(obj.get('type'))
+                cells += [len(obj.get('data') or {}), '1d']
+                rows.append({'cells': cells, 'object': {'kind': 'PartialObjectMetadata', 'apiVersion': 'meta.k8s.io/v1', 'metadata': obj['metadata']}})
+            return json.dumps({'kind': 'Table', 'apiVersion': 'meta.k8s.io/v1', 'metadata': metadata, 'columnDefinitions': columns, 'rows': rows}).encode()
+        
+        def do_GET(self):
+            server.count_request()
+            if server.latency:
+                time.sleep(server.latency)
+            if urlparse(self.path).path == '/version':
+                return self._send(json.dumps({
+                    'major': '1', 'minor': '29', 'gitVersion': 'v1.29.2', 'gitCommit': 'bench', 'gitTreeState': 'clean',
+                    'buildDate': CREATION_TIMESTAMP, 'goVersion': 'go1.21.7', 'compiler': 'gc', 'platform': 'linux/amd64'
+                }).encode())
+            route = self._route()
+            if route is None:
+                return self._status(404, 'NotFound', f'the server could not find the requested resource: {self.path}')
+            key, namespace, name, query = route
+            if name is None:
+                return self._list(key, namespace, query)
+            entry = cluster.get(key, namespace, name)
+            if entry is None:
+                return self._status(404, 'NotFound', f'{key} "{name}" not found')
+            self._send(entry[1])
+        
+        def do_PATCH(self):
+            server.count_request()
+            if server.latency:
+                time.sleep(server.latency)
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            route = self._route()
+            if route is None or route[2] is None:
+                return self._status(404, 'NotFound', f'the server could not find the requested resource: {self.path}')
+            key, namespace, name, _ = route
+            if not isinstance(body, dict):
+                return self._status(400, 'BadRequest', 'only merge patches are supported')
+            data = cluster.patch(key, namespace, name, body)
+            if data is None:
+                return self._status(404, 'NotFound', f'{key} "{name}" not found')
+            self._send(data)
+    
+    return Handler
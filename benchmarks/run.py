@@ -0,0 +1,335 @@
+"""
+端到端性能基准测试
+
+启动本地模拟apiserver（fake_apiserver.py）和应用，在ClusterManager中添加指向模拟apiserver的集群，
+按路由并发请求，统计吞吐量和p50/p99延迟。每个规模使用独立的集群名称，缓存互不影响。
+
+用法（在项目根目录执行）:
+    python -m benchmarks.run
+    python -m benchmarks.run --pods 100,5000,50000 --requests 20 --concurrency 4
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import hashlib
+import http.client
+import http.cookies
+import json
+import logging
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_apiserver import SyntheticCluster, FakeApiServer
+
+# 基准测试使用的管理员账号，写入临时配置目录
+BENCH_USERNAME = 'bench'
+BENCH_PASSWORD = 'bench'
+
+# 基准测试的路由：(名称, 方法, 路径模板)；GET请求重复访问同一路径，写操作每次请求不同的Pod
+READ_ROUTES = [
+    ('GET /api/clusters', 'GET', '/api/clusters'),
+    ('GET /api/<cluster>/namespaces', 'GET', '/api/{cluster}/namespaces'),
+    ('GET /api/<cluster>/nodes', 'GET', '/api/{cluster}/nodes'),
+    ('GET /api/<cluster>/capacity', 'GET', '/api/{cluster}/capacity'),
+    ('GET /api/<cluster>/<namespace>/capacity', 'GET', '/api/{cluster}/{namespace}/capacity'),
+    ('GET /api/<cluster>/_metrics/nodes', 'GET', '/api/{cluster}/_metrics/nodes?top=20'),
+    ('GET /api/<cluster>/_metrics/pods', 'GET', '/api/{cluster}/_metrics/pods?top=20'),
+    ('GET /api/<cluster>/<namespace>/_metrics/pods', 'GET', '/api/{cluster}/{namespace}/_metrics/pods'),
+    ('GET /api/<cluster>/<namespace>/workloads', 'GET', '/api/{cluster}/{namespace}/workloads'),
+    ('GET /api/<cluster>/<namespace>/pods', 'GET', '/api/{cluster}/{namespace}/pods'),
+    ('GET /api/<cluster>/<namespace>/pods?fields=name,status', 'GET', '/api/{cluster}/{namespace}/pods?fields=name,status'),
+    ('GET /api/<cluster>/<namespace>/pods?limit=100', 'GET', '/api/{cluster}/{namespace}/pods?limit=100'),
+    ('GET /api/<cluster>/<namespace>/deployment/<name>/pods', 'GET', '/api/{cluster}/{namespace}/deployment/{deployment}/pods'),
+    ('GET /api/<cluster>/<namespace>/deployment/<name>/yaml', 'GET', '/api/{cluster}/{namespace}/deployment/{deployment}/yaml'),
+    ('GET /api/<cluster>/pods/search', 'GET', '/api/{cluster}/pods/search?label_selector=app%3D{deployment}'),
+    ('GET /api/<cluster>/<namespace>/services', 'GET', '/api/{cluster}/{namespace}/services'),
+    ('GET /api/<cluster>/<namespace>/services/Service/<name>/yaml', 'GET', '/api/{cluster}/{namespace}/services/Service/{service}/yaml'),
+    ('GET /api/<cluster>/<namespace>/configs', 'GET', '/api/{cluster}/{namespace}/configs'),
+    ('GET /api/<cluster>/<namespace>/configs/Secret/<name>/yaml', 'GET', '/api/{cluster}/{namespace}/configs/Secret/{secret}/yaml'),
+    ('GET /api/<cluster>/<namespace>/storage', 'GET', '/api/{cluster}/{namespace}/storage'),
+    ('GET /api/_aggregate/pods', 'GET', '/api/_aggregate/pods?namespace={namespace}&clusters={cluster}'),
+]
+WRITE_ROUTES = [
+    ('POST /api/<cluster>/<namespace>/pods/<pod>/remove-load', 'POST', '/api/{cluster}/{namespace}/pods/{pod}/remove-load'),
+    ('POST /api/<cluster>/<namespace>/pods/<pod>/restore-traffic', 'POST', '/api/{cluster}/{namespace}/pods/{pod}/restore-traffic'),
+    ('POST /api/<cluster>/pods/batch-load', 'POST', '/api/{cluster}/pods/batch-load'),
+]
+
+class BenchClient:
+    """每个线程一个keep-alive连接的HTTP客户端，共享登录会话"""
+    
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.cookie = None
+        self._local = threading.local()
+    
+    def request(self, method, path, body=None):
+        """
+        发送请求并读取完整响应
+        
+        Returns:
+            tuple: (状态码, 响应体)
+        """
+        headers = {'Content-Type': 'application/json'}
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        data = json.dumps(body).encode() if body is not None else None
+        for attempt in range(2):
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=300)
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+                if response.getheader('Set-Cookie'):
+                    cookie = http.cookies.SimpleCookie(response.getheader('Set-Cookie'))
+                    self.cookie = '; '.join(f'{key}={morsel.value}' for key, morsel in cookie.items())
+                return response.status, payload
+            except (http.client.HTTPException, OSError):
+                # 服务端关闭了空闲连接，重连一次
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+    
+    def login(self, username, password):
+        """登录并保存会话Cookie"""
+        status, payload = self.request('POST', '/api/login', {'username': username, 'password': password})
+        if status != 200 or not json.loads(payload).get('success'):
+            raise RuntimeError(f'登录失败: {status} {payload[:200]!r}')
+
+def percentile(sorted_values, p):
+    """最近秩百分位数"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+def run_route(client, apiserver, name, method, path_for, body_for, requests, concurrency, warmup):
+    """
+    并发请求一个路由并统计
+    
+    Args:
+        path_for: 请求序号 -> 路径
+        body_for: 请求序号 -> 请求体（GET为None）
+    
+    Returns:
+        dict: 统计结果，延迟单位为毫秒
+    """
+    for index in range(warmup):
+        client.request(method, path_for(-index - 1), body_for(-index - 1))
+    
+    def one(index):
+        start = time.perf_counter()
+        status, _ = client.request(method, path_for(index), body_for(index))
+        return time.perf_counter() - start, status
+    
+    apiserver_requests = apiserver.requests
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+    apiserver_requests = apiserver.requests - apiserver_requests
+    
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    errors = sum(1 for _, status in results if status >= 400)
+    return {
+        'route': name,
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'throughput': round(requests / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        'apiserver_requests': round(apiserver_requests / requests, 2) if requests else 0.0,
+    }
+
+def run_size(client, args, pods, report):
+    """在指定规模的模拟集群上运行所有路由"""
+    from app.utils.cluster_manager import ClusterManager
+    
+    build_started = time.perf_counter()
+    synthetic = SyntheticCluster(
+        pods=pods,
+        namespaces=args.namespaces,
+        nodes=args.nodes,
+        pods_per_deployment=args.pods_per_deployment,
+        secrets_per_namespace=args.secrets
+    )
+    apiserver = FakeApiServer(synthetic, latency=args.latency / 1000).start()
+    print(f'\n== {pods} pods / {len(synthetic.namespace_names)} namespaces / {len(synthetic.node_names)} nodes '
+          f'(stub {apiserver.url}, built in {time.perf_counter() - build_started:.1f}s) ==', file=report)
+    
+    cluster = f'bench-{pods}'
+    cluster_manager = ClusterManager()
+    cluster_manager.add_cluster(cluster, cluster, apiserver.kubeconfig())
+    
+    namespace = synthetic.namespace_names[0]
+    pod_names = synthetic.pod_names(namespace)
+    context = {
+        'cluster': cluster,
+        'namespace': namespace,
+        'deployment': synthetic.first('deployments', namespace),
+        'service': synthetic.first('services', namespace),
+        'secret': synthetic.first('secrets', namespace),
+    }
+    
+    results = []
+    try:
+        routes = [(route, False) for route in READ_ROUTES] + [(route, True) for route in WRITE_ROUTES]
+        for (name, method, template), write in routes:
+            if args.routes and not any(pattern in name for pattern in args.routes):
+                continue
+            if write and not pod_names:
+                continue
+            
+            if not write:
+                path = template.format(**context)
+                path_for = lambda index, path=path: path
+                body_for = lambda index: None
+            elif name.endswith('batch-load'):
+                path = template.format(**context)
+                path_for = lambda index, path=path: path
+                # 每次请求依次取batch_size个Pod，踢出和恢复交替进行
+                body_for = lambda index: {
+                    'targets': [
+                        {'namespace': namespace, 'pod': pod_names[(index * args.batch_size + offset) % len(pod_names)]}
+                        for offset in range(args.batch_size)
+                    ],
+                    'load': 'done' if index % 2 == 0 else 'online',
+                    'parallelism': args.concurrency
+                }
+            else:
+                path_for = lambda index, template=template: template.format(pod=pod_names[index % len(pod_names)], **context)
+                body_for = lambda index: None
+            
+            result = run_route(client, apiserver, name, method, path_for, body_for, args.requests, args.concurrency, args.warmup)
+            result['pods'] = pods
+            results.append(result)
+            print(format_row(result), file=report)
+            report.flush()
+    finally:
+        cluster_manager.delete_cluster(cluster)
+        apiserver.stop()
+    return results
+
+HEADER = f"{'route':<64} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>6} {'api/req':>7}"
+
+def format_row(result):
+    """格式化一行统计结果"""
+    return (f"{result['route']:<64} {result['throughput']:>9.1f} {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} "
+            f"{result['max_ms']:>9.1f} {result['errors']:>6} {result['apiserver_requests']:>7.1f}")
+
+def compare(results, baseline_file, tolerance, report):
+    """
+    与基线结果比较，p50变慢或吞吐量下降超过tolerance时记为回归
+    
+    Returns:
+        int: 回归的路由数
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {(item['pods'], item['route']): item for item in json.load(f)['results']}
+    
+    regressions = 0
+    print(f'\n== compared with {baseline_file} (tolerance {tolerance:.0%}) ==', file=report)
+    for result in results:
+        base = baseline.get((result['pods'], result['route']))
+        if not base:
+            continue
+        slower = base['p50_ms'] and result['p50_ms'] > base['p50_ms'] * (1 + tolerance)
+        fewer = base['throughput'] and result['throughput'] < base['throughput'] * (1 - tolerance)
+        if slower or fewer or result['errors'] > base['errors']:
+            regressions += 1
+            print(f"REGRESSION {result['pods']} pods {result['route']}: p50 {base['p50_ms']} -> {result['p50_ms']} ms, "
+                  f"req/s {base['throughput']} -> {result['throughput']}, errors {base['errors']} -> {result['errors']}", file=report)
+    if not regressions:
+        print('no regressions', file=report)
+    return regressions
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='K8s Pod负载管理工具端到端性能基准测试')
+    parser.add_argument('--pods', default='100,5000', help='Pod总数，多个规模用逗号分隔（如 100,5000,50000）')
+    parser.add_argument('--namespaces', type=int, default=10, help='命名空间数量，Pod平均分布，命名空间级路由使用第一个命名空间')
+    parser.add_argument('--nodes', type=int, default=None, help='节点数量，默认每30个Pod一个节点')
+    parser.add_argument('--pods-per-deployment', type=int, default=10, help='每个Deployment的副本数')
+    parser.add_argument('--secrets', type=int, default=20, help='每个命名空间的Secret数量')
+    parser.add_argument('--requests', type=int, default=50, help='每个路由的请求数')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发请求数')
+    parser.add_argument('--warmup', type=int, default=2, help='每个路由正式计时前的预热请求数')
+    parser.add_argument('--batch-size', type=int, default=20, help='batch-load每次请求的Pod数')
+    parser.add_argument('--latency', type=float, default=0.0, help='模拟apiserver每个请求的额外延迟（毫秒）')
+    parser.add_argument('--routes', default='', help='只测试名称包含这些字符串的路由，逗号分隔')
+    parser.add_argument('--informer', action='store_true', help='开启informer缓存（INFORMER_ENABLED）')
+    parser.add_argument('--output', help='将结果写入JSON文件，可作为之后比较的基线')
+    parser.add_argument('--baseline', help='与基线JSON文件比较，有回归时以状态码1退出')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='回归判断的容忍比例')
+    parser.add_argument('--verbose', action='store_true', help='显示应用自身的输出')
+    args = parser.parse_args(argv)
+    args.pods = [int(value) for value in args.pods.split(',') if value.strip()]
+    args.routes = [value.strip() for value in args.routes.split(',') if value.strip()]
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = sys.stdout
+    
+    # 配置目录指向临时目录：用户、集群配置和操作日志不写入项目的config目录
+    config_dir = tempfile.mkdtemp(prefix='k8s-manager-bench-')
+    os.environ['CONFIG_DIR'] = config_dir
+    with open(os.path.join(config_dir, 'auth_config.json'), 'w', encoding='utf-8') as f:
+        json.dump([{
+            'username': BENCH_USERNAME,
+            'password_hash': hashlib.sha256(BENCH_PASSWORD.encode()).hexdigest(),
+            'permissions': {'admin': True, 'read': True, 'write': True, 'clusters': {}}
+        }], f)
+    os.environ['INFORMER_ENABLED'] = 'true' if args.informer else 'false'
+    
+    from werkzeug.serving import make_server
+    from app import create_app, shutdown_app
+    
+    if not args.verbose:
+        # 应用在每个请求中打印调试信息，基准测试时丢弃
+        sys.stdout = open(os.devnull, 'w')
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    
+    app = create_app()
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-server', daemon=True).start()
+    
+    results = []
+    try:
+        client = BenchClient('127.0.0.1', server.server_port)
+        client.login(BENCH_USERNAME, BENCH_PASSWORD)
+        print(f'requests per route: {args.requests}, concurrency: {args.concurrency}, informer: {args.informer}', file=report)
+        print(HEADER, file=report)
+        for pods in args.pods:
+            results.extend(run_size(client, args, pods, report))
+    finally:
+        server.shutdown()
+        shutdown_app()
+        if sys.stdout is not report:
+            sys.stdout.close()
+            sys.stdout = report
+        shutil.rmtree(config_dir, ignore_errors=True)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'args': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')}, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f'\nresults written to {args.output}', file=report)
+    
+    if args.baseline and compare(results, args.baseline, args.tolerance, report):
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,33 @@
+# gunicorn生产环境配置，所有参数可通过环境变量调整（见app/config/config.py）
+# 启动：gunicorn -c gunicorn.conf.py
+from app.config.config import Config
+
+wsgi_app = 'wsgi:app'
+bind = Config.SERVER_BIND
+workers = Config.SERVER_WORKERS
+worker_class = Config.SERVER_WORKER_CLASS
+threads = Config.SERVER_THREADS
+worker_connections = Config.SERVER_WORKER_CONNECTIONS
+timeout = Config.SERVER_TIMEOUT
+graceful_timeout = Config.SERVER_GRACEFUL_TIMEOUT
+keepalive = Config.SERVER_KEEPALIVE
+max_requests = Config.SERVER_MAX_REQUESTS
+max_requests_jitter = max_requests // 10
+
+# 每个worker在fork之后各自创建线程池、informer和连接池，不预加载应用
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
+
+def worker_exit(server, worker):
+    """worker退出时停止后台任务，释放watch连接和线程池"""
+    from app import shutdown_app
+    shutdown_app(timeout=Config.SERVER_GRACEFUL_TIMEOUT)
+
+def child_exit(server, worker):
+    """多worker指标模式下清理已退出worker的指标文件"""
+    import os
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
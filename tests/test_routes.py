@@ -0,0 +1,58 @@
+import os
+import tempfile
+
+# Config在导入时读取CONFIG_DIR，需在导入app之前设置
+os.environ.setdefault('CONFIG_DIR', tempfile.mkdtemp())
+
+import pytest
+from app import create_app
+
+@pytest.fixture(scope='module')
+def adapter():
+    """不发送请求，只按URL匹配路由"""
+    return create_app().url_map.bind('localhost')
+
+def match(adapter, path, method='GET'):
+    """返回路径匹配到的端点和参数"""
+    return adapter.match(path, method=method)
+
+@pytest.mark.parametrize('path, endpoint', [
+    ('/api/c/wave-jobs/workloads', 'k8s.get_workloads'),
+    ('/api/c/wave-jobs/pods', 'k8s.get_all_pods'),
+    ('/api/c/wave-jobs/services', 'k8s.get_services'),
+    ('/api/c/wave-jobs/configs', 'k8s.get_configs'),
+    ('/api/c/wave-jobs/storage', 'k8s.get_storage'),
+    ('/api/c/wave-jobs/capacity', 'k8s.get_namespace_capacity'),
+])
+def test_namespace_named_wave_jobs_routes_to_list_views(adapter, path, endpoint):
+    """名为wave-jobs的命名空间仍然匹配资源列表接口"""
+    matched, args = match(adapter, path)
+    assert matched == endpoint
+    assert args['cluster'] == 'c'
+    assert args['namespace'] == 'wave-jobs'
+
+def test_wave_job_routes(adapter):
+    """分批任务接口位于_wave-jobs下"""
+    assert match(adapter, '/api/c/_wave-jobs') == ('k8s.get_wave_jobs', {'cluster': 'c'})
+    assert match(adapter, '/api/c/_wave-jobs/j1') == ('k8s.get_wave_job', {'cluster': 'c', 'job_id': 'j1'})
+    assert match(adapter, '/api/c/_wave-jobs/j1/cancel', method='POST') == (
+        'k8s.cancel_wave_job', {'cluster': 'c', 'job_id': 'j1'}
+    )
+
+@pytest.mark.parametrize('path, endpoint', [
+    ('/api/aggregate/nodes', 'k8s.get_nodes'),
+    ('/api/aggregate/namespaces', 'k8s.get_namespaces'),
+])
+def test_cluster_named_aggregate_routes_to_cluster_views(adapter, path, endpoint):
+    """名为aggregate的集群仍然匹配集群级接口"""
+    assert match(adapter, path) == (endpoint, {'cluster': 'aggregate'})
+
+def test_aggregate_route(adapter):
+    """多集群聚合查询位于_aggregate下"""
+    assert match(adapter, '/api/_aggregate/pods') == ('k8s.aggregate_clusters', {'resource': 'pods'})
+
+def test_cluster_name_with_leading_underscore_rejected():
+    """下划线开头的集群名保留给跨集群接口"""
+    from app.utils.cluster_manager import ClusterManager
+    success, _ = ClusterManager().add_cluster('_aggregate', '_aggregate', '')
+    assert not success
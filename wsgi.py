@@ -0,0 +1,4 @@
+from app import create_app
+
+# WSGI入口（gunicorn -c gunicorn.conf.py wsgi:app），与app包同名的app.py无法作为模块导入
+app = create_app()